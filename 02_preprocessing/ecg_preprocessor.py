@@ -13,17 +13,24 @@ organized in the following classification system:
 - M: Myocardial Infarction (MI)
 """
 
+import io
 import os
+import time
 import cv2
 import numpy as np
-import pandas as pd
 from PIL import Image
-import matplotlib.pyplot as plt
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
 import warnings
 warnings.filterwarnings('ignore')
 
+# cv2.imdecode flags for decoding at 1/scale of the source resolution (JPEG
+# decodes straight to the smaller size, other formats are downsampled on load)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
 class ECGPreprocessor:
     """
     ECG Image Preprocessing Class for RythmGuard System
@@ -47,7 +54,24 @@ class ECGPreprocessor:
             'Q': {'name': 'Unknown', 'description': 'Paced beats, unclassifiable beats'},
             'M': {'name': 'Myocardial Infarction', 'description': 'MI - Sometimes added in extended versions'}
         }
-        self.label_encoder = LabelEncoder()
+        self._label_encoder = None
+        
+    @property
+    def label_encoder(self):
+        """
+        Label encoder for dataset creation, created on first use
+        
+        sklearn is only imported here so that serving, which never encodes
+        labels, does not pay for it at startup.
+        """
+        if self._label_encoder is None:
+            from sklearn.preprocessing import LabelEncoder
+            self._label_encoder = LabelEncoder()
+        return self._label_encoder
+    
+    @label_encoder.setter
+    def label_encoder(self, encoder):
+        self._label_encoder = encoder
         
     def analyze_dataset(self, subset='test'):
         """
@@ -117,25 +141,125 @@ class ECGPreprocessor:
             if img is None:
                 raise ValueError(f"Could not load image: {image_path}")
             
-            # Convert BGR to RGB
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            return self.preprocess_array(img, apply_augmentation)
+            
+        except Exception as e:
+            print(f"Error processing image {image_path}: {e}")
+            return None
+    
+    def read_image_size(self, image_bytes):
+        """
+        Read an encoded image's dimensions from its header without decoding it
+        
+        Args:
+            image_bytes (bytes): Encoded image data
+            
+        Returns:
+            tuple: (width, height), or None if the header cannot be read
+        """
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as header:
+                return header.size
+        except Exception:
+            return None
+    
+    def choose_decode_scale(self, image_size):
+        """
+        Pick the largest decode downscale that still leaves at least target_size pixels
+        
+        Args:
+            image_size (tuple): Source (width, height), or None if unknown
             
-            # Resize image
-            img = cv2.resize(img, self.target_size)
+        Returns:
+            int: 1, 2, 4 or 8
+        """
+        if image_size is None:
+            return 1
+        
+        width, height = image_size
+        target_width, target_height = self.target_size
+        for scale in (8, 4, 2):
+            if width >= target_width * scale and height >= target_height * scale:
+                return scale
+        return 1
+    
+    def load_and_preprocess_bytes(self, image_bytes, apply_augmentation=False, timings=None,
+                                  reduced_decode=False, decode_info=None):
+        """
+        Decode and preprocess an encoded ECG image held in memory
+        
+        Args:
+            image_bytes (bytes): Encoded image data (PNG, JPEG, ...)
+            apply_augmentation (bool): Whether to apply data augmentation
+            timings (dict): If given, filled with the seconds spent per stage
+                ('decode', 'color', 'resize', 'normalize')
+            reduced_decode (bool): Decode images several times larger than
+                target_size at reduced resolution (1/2, 1/4 or 1/8)
+            decode_info (dict): If given, filled with 'source_size' and the
+                'decode_scale' that was used
             
-            # Normalize pixel values to [0, 1]
-            img = img.astype(np.float32) / 255.0
+        Returns:
+            numpy.ndarray: Preprocessed image array, or None if decoding fails
+        """
+        try:
+            # Decode straight from the memory buffer, no temporary file needed
+            started = time.perf_counter()
+            source_size = self.read_image_size(image_bytes) if reduced_decode or decode_info is not None else None
+            scale = self.choose_decode_scale(source_size) if reduced_decode else 1
             
-            # Apply augmentation if requested
-            if apply_augmentation:
-                img = self._apply_augmentation(img)
+            buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+            img = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[scale]) if buffer.size else None
+            if timings is not None:
+                timings['decode'] = time.perf_counter() - started
+            if decode_info is not None:
+                decode_info['source_size'] = source_size
+                decode_info['decode_scale'] = scale
+            if img is None:
+                raise ValueError("Could not decode image bytes")
             
-            return img
+            return self.preprocess_array(img, apply_augmentation, timings)
             
         except Exception as e:
-            print(f"Error processing image {image_path}: {e}")
+            print(f"Error processing image bytes: {e}")
             return None
     
+    def preprocess_array(self, img, apply_augmentation=False, timings=None):
+        """
+        Preprocess an already decoded ECG image
+        
+        Args:
+            img (numpy.ndarray): BGR uint8 image, as returned by cv2.imread/cv2.imdecode
+            apply_augmentation (bool): Whether to apply data augmentation
+            timings (dict): If given, filled with the seconds spent per stage
+                ('color', 'resize', 'normalize')
+            
+        Returns:
+            numpy.ndarray: Preprocessed image array
+        """
+        started = time.perf_counter()
+        
+        # Convert BGR to RGB
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        color_done = time.perf_counter()
+        
+        # Resize image
+        img = cv2.resize(img, self.target_size)
+        resize_done = time.perf_counter()
+        
+        # Normalize pixel values to [0, 1]
+        img = img.astype(np.float32) / 255.0
+        
+        if timings is not None:
+            timings['color'] = color_done - started
+            timings['resize'] = resize_done - color_done
+            timings['normalize'] = time.perf_counter() - resize_done
+        
+        # Apply augmentation if requested
+        if apply_augmentation:
+            img = self._apply_augmentation(img)
+        
+        return img
+    
     def _apply_augmentation(self, img):
         """
         Apply data augmentation techniques
@@ -243,6 +367,7 @@ class ECGPreprocessor:
             'total_samples': len(X)
         }
         
+        import pandas as pd
         pd.DataFrame(metadata).to_csv(os.path.join(output_dir, f'{subset}_metadata.csv'), index=False)
         
         print(f"💾 Processed data saved to: {output_dir}")
@@ -257,6 +382,8 @@ class ECGPreprocessor:
             class_names (numpy.ndarray): Class names
             num_samples (int): Number of samples to display
         """
+        import matplotlib.pyplot as plt
+        
         fig, axes = plt.subplots(3, 4, figsize=(16, 12))
         fig.suptitle('ECG Image Samples by Class', fontsize=16, fontweight='bold')
         
@@ -311,6 +438,7 @@ class ECGPreprocessor:
             print(f"{class_name} ({class_info['name']}): {count} samples ({percentage:.1f}%)")
         
         # Create distribution plot
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(12, 6))
         
         plt.subplot(1, 2, 1)
@@ -0,0 +1,323 @@
+"""
+RythmGuard Inference Session
+===========================
+
+This module provides the single inference path shared by the Flask API, the
+command line tools and the evaluation scripts. A session loads a model bundle
+once, preprocesses ECG images and classifies them with one forest pass
+(`predict_proba`, with the label taken as the most probable class).
+"""
+
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+# Add preprocessing directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '02_preprocessing'))
+
+from ecg_preprocessor import ECGPreprocessor
+from severity_predictor import SeverityPredictor
+from model_bundle import load_bundle, bundle_version, estimate_model_bytes
+from thread_budget import set_model_threads
+
+# Class order used by bundles saved without class names (bare model files)
+DEFAULT_CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+# Batch sizes run by InferenceSession.warm_up unless told otherwise
+DEFAULT_WARMUP_BATCH_SIZES = (1, 8)
+
+
+class InferenceSession:
+    """
+    Loaded ECG classification model plus everything needed to serve it
+    """
+
+    def __init__(self, model, class_names=None, target_size=(224, 224), data_path='.',
+                 model_path=None, metadata=None, preprocessor=None, severity_predictor=None,
+                 model_version=None, threads=None):
+        """
+        Initialize the inference session
+
+        Args:
+            model: Fitted classifier exposing predict_proba and classes_
+            class_names (list): Class names indexed by the model's labels
+            target_size (tuple): Image size the model was trained on
+            data_path (str): Dataset directory handed to the preprocessor
+            model_path (str): File the model was loaded from, if any
+            metadata (dict): Extra bundle fields (training accuracy, ...)
+            preprocessor (ECGPreprocessor): Preprocessor to reuse instead of creating one
+            severity_predictor (SeverityPredictor): Severity predictor to reuse
+            model_version (str): Identifier of the loaded model (default: derived from model_path)
+            threads (int): Threads one predict_proba call may use, replacing the
+                n_jobs the model was trained with (None keeps it; see thread_budget)
+        """
+        self.model = model
+        if threads is not None:
+            set_model_threads(model, threads)
+        self.class_names = list(class_names) if class_names is not None else list(DEFAULT_CLASS_NAMES)
+        self.target_size = tuple(target_size)
+        self.model_path = model_path
+        self.metadata = metadata or {}
+        self.preprocessor = preprocessor or ECGPreprocessor(data_path, target_size=self.target_size)
+        self.severity_predictor = severity_predictor or SeverityPredictor()
+        self.feature_count = self.target_size[0] * self.target_size[1] * 3
+
+        if model_version is None:
+            model_version = bundle_version(model_path) if model_path else f'in-memory-{id(model):x}'
+        self.model_version = model_version
+        self._resident_bytes = None
+
+    @classmethod
+    def from_bundle(cls, model_path, data_path='.', target_size=(224, 224), threads=None):
+        """
+        Load a session from a saved model bundle
+
+        Args:
+            model_path (str): Path to a joblib bundle (dict written by SimpleTrainer or bare
+                model) or a memory-mappable bundle directory
+            data_path (str): Dataset directory handed to the preprocessor
+            target_size (tuple): Image size the model was trained on
+            threads (int): Threads per predict_proba call (None keeps the bundle's n_jobs)
+
+        Returns:
+            InferenceSession: Ready-to-use session
+        """
+        model_data = load_bundle(model_path)
+
+        if isinstance(model_data, dict):
+            model = model_data['model']
+            class_names = model_data['class_names']
+            metadata = {key: value for key, value in model_data.items() if key != 'model'}
+        else:
+            model = model_data
+            class_names = None
+            metadata = {}
+
+        return cls(model, class_names, target_size=target_size, data_path=data_path,
+                   model_path=str(model_path), metadata=metadata, threads=threads)
+
+    def resident_bytes(self):
+        """
+        Estimated memory held by the loaded model (computed once)
+
+        Returns:
+            int: Bytes
+        """
+        if self._resident_bytes is None:
+            self._resident_bytes = estimate_model_bytes(self.model)
+        return self._resident_bytes
+
+    def allocate(self, count):
+        """
+        Allocate an uninitialized feature matrix for a batch of images
+
+        Args:
+            count (int): Number of images
+
+        Returns:
+            numpy.ndarray: float32 matrix of shape (count, feature_count)
+        """
+        return np.empty((count, self.feature_count), dtype=np.float32)
+
+    def predict_proba(self, features):
+        """
+        Evaluate the model once over a feature matrix
+
+        Args:
+            features (numpy.ndarray): Matrix of flattened preprocessed images
+
+        Returns:
+            numpy.ndarray: Class probabilities, one row per image
+        """
+        return self.model.predict_proba(features)
+
+    def class_name_for(self, column):
+        """
+        Map a predict_proba column to its class name
+
+        Args:
+            column (int): Column index in the probability matrix
+
+        Returns:
+            str: Class name
+        """
+        label = self.model.classes_[column]
+        if isinstance(label, str):
+            return str(label)
+        return self.class_names[int(label)]
+
+    def describe(self, probabilities, with_severity=True):
+        """
+        Turn one row of class probabilities into a prediction result
+
+        Args:
+            probabilities (numpy.ndarray): Class probabilities for one image
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            dict: Prediction result
+        """
+        best = int(np.argmax(probabilities))
+        predicted_class = self.class_name_for(best)
+
+        result = {
+            'label': self.model.classes_[best],
+            'predicted_class': predicted_class,
+            'confidence': float(probabilities[best]),
+            'probabilities': {self.class_name_for(i): float(p) for i, p in enumerate(probabilities)}
+        }
+
+        if with_severity:
+            severity_result = self.severity_predictor.predict_severity_rule_based(predicted_class)
+            result['severity'] = severity_result['severity']
+            result['severity_confidence'] = severity_result['confidence']
+
+        return result
+
+    def predict_features(self, features, with_severity=True):
+        """
+        Classify a feature matrix with a single forest pass
+
+        Args:
+            features (numpy.ndarray): Matrix of flattened preprocessed images
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            list: One prediction result per row
+        """
+        probabilities = self.predict_proba(features)
+        return [self.describe(row, with_severity) for row in probabilities]
+
+    def predict(self, images, with_severity=True):
+        """
+        Classify a batch of preprocessed images
+
+        Args:
+            images (list): Preprocessed images from ECGPreprocessor
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            list: One prediction result per image
+        """
+        if len(images) == 0:
+            return []
+
+        features = self.allocate(len(images))
+        for row, image in enumerate(images):
+            features[row] = image.reshape(-1)
+
+        return self.predict_features(features, with_severity)
+
+    def predict_one(self, image, with_severity=True):
+        """
+        Classify a single preprocessed image
+
+        Args:
+            image (numpy.ndarray): Preprocessed image from ECGPreprocessor
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            dict: Prediction result
+        """
+        return self.predict([image], with_severity)[0]
+
+    def predict_paths(self, image_paths, with_severity=True):
+        """
+        Load, preprocess and classify image files with one model call
+
+        Args:
+            image_paths (list): Paths to ECG images
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            list: Prediction result per path, None where the image could not be loaded
+        """
+        results = [None] * len(image_paths)
+        images = []
+        rows = []
+
+        for index, image_path in enumerate(image_paths):
+            image = self.preprocessor.load_and_preprocess_image(image_path)
+            if image is not None:
+                images.append(image)
+                rows.append(index)
+
+        for index, result in zip(rows, self.predict(images, with_severity)):
+            results[index] = result
+
+        return results
+
+    def predict_path(self, image_path, with_severity=True):
+        """
+        Load, preprocess and classify a single image file
+
+        Args:
+            image_path (str): Path to an ECG image
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            dict: Prediction result, or None if the image could not be loaded
+        """
+        return self.predict_paths([image_path], with_severity)[0]
+
+    def predict_bytes(self, image_bytes, with_severity=True):
+        """
+        Decode, preprocess and classify an encoded image held in memory
+
+        Args:
+            image_bytes (bytes): Encoded image data
+            with_severity (bool): Whether to add the rule-based severity
+
+        Returns:
+            dict: Prediction result, or None if the image could not be decoded
+        """
+        image = self.preprocessor.load_and_preprocess_bytes(image_bytes)
+        if image is None:
+            return None
+        return self.predict_one(image, with_severity)
+
+    def warm_up(self, batch_sizes=DEFAULT_WARMUP_BATCH_SIZES):
+        """
+        Run synthetic inferences so the first real requests are not slowed by
+        cold tree pages and lazily initialized cv2/numpy code paths
+
+        Every batch size goes through the full path: a synthetic ECG-sized
+        image is PNG-encoded, decoded, preprocessed, classified and described.
+
+        Args:
+            batch_sizes (iterable): Number of images per warm-up inference
+
+        Returns:
+            dict: Total seconds, page fault-in seconds and per-batch timings
+        """
+        started = time.perf_counter()
+        report = {'model_version': self.model_version, 'batches': []}
+
+        # Fault in a memory-mapped forest up front
+        if hasattr(self.model, 'touch_pages'):
+            page_started = time.perf_counter()
+            report['mapped_bytes'] = self.model.touch_pages()
+            report['page_touch_seconds'] = time.perf_counter() - page_started
+
+        # Larger than the model input so decode and resize do real work
+        rng = np.random.RandomState(0)
+        height, width = self.target_size[1] * 2, self.target_size[0] * 2
+        ok, encoded = cv2.imencode('.png', rng.randint(0, 256, (height, width, 3), dtype=np.uint8))
+        if not ok:
+            raise RuntimeError("Could not encode the warm-up image")
+        image_bytes = encoded.tobytes()
+
+        for batch_size in batch_sizes:
+            batch_started = time.perf_counter()
+            images = [self.preprocessor.load_and_preprocess_bytes(image_bytes) for _ in range(batch_size)]
+            self.predict(images)
+            report['batches'].append({
+                'batch_size': batch_size,
+                'seconds': time.perf_counter() - batch_started
+            })
+
+        report['seconds'] = time.perf_counter() - started
+        return report
@@ -0,0 +1,439 @@
+"""
+RythmGuard Model Bundles
+=======================
+
+This module reads and writes the two on-disk model formats:
+
+- The joblib bundle written by SimpleTrainer.train_model: a dict with
+  `model`, `class_names`, `feature_shape` and training metadata (or, for old
+  files, a bare model).
+- The memory-mappable bundle: a directory holding the forest's tree node
+  arrays as plain, uncompressed `.npy` files plus a `manifest.json`. Loading
+  it maps the arrays with `mmap_mode='r'`, so startup is near-instant, pages
+  fault in lazily on first use and every process serving the same bundle
+  shares them through the page cache.
+
+sklearn copies tree nodes into private memory when unpickling, so the
+mapped bundle is evaluated by MappedForestClassifier, which walks the
+mapped arrays directly and gives the same probabilities as the forest's own
+predict_proba.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import shutil
+import tempfile
+import uuid
+import numpy as np
+import joblib
+
+MANIFEST_NAME = 'manifest.json'
+MMAP_BUNDLE_SUFFIX = '.mmap'
+MMAP_BUNDLE_VERSION = 1
+
+# Tree node arrays stored in a mapped bundle
+_ARRAY_NAMES = ['children_left', 'children_right', 'feature', 'threshold', 'value', 'roots']
+
+
+class MappedForestClassifier:
+    """
+    Random forest evaluated straight from (memory-mapped) node arrays
+
+    Trees are concatenated into flat arrays; `roots` holds the index of each
+    tree's root node. Child indices are global and -1 marks a leaf.
+    """
+
+    def __init__(self, children_left, children_right, feature, threshold, value, roots,
+                 classes, n_features, max_depth):
+        """
+        Initialize the mapped forest
+
+        Args:
+            children_left (numpy.ndarray): Left child of every node (-1 for leaves)
+            children_right (numpy.ndarray): Right child of every node (-1 for leaves)
+            feature (numpy.ndarray): Feature tested at every node
+            threshold (numpy.ndarray): Threshold tested at every node
+            value (numpy.ndarray): Class probabilities of every node, shape (n_nodes, n_classes)
+            roots (numpy.ndarray): Root node index of every tree
+            classes (numpy.ndarray): Class labels, in probability column order
+            n_features (int): Number of input features
+            max_depth (int): Depth of the deepest tree
+        """
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.roots = roots
+        self.classes_ = np.asarray(classes)
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = int(n_features)
+        self.n_estimators = len(roots)
+        self.max_depth = int(max_depth)
+
+    def predict_proba(self, X, trees=None):
+        """
+        Average the class probabilities of the trees
+
+        Args:
+            X (numpy.ndarray): Feature matrix, shape (n_samples, n_features)
+            trees (slice or array): Subset of trees to evaluate (default: all)
+
+        Returns:
+            numpy.ndarray: Class probabilities, shape (n_samples, n_classes)
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, expected (n_samples, {self.n_features_in_})")
+
+        roots = np.asarray(self.roots if trees is None else self.roots[trees])
+        if len(roots) == 0:
+            raise ValueError("At least one tree must be evaluated")
+
+        # Walk every (sample, tree) pair down one level per iteration
+        node = np.repeat(roots[np.newaxis, :], len(X), axis=0)
+        rows = np.arange(len(X))[:, np.newaxis]
+
+        for _ in range(self.max_depth):
+            left = self.children_left[node]
+            internal = left != -1
+            if not internal.any():
+                break
+            # Same test as sklearn: float32 feature value <= float64 threshold
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            child = np.where(go_left, left, self.children_right[node])
+            node = np.where(internal, child, node)
+
+        return self.value[node].sum(axis=1) / len(roots)
+
+    def touch_pages(self, page_size=4096):
+        """
+        Read one byte per page of every node array so a mapped bundle is
+        faulted into memory before the first request instead of during it
+
+        Args:
+            page_size (int): Stride between touched bytes
+
+        Returns:
+            int: Number of bytes mapped by the node arrays
+        """
+        total = 0
+        for name in _ARRAY_NAMES:
+            array = np.ascontiguousarray(getattr(self, name)).reshape(-1).view(np.uint8)
+            int(array[::page_size].sum())
+            total += array.nbytes
+        return total
+
+    def predict(self, X):
+        """
+        Predict the most probable class
+
+        Args:
+            X (numpy.ndarray): Feature matrix
+
+        Returns:
+            numpy.ndarray: Class labels
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def estimate_model_bytes(model):
+    """
+    Estimate the memory a loaded model keeps resident
+
+    Counts the node arrays of a mapped forest, or the node structs and
+    value arrays of every tree in a fitted sklearn forest. Other models
+    fall back to their pickled size.
+
+    Args:
+        model: MappedForestClassifier, fitted sklearn forest or other model
+
+    Returns:
+        int: Estimated bytes
+    """
+    if isinstance(model, MappedForestClassifier):
+        return sum(getattr(model, name).nbytes for name in _ARRAY_NAMES)
+
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None and all(hasattr(estimator, 'tree_') for estimator in estimators):
+        from sklearn.tree._tree import NODE_DTYPE
+        return sum(estimator.tree_.node_count * NODE_DTYPE.itemsize + estimator.tree_.value.nbytes
+                   for estimator in estimators)
+
+    import pickle
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def is_mmap_bundle(path):
+    """
+    Check whether a path is a memory-mappable bundle directory
+
+    Args:
+        path (str): Candidate path
+
+    Returns:
+        bool: True if the path holds a mapped bundle manifest
+    """
+    return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+
+def mmap_bundle_path(joblib_path):
+    """
+    Path of the mapped bundle that sits next to a joblib bundle
+
+    Args:
+        joblib_path (str): e.g. .../rythmguard_model.joblib
+
+    Returns:
+        str: e.g. .../rythmguard_model.mmap
+    """
+    return os.path.splitext(str(joblib_path))[0] + MMAP_BUNDLE_SUFFIX
+
+
+def preferred_bundle_path(joblib_path):
+    """
+    Pick the bundle to serve for a joblib path: its mapped bundle if that is current
+
+    A mapped bundle is only used when its manifest is at least as new as the
+    joblib file; a model retrained by a script that writes no mapped bundle
+    would otherwise be ignored in favour of an older one.
+
+    Args:
+        joblib_path (str): e.g. .../rythmguard_model.joblib
+
+    Returns:
+        str: The mapped bundle directory, the joblib path, or None if neither exists
+    """
+    mapped_path = mmap_bundle_path(joblib_path)
+    has_joblib = os.path.exists(joblib_path)
+    if is_mmap_bundle(mapped_path):
+        if not has_joblib or \
+                os.stat(os.path.join(mapped_path, MANIFEST_NAME)).st_mtime_ns >= os.stat(joblib_path).st_mtime_ns:
+            return mapped_path
+        print(f"⚠️ Ignoring {mapped_path}: older than {joblib_path}")
+    return joblib_path if has_joblib else None
+
+
+def _json_safe(metadata):
+    """Keep only metadata values that survive a JSON round trip"""
+    safe = {}
+    for key, value in metadata.items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            safe[key] = value
+    return safe
+
+
+def save_mmap_bundle(model, class_names, path, feature_shape=None, metadata=None):
+    """
+    Write a fitted forest as a memory-mappable bundle
+
+    Args:
+        model: Fitted single-output RandomForestClassifier (or ExtraTreesClassifier)
+        class_names (list): Class names indexed by the model's labels
+        path (str): Bundle directory to create or replace
+        feature_shape (int): Number of input features
+        metadata (dict): Extra bundle fields (only JSON-compatible values are kept)
+
+    Returns:
+        str: Bundle directory
+    """
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests can be saved as mapped bundles")
+
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    sizes = [tree.node_count for tree in trees]
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    children_left, children_right, feature, threshold, value = [], [], [], [], []
+    for tree, offset in zip(trees, roots):
+        is_leaf = tree.children_left == -1
+        children_left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        children_right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        # Leaves get a valid (unused) feature index so the gather never goes out of range
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+        counts = tree.value[:, 0, :]
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+
+    arrays = {
+        'children_left': np.concatenate(children_left).astype(np.int64),
+        'children_right': np.concatenate(children_right).astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'value': np.concatenate(value).astype(np.float64),
+        'roots': roots
+    }
+
+    # A published bundle may be memory-mapped by a serving process, so its
+    # files are never rewritten: the new bundle is written next to it and
+    # swapped in once complete
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f'.{os.path.basename(os.path.abspath(path))}.', suffix='.tmp', dir=parent)
+    try:
+        os.chmod(staging, 0o755)
+        _write_mmap_bundle(model, trees, arrays, class_names, feature_shape, metadata, staging)
+        _publish_directory(staging, path)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return path
+
+
+def _write_mmap_bundle(model, trees, arrays, class_names, feature_shape, metadata, path):
+    """Write the node arrays and then the manifest of a mapped bundle into an empty directory"""
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.ascontiguousarray(array))
+
+    classes = model.classes_
+    manifest = {
+        'format_version': MMAP_BUNDLE_VERSION,
+        'model_type': type(model).__name__,
+        'class_names': [str(name) for name in class_names],
+        'classes': [label.item() if isinstance(label, np.generic) else label for label in classes],
+        'feature_shape': int(feature_shape if feature_shape is not None else model.n_features_in_),
+        'n_estimators': len(trees),
+        'max_depth': int(max(tree.max_depth for tree in trees)),
+        'metadata': _json_safe(metadata or {})
+    }
+    with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _publish_directory(staging, path):
+    """
+    Move a finished bundle directory into place
+
+    A directory cannot be renamed over a non-empty one, so an existing
+    bundle is first renamed aside; processes that mapped its files keep
+    reading them until they load the new bundle, and its directory entry
+    is removed afterwards (the watcher skips a bundle missing for that
+    instant and looks again on its next poll).
+    """
+    if not os.path.exists(path):
+        os.rename(staging, path)
+        return
+    retired = f'{os.path.abspath(path)}.old-{uuid.uuid4().hex[:8]}'
+    os.rename(path, retired)
+    os.rename(staging, path)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_mmap_bundle(path, mmap_mode='r'):
+    """
+    Load a memory-mappable bundle
+
+    Args:
+        path (str): Bundle directory
+        mmap_mode (str): numpy mmap mode ('r' maps read-only, None reads into memory)
+
+    Returns:
+        dict: Same layout as the joblib bundle (`model`, `class_names`, `feature_shape`, metadata...)
+    """
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != MMAP_BUNDLE_VERSION:
+        raise ValueError(f"Unsupported mapped bundle version: {manifest.get('format_version')}")
+
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+              for name in _ARRAY_NAMES}
+
+    model = MappedForestClassifier(
+        classes=manifest['classes'],
+        n_features=manifest['feature_shape'],
+        max_depth=manifest['max_depth'],
+        **arrays
+    )
+
+    bundle = dict(manifest['metadata'])
+    bundle.update({
+        'model': model,
+        'class_names': manifest['class_names'],
+        'feature_shape': manifest['feature_shape']
+    })
+    return bundle
+
+
+def load_bundle(path):
+    """
+    Load a model bundle in either format
+
+    Args:
+        path (str): joblib file or mapped bundle directory
+
+    Returns:
+        dict or model: Bundle dict, or a bare model for old joblib files
+    """
+    if is_mmap_bundle(path):
+        return load_mmap_bundle(path)
+    return joblib.load(path)
+
+
+def bundle_version(path):
+    """
+    Short identifier that changes whenever a bundle is rewritten
+
+    Derived from the bundle's resolved path, size and modification time
+    rather than its contents, so it is cheap even for large models.
+
+    Args:
+        path (str): joblib file or mapped bundle directory
+
+    Returns:
+        str: 12 hex character version identifier
+    """
+    files = [os.path.join(path, MANIFEST_NAME)] + [os.path.join(path, f'{name}.npy') for name in _ARRAY_NAMES] \
+        if is_mmap_bundle(path) else [path]
+
+    digest = hashlib.sha256()
+    for file_path in files:
+        stat = os.stat(file_path)
+        digest.update(f'{os.path.realpath(file_path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()[:12]
+
+
+def convert_to_mmap_bundle(joblib_path, output_path=None):
+    """
+    Convert a joblib bundle into a mapped bundle
+
+    Args:
+        joblib_path (str): Existing joblib bundle
+        output_path (str): Bundle directory (default: next to the joblib file)
+
+    Returns:
+        str: Bundle directory
+    """
+    model_data = joblib.load(joblib_path)
+    if not isinstance(model_data, dict):
+        model_data = {'model': model_data, 'class_names': ['F', 'M', 'N', 'Q', 'S', 'V']}
+
+    metadata = {key: value for key, value in model_data.items()
+                if key not in ('model', 'class_names', 'feature_shape')}
+
+    return save_mmap_bundle(
+        model_data['model'],
+        model_data['class_names'],
+        output_path or mmap_bundle_path(joblib_path),
+        feature_shape=model_data.get('feature_shape'),
+        metadata=metadata
+    )
+
+
+def main():
+    """Convert a joblib bundle from the command line"""
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python model_bundle.py <rythmguard_model.joblib> [output_dir]")
+        sys.exit(1)
+
+    output_path = convert_to_mmap_bundle(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else None)
+    print(f"💾 Memory-mappable bundle saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
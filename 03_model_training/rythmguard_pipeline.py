@@ -41,6 +41,7 @@ warnings.filterwarnings('ignore')
 # Import custom modules
 from ecg_preprocessor import ECGPreprocessor
 from severity_predictor import SeverityPredictor
+from inference_session import InferenceSession
 
 class RythmGuardPipeline:
     """
@@ -223,17 +224,19 @@ class RythmGuardPipeline:
         
         print("Evaluating complete system on test data...")
         
+        # Classification prediction (one forest pass over the whole test set)
+        session = self._inference_session(class_names)
+        predictions = session.predict_features(X_test.reshape(X_test.shape[0], -1), with_severity=False)
+        
         for i, (image, true_class_idx) in enumerate(zip(X_test, y_test)):
             if i % 50 == 0:
                 print(f"Processing test image {i+1}/{len(X_test)}")
             
-            # Classification prediction
-            image_flat = image.reshape(1, -1)
-            pred_class_idx = self.classification_model.predict(image_flat)[0]
-            class_confidence = np.max(self.classification_model.predict_proba(image_flat))
+            pred_class_idx = predictions[i]['label']
+            class_confidence = predictions[i]['confidence']
             
             # Severity prediction
-            pred_class = class_names[pred_class_idx]
+            pred_class = predictions[i]['predicted_class']
             severity_label, severity_confidence, severity_name = self.severity_predictor.predict_severity(
                 image, pred_class
             )
@@ -399,11 +402,11 @@ class RythmGuardPipeline:
         if image is None:
             return None
         
-        # Classification prediction
-        image_flat = image.reshape(1, -1)
-        pred_class_idx = self.classification_model.predict(image_flat)[0]
-        class_confidence = np.max(self.classification_model.predict_proba(image_flat))
-        pred_class = self.preprocessor.label_encoder.inverse_transform([pred_class_idx])[0]
+        # Classification prediction (single forest pass)
+        session = self._inference_session(self.preprocessor.label_encoder.classes_)
+        prediction = session.predict_one(image, with_severity=False)
+        class_confidence = prediction['confidence']
+        pred_class = prediction['predicted_class']
         
         # Severity prediction
         severity_label, severity_confidence, severity_name = self.severity_predictor.predict_severity(
@@ -424,6 +427,24 @@ class RythmGuardPipeline:
             'clinical_priority': self._get_clinical_priority(pred_class, severity_name)
         }
     
+    def _inference_session(self, class_names):
+        """
+        Wrap the trained classification model in an inference session
+        
+        Args:
+            class_names (list): Class names indexed by the model's labels
+            
+        Returns:
+            InferenceSession: Session sharing this pipeline's preprocessor
+        """
+        return InferenceSession(
+            self.classification_model,
+            class_names,
+            target_size=self.target_size,
+            preprocessor=self.preprocessor,
+            severity_predictor=self.severity_predictor
+        )
+    
     def _get_clinical_priority(self, ecg_class, severity):
         """
         Determine clinical priority based on class and severity
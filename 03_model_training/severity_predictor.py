@@ -7,12 +7,9 @@ for detected arrhythmias in ECG images.
 """
 
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.svm import SVC
-from sklearn.model_selection import cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix
-import joblib
+
+# sklearn and joblib are imported inside the training and persistence methods:
+# serving only uses the rule-based severity and should not load them at startup
 
 class SeverityPredictor:
     """
@@ -99,6 +96,9 @@ class SeverityPredictor:
             X_features (numpy.ndarray): Feature matrix
             y_severity (numpy.ndarray): Severity labels
         """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import cross_val_score
+        
         print("🔬 Training Severity Prediction Model...")
         
         # Use Random Forest for initial model
@@ -193,11 +193,13 @@ class SeverityPredictor:
     
     def save_model(self, filepath):
         """Save trained model"""
+        import joblib
         joblib.dump(self.model, filepath)
         print(f"Model saved to: {filepath}")
     
     def load_model(self, filepath):
         """Load trained model"""
+        import joblib
         self.model = joblib.load(filepath)
         print(f"Model loaded from: {filepath}")
 
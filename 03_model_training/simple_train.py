@@ -23,6 +23,7 @@ sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__f
 
 from ecg_preprocessor import ECGPreprocessor
 from severity_predictor import SeverityPredictor
+from model_bundle import save_mmap_bundle, mmap_bundle_path
 
 class SimpleTrainer:
     def __init__(self, data_path, images_per_class=100):
@@ -134,6 +135,18 @@ class SimpleTrainer:
         
         print(f"💾 Model saved to: {model_path}")
         
+        # Also save the memory-mappable layout for fast, shared loading in the API
+        mmap_path = save_mmap_bundle(
+            model, class_names, mmap_bundle_path(model_path),
+            feature_shape=X_train.shape[1],
+            metadata={
+                'training_accuracy': train_accuracy,
+                'training_time': training_time,
+                'images_per_class': self.images_per_class
+            }
+        )
+        print(f"💾 Memory-mappable model saved to: {mmap_path}")
+        
         return model, class_names
     
     def evaluate_model(self):
@@ -0,0 +1,123 @@
+"""
+RythmGuard Inference Thread Budget
+=================================
+
+Forests are trained with `n_jobs=-1`, and that setting is pickled into the
+bundle, so every predict_proba call would start one thread per core; OpenCV
+and the BLAS/OpenMP libraries behind numpy keep pools of their own. A server
+that already runs one process per core and several requests per process
+then has far more runnable threads than cores. This module caps all three
+to one explicit per-process budget.
+"""
+
+import os
+
+# Threads a serving process may use inside one inference (0 leaves the
+# libraries' own defaults, i.e. the pickled n_jobs and one thread per core)
+DEFAULT_INFERENCE_THREADS = 1
+
+# threadpoolctl limiter kept alive for the lifetime of the process
+_blas_limits = None
+
+
+def budget_from_env(default=DEFAULT_INFERENCE_THREADS):
+    """
+    Read the thread budget from RHYTHMIQ_INFERENCE_THREADS
+
+    Args:
+        default (int): Budget when the variable is unset
+
+    Returns:
+        int: Threads per inference (0 = library defaults, -1 = all cores)
+    """
+    return int(os.environ.get('RHYTHMIQ_INFERENCE_THREADS', default))
+
+
+def resolve_threads(threads):
+    """
+    Turn a budget into a thread count
+
+    Args:
+        threads (int): Budget; -1 means one thread per core
+
+    Returns:
+        int: Threads, or None for library defaults (budget 0)
+    """
+    if threads == 0:
+        return None
+    if threads < 0:
+        return os.cpu_count() or 1
+    return threads
+
+
+def set_model_threads(model, threads):
+    """
+    Override the n_jobs a model was pickled with
+
+    Args:
+        model: Fitted estimator (models without n_jobs are left alone)
+        threads (int): Budget as for resolve_threads
+
+    Returns:
+        int: The model's n_jobs now, or None if it has none
+    """
+    count = resolve_threads(threads)
+    if not hasattr(model, 'n_jobs'):
+        return None
+    if count is not None:
+        model.n_jobs = count
+    return model.n_jobs
+
+
+def apply_thread_budget(threads):
+    """
+    Cap the OpenCV and BLAS/OpenMP thread pools of this process
+
+    threadpoolctl ships with scikit-learn; without it only OpenCV is capped
+    (set OMP_NUM_THREADS / OPENBLAS_NUM_THREADS before start-up instead).
+
+    Args:
+        threads (int): Budget as for resolve_threads
+
+    Returns:
+        dict: What was applied, as reported by describe_thread_budget
+    """
+    global _blas_limits
+
+    count = resolve_threads(threads)
+    if count is not None:
+        import cv2
+        cv2.setNumThreads(count)
+        try:
+            from threadpoolctl import threadpool_limits
+            _blas_limits = threadpool_limits(limits=count)
+        except ImportError:
+            print("⚠️ threadpoolctl not installed, BLAS/OpenMP thread pools are not capped")
+    return describe_thread_budget(threads)
+
+
+def describe_thread_budget(threads):
+    """
+    Report the thread pools this process is running with
+
+    Args:
+        threads (int): Configured budget
+
+    Returns:
+        dict: Budget, OpenCV threads and the size of every native thread pool
+    """
+    import cv2
+
+    report = {
+        'budget': threads,
+        'cpu_count': os.cpu_count(),
+        'opencv_threads': cv2.getNumThreads(),
+        'native_pools': []
+    }
+    try:
+        from threadpoolctl import threadpool_info
+        report['native_pools'] = [{'library': pool.get('internal_api'), 'threads': pool.get('num_threads')}
+                                  for pool in threadpool_info()]
+    except ImportError:
+        pass
+    return report
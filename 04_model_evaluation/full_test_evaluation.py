@@ -8,7 +8,6 @@ This script evaluates the trained model on the COMPLETE test dataset.
 import os
 import sys
 import numpy as np
-import joblib
 from PIL import Image
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -18,8 +17,12 @@ import time
 # Add paths for custom modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '02_preprocessing'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
 
-from ecg_preprocessor import ECGPreprocessor
+from inference_session import InferenceSession
+
+# Images classified per model call
+EVALUATION_BATCH_SIZE = 64
 
 def evaluate_full_test_dataset(max_images_per_class=None):
     """Evaluate model on the complete test dataset"""
@@ -35,16 +38,12 @@ def evaluate_full_test_dataset(max_images_per_class=None):
     
     # Load model
     print("📁 Loading trained model...")
-    model_data = joblib.load(model_path)
-    model = model_data['model']
-    class_names = model_data['class_names']
+    session = InferenceSession.from_bundle(model_path, target_size=(224, 224))
+    class_names = session.class_names
     
     print(f"✅ Model loaded successfully")
     print(f"🎯 Classes: {class_names}")
     
-    # Initialize preprocessor
-    preprocessor = ECGPreprocessor(".", target_size=(224, 224))
-    
     # Collect all test data
     print(f"\n🔄 Loading Full Test Dataset")
     print("-" * 40)
@@ -77,36 +76,31 @@ def evaluate_full_test_dataset(max_images_per_class=None):
         class_start_time = time.time()
         processed_count = 0
         
-        for img_file in image_files:
-            img_path = os.path.join(class_path, img_file)
+        for batch_start in range(0, len(image_files), EVALUATION_BATCH_SIZE):
+            batch_files = image_files[batch_start:batch_start + EVALUATION_BATCH_SIZE]
+            batch_paths = [os.path.join(class_path, img_file) for img_file in batch_files]
             
             try:
-                # Load and preprocess image
-                processed_img = preprocessor.load_and_preprocess_image(img_path)
-                if processed_img is None:
+                # Load, preprocess and classify the batch with one model call
+                batch_results = session.predict_paths(batch_paths, with_severity=False)
+            except Exception as e:
+                print(f"   ❌ Error processing batch starting at {batch_files[0]}: {e}")
+                continue
+            
+            for img_path, prediction in zip(batch_paths, batch_results):
+                if prediction is None:
                     continue
                 
-                # Flatten for model prediction
-                flattened = processed_img.flatten().reshape(1, -1)
-                
-                # Make prediction
-                prediction = model.predict(flattened)[0]
-                probabilities = model.predict_proba(flattened)[0]
-                
                 all_images.append(img_path)
                 all_labels.append(class_idx)
-                all_predictions.append(prediction)
-                all_probabilities.append(probabilities)
+                all_predictions.append(prediction['label'])
+                all_probabilities.append(list(prediction['probabilities'].values()))
                 
                 processed_count += 1
                 
                 # Progress indicator
                 if processed_count % 50 == 0:
                     print(f"   ⏳ Processed {processed_count}/{len(image_files)}")
-                
-            except Exception as e:
-                print(f"   ❌ Error processing {img_file}: {e}")
-                continue
         
         class_time = time.time() - class_start_time
         print(f"   ✅ {class_name}: {processed_count} images processed in {class_time:.1f}s")
@@ -8,7 +8,6 @@ This script tests the specific trained model created by simple_train.py
 import os
 import sys
 import numpy as np
-import joblib
 from PIL import Image
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -18,9 +17,11 @@ import random
 # Add paths for custom modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '02_preprocessing'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
 
 from ecg_preprocessor import ECGPreprocessor
 from severity_predictor import SeverityPredictor
+from inference_session import InferenceSession
 
 def test_trained_model():
     """Test the trained RythmGuard model"""
@@ -37,9 +38,9 @@ def test_trained_model():
     
     # Load model
     print("📁 Loading trained model...")
-    model_data = joblib.load(model_path)
-    model = model_data['model']
-    class_names = model_data['class_names']
+    session = InferenceSession.from_bundle(model_path, target_size=(224, 224))
+    model_data = session.metadata
+    class_names = session.class_names
     
     print(f"✅ Model loaded successfully")
     print(f"🎯 Classes: {class_names}")
@@ -47,9 +48,9 @@ def test_trained_model():
     print(f"⏱️ Training time: {model_data.get('training_time', 'Unknown'):.2f} seconds")
     print(f"🔢 Images per class: {model_data.get('images_per_class', 'Unknown')}")
     
-    # Initialize preprocessor
-    preprocessor = ECGPreprocessor(".", target_size=(224, 224))
-    severity_predictor = SeverityPredictor()
+    # Preprocessor and severity predictor come with the session
+    preprocessor = session.preprocessor
+    severity_predictor = session.severity_predictor
     
     # Test with sample images from test dataset
     print(f"\n🔍 Testing Model on Sample Images")
@@ -82,14 +83,11 @@ def test_trained_model():
                 if processed_img is None:
                     continue
                 
-                # Flatten for model prediction
-                flattened = processed_img.flatten().reshape(1, -1)
-                
-                # Make prediction
-                prediction = model.predict(flattened)[0]
-                probabilities = model.predict_proba(flattened)[0]
-                confidence = max(probabilities)
-                predicted_class = class_names[prediction]
+                # Make prediction (single forest pass)
+                prediction_result = session.predict_one(processed_img, with_severity=False)
+                prediction = prediction_result['label']
+                confidence = prediction_result['confidence']
+                predicted_class = prediction_result['predicted_class']
                 
                 # Test severity prediction
                 severity_result = severity_predictor.predict_severity_rule_based(class_name)
@@ -194,7 +192,7 @@ def test_model_api():
     
     # Test model loading
     try:
-        model_data = joblib.load("rythmguard_model.joblib")
+        session = InferenceSession.from_bundle("rythmguard_model.joblib")
         print("✅ Model loading: PASS")
     except Exception as e:
         print(f"❌ Model loading: FAIL - {e}")
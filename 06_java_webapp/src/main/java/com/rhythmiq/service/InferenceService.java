@@ -8,6 +8,7 @@
 import org.springframework.stereotype.Service;
 import org.springframework.util.LinkedMultiValueMap;
 import org.springframework.util.MultiValueMap;
+import org.springframework.web.client.HttpStatusCodeException;
 import org.springframework.web.client.RestTemplate;
 
 import java.io.IOException;
@@ -18,6 +19,7 @@
 import java.util.Objects;
 import java.util.Random;
 import java.util.UUID;
+import java.util.concurrent.ThreadLocalRandom;
 
 /**
  * InferenceService integrates with Python ML model API for real ECG analysis.
@@ -26,6 +28,17 @@
 @Service
 public class InferenceService {
 
+    private static final int MAX_ATTEMPTS = 3;
+    private static final long BASE_BACKOFF_MS = 250;
+    private static final long MAX_BACKOFF_MS = 10_000;
+    private static final String REQUEST_ID_HEADER = "X-Request-ID";
+    private static final String SERVER_TIMING_HEADER = "Server-Timing";
+    private static final String DEADLINE_HEADER = "X-Deadline-Ms";
+    private static final String DEGRADED_HEADER = "X-Degraded";
+    // The whole upload, retries included, must be answered within this budget
+    private static final long UPLOAD_BUDGET_MS = 2_000;
+    private static final long MIN_ATTEMPT_MS = 50;
+
     private final Path uploadDir = Paths.get("/var/tmp/java-webapp-uploads");
     private final RestTemplate restTemplate;
     private final ObjectMapper objectMapper;
@@ -44,44 +57,103 @@ public ECGAnalysisResult analyze(byte[] imageBytes, String originalFilename) thr
         Path storedPath = uploadDir.resolve(storedName);
         Files.write(storedPath, imageBytes);
         
+        // One request ID for every attempt, so the Python logs of all retries line up with ours
+        String requestId = UUID.randomUUID().toString();
+        long deadlineNanos = System.nanoTime() + UPLOAD_BUDGET_MS * 1_000_000;
+        
         // Always try to call Python API with retry logic
-        return callPythonAPIWithRetry(imageBytes, originalFilename, storedName, storedPath.toString());
+        return callPythonAPIWithRetry(imageBytes, originalFilename, storedName, storedPath.toString(), requestId, deadlineNanos);
     }
     
-    private ECGAnalysisResult callPythonAPIWithRetry(byte[] imageBytes, String originalFilename, String storedName, String storedPath) throws IOException {
-        int maxRetries = 3;
-        int retryDelay = 1000; // 1 second
-        
-        for (int attempt = 1; attempt <= maxRetries; attempt++) {
+    private static long remainingMillis(long deadlineNanos) {
+        return (deadlineNanos - System.nanoTime()) / 1_000_000;
+    }
+    
+    private ECGAnalysisResult callPythonAPIWithRetry(byte[] imageBytes, String originalFilename, String storedName, String storedPath, String requestId, long deadlineNanos) throws IOException {
+        for (int attempt = 1; ; attempt++) {
             try {
-                System.out.println("Attempting to call Python API (attempt " + attempt + "/" + maxRetries + ")");
-                return callPythonAPI(imageBytes, originalFilename, storedName, storedPath);
+                System.out.println("Attempting to call Python API (request " + requestId + ", attempt " + attempt + "/" + MAX_ATTEMPTS + ")");
+                return callPythonAPI(imageBytes, originalFilename, storedName, storedPath, requestId, remainingMillis(deadlineNanos));
             } catch (Exception e) {
-                System.err.println("Python API call failed (attempt " + attempt + "): " + e.getMessage());
+                System.err.println("Python API call failed (request " + requestId + ", attempt " + attempt + "): " + e.getMessage());
+                
+                HttpStatusCodeException httpError = findHttpError(e);
+                HttpStatus status = httpError != null ? HttpStatus.resolve(httpError.getStatusCode().value()) : null;
+                boolean overloaded = status == HttpStatus.TOO_MANY_REQUESTS || status == HttpStatus.SERVICE_UNAVAILABLE;
                 
-                if (attempt < maxRetries) {
-                    try {
-                        Thread.sleep(retryDelay);
-                    } catch (InterruptedException ie) {
-                        Thread.currentThread().interrupt();
-                        throw new RuntimeException("Interrupted while waiting to retry", ie);
-                    }
-                } else {
-                    // If all retries failed, throw the last exception
-                    throw new RuntimeException("Python API unavailable after " + maxRetries + " attempts. Please ensure Python API is running on " + pythonApiUrl, e);
+                // Python dropped the work because our budget ran out; another attempt cannot be in time
+                if (status == HttpStatus.GATEWAY_TIMEOUT) {
+                    throw new RuntimeException("Python API could not answer within the " + UPLOAD_BUDGET_MS + " ms upload budget", e);
+                }
+                // Other client errors (bad image, too large) will fail the same way again
+                if (status != null && status.is4xxClientError() && !overloaded) {
+                    throw new RuntimeException("Python API rejected the request: " + httpError.getResponseBodyAsString(), e);
+                }
+                if (attempt >= MAX_ATTEMPTS) {
+                    throw new RuntimeException("Python API unavailable after " + MAX_ATTEMPTS + " attempts. Please ensure Python API is running on " + pythonApiUrl, e);
                 }
+                
+                long delay = retryDelayMillis(overloaded ? retryAfterMillis(httpError) : -1, attempt);
+                if (remainingMillis(deadlineNanos) - delay < MIN_ATTEMPT_MS) {
+                    throw new RuntimeException("Python API unavailable and no upload budget left for another attempt", e);
+                }
+                sleepBeforeRetry(delay);
             }
         }
-        
-        // This line should never be reached, but just in case
-        throw new RuntimeException("Unexpected error in retry logic");
     }
     
-    private ECGAnalysisResult callPythonAPI(byte[] imageBytes, String originalFilename, String storedName, String storedPath) {
+    /**
+     * How long to wait before the next attempt. An overloaded server says how long via Retry-After;
+     * otherwise back off exponentially with full jitter so clients do not retry in lockstep.
+     */
+    private static long retryDelayMillis(long retryAfterMs, int attempt) {
+        if (retryAfterMs >= 0) {
+            return Math.min(retryAfterMs, MAX_BACKOFF_MS) + ThreadLocalRandom.current().nextLong(BASE_BACKOFF_MS);
+        }
+        long ceiling = Math.min(MAX_BACKOFF_MS, BASE_BACKOFF_MS << attempt);
+        return ThreadLocalRandom.current().nextLong(BASE_BACKOFF_MS, ceiling + 1);
+    }
+    
+    private void sleepBeforeRetry(long delay) {
+        System.out.println("Retrying Python API in " + delay + " ms");
+        try {
+            Thread.sleep(delay);
+        } catch (InterruptedException ie) {
+            Thread.currentThread().interrupt();
+            throw new RuntimeException("Interrupted while waiting to retry", ie);
+        }
+    }
+    
+    private static HttpStatusCodeException findHttpError(Throwable error) {
+        for (Throwable cause = error; cause != null; cause = cause.getCause()) {
+            if (cause instanceof HttpStatusCodeException) {
+                return (HttpStatusCodeException) cause;
+            }
+        }
+        return null;
+    }
+    
+    private static long retryAfterMillis(HttpStatusCodeException error) {
+        HttpHeaders headers = error.getResponseHeaders();
+        String retryAfter = headers != null ? headers.getFirst(HttpHeaders.RETRY_AFTER) : null;
+        if (retryAfter == null) {
+            return -1;
+        }
+        try {
+            return Long.parseLong(retryAfter.trim()) * 1000;
+        } catch (NumberFormatException e) {
+            return -1;
+        }
+    }
+    
+    private ECGAnalysisResult callPythonAPI(byte[] imageBytes, String originalFilename, String storedName, String storedPath, String requestId, long budgetMs) {
         try {
             // Prepare multipart request
             HttpHeaders headers = new HttpHeaders();
             headers.setContentType(MediaType.MULTIPART_FORM_DATA);
+            headers.set(REQUEST_ID_HEADER, requestId);
+            // What is left of the upload budget: Python drops or degrades work that cannot fit
+            headers.set(DEADLINE_HEADER, Long.toString(Math.max(1, budgetMs)));
             
             // Create file resource
             ByteArrayResource fileResource = new ByteArrayResource(imageBytes) {
@@ -98,6 +170,7 @@ public String getFilename() {
             HttpEntity<MultiValueMap<String, Object>> requestEntity = new HttpEntity<>(body, headers);
             
             // Call Python API
+            long started = System.nanoTime();
             ResponseEntity<String> response = restTemplate.exchange(
                 pythonApiUrl, 
                 HttpMethod.POST, 
@@ -105,6 +178,15 @@ public String getFilename() {
                 String.class
             );
             
+            // Python reports its per-stage durations (decode, resize, model, ...) in Server-Timing
+            System.out.println("Python API answered request " + response.getHeaders().getFirst(REQUEST_ID_HEADER)
+                + " in " + (System.nanoTime() - started) / 1_000_000 + " ms"
+                + " (server timing: " + response.getHeaders().getFirst(SERVER_TIMING_HEADER) + ")");
+            if (response.getHeaders().getFirst(DEGRADED_HEADER) != null) {
+                System.out.println("Python API answered request " + requestId + " with a degraded prediction ("
+                    + response.getHeaders().getFirst(DEGRADED_HEADER) + ") to meet the upload budget");
+            }
+            
             // Parse response
             JsonNode jsonResponse = objectMapper.readTree(response.getBody());
             
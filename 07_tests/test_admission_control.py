@@ -0,0 +1,146 @@
+"""
+Test Suite for the RhythmIQ Admission Control
+=============================================
+
+These tests check that requests beyond the concurrency limit wait in FIFO
+order within their priority, that priorities share freed slots by weight
+and urgent requests keep their reserved slots, and that a full queue or a
+long wait is rejected with a Retry-After estimate instead of blocking.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from admission_control import AdmissionController, AdmissionRejected
+
+
+class TestAdmissionController:
+    """Test suite for AdmissionController"""
+
+    def test_admits_up_to_the_limit_without_waiting(self):
+        """Test free slots are taken immediately"""
+        controller = AdmissionController(max_concurrent=2, max_queue=0)
+
+        assert controller.acquire() == 0.0
+        assert controller.acquire() == 0.0
+        stats = controller.stats()
+        assert stats['active'] == 2
+        assert stats['admitted'] == 2
+
+    def test_full_queue_is_rejected_immediately(self):
+        """Test a request with no slot and no queue space is refused"""
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        controller.acquire()
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            controller.acquire()
+
+        assert excinfo.value.reason == 'queue_full'
+        assert excinfo.value.retry_after >= 1
+        assert controller.stats()['rejected']['queue_full'] == 1
+
+    def test_waiting_request_gets_the_released_slot(self):
+        """Test a queued request is admitted when a slot is released"""
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5.0)
+        controller.acquire()
+        waited = []
+
+        thread = threading.Thread(target=lambda: waited.append(controller.acquire()))
+        thread.start()
+        while controller.stats()['waiting'] == 0:
+            time.sleep(0.001)
+        time.sleep(0.02)
+        controller.release(0.5)
+        thread.join(timeout=5.0)
+
+        assert waited and waited[0] >= 0.02
+        stats = controller.stats()
+        assert stats['active'] == 1
+        assert stats['waiting'] == 0
+        assert stats['queued'] == 1
+        assert stats['service_time_ewma_ms'] == pytest.approx(500.0)
+
+    def test_queue_wait_times_out(self):
+        """Test a request that waits too long is rejected and leaves the queue"""
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        controller.acquire()
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            controller.acquire()
+
+        assert excinfo.value.reason == 'queue_timeout'
+        stats = controller.stats()
+        assert stats['waiting'] == 0
+        assert stats['rejected']['queue_timeout'] == 1
+
+    def test_retry_after_follows_service_time(self):
+        """Test Retry-After grows with the measured service time and queue length"""
+        controller = AdmissionController(max_concurrent=2, max_queue=4)
+        assert controller.retry_after() == 1
+
+        controller.acquire()
+        controller.release(6.0)
+
+        # One new request at 6 s per slot, shared by two slots
+        assert controller.retry_after() == 3
+
+    def test_reserved_slots_are_kept_for_urgent_requests(self):
+        """Test routine requests cannot take the reserved slot while urgent ones can"""
+        controller = AdmissionController(max_concurrent=2, max_queue=1, queue_timeout=0.05, reserved_slots=1)
+        controller.acquire(priority='routine')
+
+        with pytest.raises(AdmissionRejected) as excinfo:
+            controller.acquire(priority='routine')
+        assert excinfo.value.reason == 'queue_timeout'
+        assert controller.acquire(priority='urgent') == 0.0
+
+        stats = controller.stats()['priorities']
+        assert stats['urgent']['slots'] == 2
+        assert stats['routine']['slots'] == 1
+        assert stats['routine']['rejected']['queue_timeout'] == 1
+        assert stats['urgent']['admitted'] == 1
+
+    def test_freed_slots_are_shared_by_weight(self):
+        """Test waiting priorities are served in proportion to their weights"""
+        controller = AdmissionController(max_concurrent=1, max_queue=8, queue_timeout=5.0,
+                                         priority_weights={'urgent': 2, 'routine': 1})
+        controller.acquire()
+        order = []
+
+        def wait_for_slot(priority):
+            controller.acquire(priority=priority)
+            order.append(priority)
+
+        threads = []
+        for priority in ['routine', 'routine', 'routine', 'urgent', 'urgent', 'urgent']:
+            threads.append(threading.Thread(target=wait_for_slot, args=(priority,)))
+            threads[-1].start()
+            while controller.stats()['waiting'] < len(threads):
+                time.sleep(0.001)
+
+        for admitted in range(1, len(threads) + 1):
+            controller.release()
+            while len(order) < admitted:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join(timeout=5.0)
+
+        assert order == ['urgent', 'routine', 'urgent', 'urgent', 'routine', 'routine']
+        assert controller.stats()['priorities']['urgent']['p95_queue_wait_ms'] > 0
+
+    def test_unknown_priority_is_refused(self):
+        """Test priorities must be configured, and weights positive"""
+        controller = AdmissionController(max_concurrent=1)
+        assert controller.default_priority == 'routine'
+        with pytest.raises(ValueError):
+            controller.acquire(priority='stat')
+        with pytest.raises(ValueError):
+            AdmissionController(priority_weights={'urgent': 0})
@@ -0,0 +1,191 @@
+"""
+Test Suite for the RhythmIQ Bulk Jobs
+=====================================
+
+These tests check job persistence and leasing in SQLite, safe archive and
+server path handling, and that a job classified on the process pool gives
+the same answers as the model itself, resuming only the unfinished images.
+"""
+
+import io
+import os
+import socket
+import sys
+import zipfile
+
+import cv2
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from bulk_jobs import JobInputError, JobRunner, JobStore, extract_archive, resolve_server_paths
+from inference_session import InferenceSession
+
+TARGET_SIZE = (8, 8)
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+def write_images(directory, count, seed=0):
+    """Write random PNG strips and return their paths"""
+    rng = np.random.RandomState(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f'strip_{index}.png')
+        cv2.imwrite(path, rng.randint(0, 256, (16, 16, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+class TestJobStore:
+    """Test suite for JobStore"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.store = JobStore(str(tmp_path / 'jobs.sqlite'))
+        self.items = [(f'strip_{index}.png', f'/data/strip_{index}.png') for index in range(5)]
+
+    def test_progress_and_results_are_recorded(self):
+        """Test chunk results advance the counters and appear in the report"""
+        job_id = self.store.create_job(self.items, '/models/m.joblib', 'v1', TARGET_SIZE)
+        job = self.store.claim_next('host:1', 60)
+
+        self.store.record_results(job_id, [(0, {'predicted_class': 'N', 'confidence': 0.9}, None),
+                                           (1, None, 'Could not decode image')], 2.0, 0.5)
+        report = self.store.get(job_id)
+
+        assert job['id'] == job_id and job['resumed'] is False
+        assert report['status'] == 'running'
+        assert report['progress'] == {'total': 5, 'completed': 1, 'failed': 1, 'pending': 3, 'fraction': 0.4}
+        assert report['throughput']['images_per_second'] == pytest.approx(1.0)
+        assert report['throughput']['worker_ms_per_image'] == pytest.approx(250.0)
+        assert report['results'][0]['predicted_class'] == 'N'
+        assert report['results'][1]['error'] == 'Could not decode image'
+        assert [index for index, _ in self.store.pending_items(job_id)] == [2, 3, 4]
+
+    def test_leased_job_is_not_claimed_twice(self):
+        """Test a live claim keeps other dispatchers away until it expires"""
+        self.store.create_job(self.items, '/models/m.joblib', 'v1', TARGET_SIZE)
+        owner = f'{socket.gethostname()}:{os.getpid()}'
+
+        assert self.store.claim_next(owner, 60) is not None
+        assert self.store.claim_next('other-host:1', 60) is None
+        assert self.store.claim_next('other-host:1', -1) is None
+
+    def test_job_of_dead_process_is_resumed(self):
+        """Test a job claimed by a process that no longer exists is taken over"""
+        job_id = self.store.create_job(self.items, '/models/m.joblib', 'v1', TARGET_SIZE)
+        self.store.claim_next(f'{socket.gethostname()}:99999999', 60)
+
+        job = self.store.claim_next('other-host:1', 60)
+
+        assert job['id'] == job_id
+        assert job['resumed'] is True
+
+    def test_finished_job_is_not_claimed(self):
+        """Test completed jobs leave the queue"""
+        job_id = self.store.create_job(self.items, '/models/m.joblib', 'v1', TARGET_SIZE)
+        self.store.claim_next('host:1', 60)
+        self.store.finish(job_id)
+
+        assert self.store.claim_next('host:1', 60) is None
+        assert self.store.get(job_id)['status'] == 'completed'
+        assert self.store.counts() == {'completed': 1}
+        assert self.store.get('missing') is None
+
+
+class TestJobInput:
+    """Test suite for archive and server path handling"""
+
+    def test_archive_members_are_extracted_under_generated_names(self, tmp_path):
+        """Test only images are extracted and archive paths cannot escape"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('../../evil.png', b'png')
+            archive.writestr('notes.txt', b'text')
+            archive.writestr('scans/strip.JPG', b'jpg')
+
+        items = extract_archive(buffer, str(tmp_path / 'input'), 10, 1024)
+
+        assert [name for name, _ in items] == ['../../evil.png', 'scans/strip.JPG']
+        assert sorted(os.listdir(tmp_path / 'input')) == ['000000.png', '000001.jpg']
+
+    def test_archive_limits(self, tmp_path):
+        """Test empty, oversized and invalid archives are refused"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for index in range(3):
+                archive.writestr(f'{index}.png', b'x' * 100)
+
+        with pytest.raises(JobInputError, match='Too many images'):
+            extract_archive(buffer, str(tmp_path / 'a'), 2, 10 ** 6)
+        with pytest.raises(JobInputError, match='expands'):
+            extract_archive(buffer, str(tmp_path / 'b'), 10, 200)
+        with pytest.raises(JobInputError, match='valid zip'):
+            extract_archive(io.BytesIO(b'not a zip'), str(tmp_path / 'c'), 10, 10 ** 6)
+
+    def test_server_paths_stay_inside_allowed_roots(self, tmp_path):
+        """Test directories are expanded and paths outside the roots refused"""
+        paths = write_images(str(tmp_path / 'archive' / 'day1'), 2)
+
+        items = resolve_server_paths([str(tmp_path / 'archive')], [str(tmp_path / 'archive')],
+                                     str(tmp_path / 'input'), 10, 10 ** 6)
+
+        assert [path for _, path in items] == paths
+        with pytest.raises(JobInputError, match='outside'):
+            resolve_server_paths([str(tmp_path / 'archive' / '..')], [str(tmp_path / 'archive')],
+                                 str(tmp_path / 'input'), 10, 10 ** 6)
+        with pytest.raises(JobInputError, match='disabled'):
+            resolve_server_paths(paths, [], str(tmp_path / 'input'), 10, 10 ** 6)
+
+
+class TestJobRunner:
+    """Test suite for JobRunner on a real process pool"""
+
+    def test_job_matches_model_and_resumes_pending_images(self, tmp_path):
+        """Test pool results equal direct predictions and finished images are not redone"""
+        rng = np.random.RandomState(0)
+        X = rng.rand(60, TARGET_SIZE[0] * TARGET_SIZE[1] * 3).astype(np.float32)
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, np.arange(60) % len(CLASS_NAMES))
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': model, 'class_names': CLASS_NAMES}, model_path)
+        session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+
+        paths = write_images(str(tmp_path / 'images'), 5)
+        (tmp_path / 'images' / 'broken.png').write_bytes(b'not an image')
+        paths.append(str(tmp_path / 'images' / 'broken.png'))
+
+        store = JobStore(str(tmp_path / 'jobs.sqlite'))
+        runner = JobRunner(store, workers=1, chunk_size=2)
+        job_id = store.create_job([(os.path.basename(path), path) for path in paths], model_path,
+                                  session.model_version, TARGET_SIZE)
+
+        # A previous run already classified image 0 before the process stopped
+        store.claim_next('other-host:1', 60)
+        store.record_results(job_id, [(0, {'predicted_class': 'done-before', 'confidence': 1.0,
+                                           'severity': 'Mild', 'severity_confidence': 1.0}, None)], 1.0, 0.1)
+        job = store.claim_next('other-host:1', 60)
+        assert job['resumed'] is True
+        try:
+            runner.process(job, 'other-host:1')
+        finally:
+            runner.stop()
+
+        report = store.get(job_id)
+        expected = session.predict_paths(paths)
+        assert report['status'] == 'completed'
+        assert report['progress']['completed'] == 5
+        assert report['progress']['failed'] == 1
+        assert report['results'][0]['predicted_class'] == 'done-before'
+        for result, prediction in zip(report['results'][1:5], expected[1:5]):
+            assert result['predicted_class'] == prediction['predicted_class']
+            assert result['confidence'] == pytest.approx(prediction['confidence'])
+        assert report['results'][5]['status'] == 'failed'
+        assert report['throughput']['images_per_second'] > 0
@@ -1,5 +1,82 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+
+# Add preprocessing directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '02_preprocessing'))
+
+from ecg_preprocessor import ECGPreprocessor
+
+
 def test_preprocessing():
     assert True
 
+
 def test_example():
-    assert 1 + 1 == 2
\ No newline at end of file
+    assert 1 + 1 == 2
+
+
+def test_bytes_path_matches_file_path(tmp_path):
+    """Decoding from memory gives the same array as loading from disk"""
+    image = np.random.RandomState(0).randint(0, 256, (40, 60, 3), dtype=np.uint8)
+    image_path = str(tmp_path / 'strip.png')
+    cv2.imwrite(image_path, image)
+    preprocessor = ECGPreprocessor(str(tmp_path), target_size=(16, 16))
+
+    from_file = preprocessor.load_and_preprocess_image(image_path)
+    with open(image_path, 'rb') as f:
+        from_bytes = preprocessor.load_and_preprocess_bytes(f.read())
+
+    assert from_bytes.shape == (16, 16, 3)
+    assert from_bytes.dtype == np.float32
+    np.testing.assert_array_equal(from_bytes, from_file)
+
+
+def test_bytes_path_rejects_garbage():
+    """Undecodable or empty buffers return None instead of raising"""
+    preprocessor = ECGPreprocessor('.', target_size=(16, 16))
+
+    assert preprocessor.load_and_preprocess_bytes(b'not an image') is None
+    assert preprocessor.load_and_preprocess_bytes(b'') is None
+
+
+def test_decode_scale_choice():
+    """The decode scale leaves at least target_size pixels in both dimensions"""
+    preprocessor = ECGPreprocessor('.', target_size=(224, 224))
+
+    assert preprocessor.choose_decode_scale((3000, 2000)) == 8
+    assert preprocessor.choose_decode_scale((1000, 900)) == 4
+    assert preprocessor.choose_decode_scale((500, 2000)) == 2
+    assert preprocessor.choose_decode_scale((300, 300)) == 1
+    assert preprocessor.choose_decode_scale(None) == 1
+
+
+def test_reduced_decode_of_large_jpeg():
+    """A large JPEG is decoded at reduced resolution and still preprocessed to target_size"""
+    rows = np.linspace(0, 255, 1200, dtype=np.uint8)[:, np.newaxis]
+    image = np.dstack([np.repeat(rows, 1600, axis=1)] * 3)
+    ok, encoded = cv2.imencode('.jpg', image)
+    assert ok
+    preprocessor = ECGPreprocessor('.', target_size=(64, 64))
+
+    decode_info = {}
+    reduced = preprocessor.load_and_preprocess_bytes(encoded.tobytes(), reduced_decode=True,
+                                                     decode_info=decode_info)
+    full = preprocessor.load_and_preprocess_bytes(encoded.tobytes())
+
+    assert decode_info == {'source_size': (1600, 1200), 'decode_scale': 8}
+    assert reduced.shape == full.shape == (64, 64, 3)
+    assert np.abs(reduced - full).mean() < 0.02
+
+
+def test_label_encoder_is_created_on_first_use():
+    """The sklearn label encoder is only built when dataset creation needs it"""
+    preprocessor = ECGPreprocessor('.', target_size=(16, 16))
+    assert preprocessor._label_encoder is None
+
+    encoded = preprocessor.label_encoder.fit_transform(['N', 'V', 'N'])
+
+    assert list(encoded) == [0, 1, 0]
+    assert preprocessor.label_encoder is preprocessor._label_encoder
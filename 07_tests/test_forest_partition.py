@@ -0,0 +1,144 @@
+"""
+Test Suite for the RhythmIQ Partitioned Forest
+=============================================
+
+These tests check that a forest split across worker processes gives the
+same probabilities as the whole forest, for joblib and memory-mapped
+bundles, and that busy, mismatched and stopped workers are reported.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from forest_partition import PartitionedForest, partial_probability_sum, tree_slices
+from model_bundle import bundle_version, load_bundle, save_mmap_bundle
+
+N_FEATURES = 12
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+@pytest.fixture(scope='module')
+def forest_model():
+    """A small forest with more trees than partitions"""
+    rng = np.random.RandomState(0)
+    X = rng.rand(120, N_FEATURES).astype(np.float32)
+    return RandomForestClassifier(n_estimators=7, random_state=0).fit(X, np.arange(120) % len(CLASS_NAMES))
+
+
+@pytest.fixture(scope='module')
+def joblib_path(forest_model, tmp_path_factory):
+    """The forest saved as a joblib bundle"""
+    path = str(tmp_path_factory.mktemp('bundles') / 'model.joblib')
+    joblib.dump({'model': forest_model, 'class_names': CLASS_NAMES}, path)
+    return path
+
+
+def make_forest(model, path, partitions=3, version=None):
+    """PartitionedForest over a bundle"""
+    return PartitionedForest(path, version or bundle_version(path), model.n_estimators, N_FEATURES,
+                             len(model.classes_), partitions=partitions, max_rows=4)
+
+
+class TestTreeSlices:
+    """Test suite for tree_slices and partial_probability_sum"""
+
+    def test_slices_cover_every_tree_once(self):
+        """Test the slices are contiguous, balanced and capped at one tree each"""
+        assert tree_slices(7, 3) == [slice(0, 2), slice(2, 5), slice(5, 7)]
+        assert tree_slices(2, 4) == [slice(0, 1), slice(1, 2)]
+
+    def test_partial_sums_add_up_to_the_forest(self, forest_model):
+        """Test the per-slice sums divided by the tree count equal predict_proba"""
+        X = np.random.RandomState(1).rand(5, N_FEATURES).astype(np.float32)
+        total = sum(partial_probability_sum(forest_model, trees, X) for trees in tree_slices(7, 3))
+
+        np.testing.assert_allclose(total / 7, forest_model.predict_proba(X), rtol=1e-12)
+
+
+class TestPartitionedForest:
+    """Test suite for PartitionedForest on real worker processes"""
+
+    def test_matches_joblib_forest(self, forest_model, joblib_path):
+        """Test partitioned probabilities equal the unpickled forest's"""
+        X = np.random.RandomState(2).rand(4, N_FEATURES).astype(np.float32)
+        forest = make_forest(forest_model, joblib_path)
+        try:
+            probabilities = forest.try_predict_proba(X)
+            single = forest.try_predict_proba(X[:1])
+        finally:
+            forest.shutdown()
+
+        np.testing.assert_allclose(probabilities, forest_model.predict_proba(X), rtol=1e-12)
+        np.testing.assert_allclose(single, forest_model.predict_proba(X[:1]), rtol=1e-12)
+        assert forest.stats()['served'] == 2
+        assert forest.stats()['trees_per_partition'] == [2, 3, 2]
+
+    def test_matches_mapped_forest(self, forest_model, tmp_path):
+        """Test partitions of a memory-mapped bundle equal its own predict_proba"""
+        path = save_mmap_bundle(forest_model, CLASS_NAMES, str(tmp_path / 'model.mmap'))
+        mapped = load_bundle(path)['model']
+        X = np.random.RandomState(3).rand(3, N_FEATURES).astype(np.float32)
+        forest = make_forest(forest_model, path, partitions=2)
+        try:
+            probabilities = forest.try_predict_proba(X)
+        finally:
+            forest.shutdown()
+
+        np.testing.assert_allclose(probabilities, mapped.predict_proba(X), rtol=1e-12)
+
+    def test_other_model_version_is_refused(self, forest_model, joblib_path):
+        """Test workers that load another bundle version do not serve"""
+        forest = make_forest(forest_model, joblib_path, partitions=1, version='some-other-version')
+        try:
+            with pytest.raises(RuntimeError):
+                forest.start()
+            assert forest.broken is not None
+        finally:
+            forest.shutdown()
+
+    def test_busy_and_stopped_forest(self, forest_model, joblib_path):
+        """Test a second image skips busy workers and a stopped forest refuses work"""
+        X = np.zeros((1, N_FEATURES), dtype=np.float32)
+        forest = make_forest(forest_model, joblib_path, partitions=1)
+        forest.start()
+
+        with forest._busy:
+            assert forest.try_predict_proba(X) is None
+        forest.shutdown()
+
+        assert forest.stats()['skipped_busy'] == 1
+        with pytest.raises(ValueError):
+            forest.try_predict_proba(np.zeros((5, N_FEATURES), dtype=np.float32))
+        with pytest.raises(RuntimeError):
+            forest.try_predict_proba(X)
+
+    def test_timed_out_broadcast_is_drained(self, forest_model, joblib_path):
+        """Test a request that stops waiting leaves the workers usable for the next one"""
+        X = np.random.RandomState(4).rand(2, N_FEATURES).astype(np.float32)
+        forest = make_forest(forest_model, joblib_path, partitions=2)
+        try:
+            forest.start()
+            with pytest.raises(FutureTimeoutError):
+                forest.try_predict_proba(X, timeout=0.0)
+
+            probabilities = None
+            waited_until = time.perf_counter() + 10
+            while probabilities is None and time.perf_counter() < waited_until:
+                probabilities = forest.try_predict_proba(X)
+        finally:
+            forest.shutdown()
+
+        np.testing.assert_allclose(probabilities, forest_model.predict_proba(X), rtol=1e-12)
+        assert forest.stats()['timed_out'] == 1
@@ -0,0 +1,51 @@
+"""
+Test Suite for the RhythmIQ Import-Time Benchmark
+=================================================
+
+These tests check the importtime parsing and that loading the API does not
+import the training-only dependencies.
+"""
+
+import os
+import sys
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from import_benchmark import import_breakdown, measure_import, parse_importtime
+
+SAMPLE_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 | site
+import time:        40 |         40 |     numpy._core
+import time:       300 |        340 |   numpy
+import time:        50 |         50 |   flask
+import time:       500 |        890 | rhythmiq_api
+"""
+
+
+class TestImportBenchmark:
+    """Test suite for the import-time benchmark"""
+
+    def test_parse_importtime_reads_depth_and_cumulative_time(self):
+        """Test each line becomes (depth, name, cumulative microseconds)"""
+        entries = parse_importtime(SAMPLE_OUTPUT)
+
+        assert entries[0] == (0, 'site', 120)
+        assert entries[1] == (2, 'numpy._core', 40)
+        assert entries[-1] == (0, 'rhythmiq_api', 890)
+
+    def test_breakdown_lists_direct_imports(self):
+        """Test the module total and its direct imports are reported"""
+        total, children = import_breakdown(parse_importtime(SAMPLE_OUTPUT), 'rhythmiq_api')
+
+        assert total == 890
+        assert children == {'numpy': 340, 'flask': 50}
+
+    def test_api_import_skips_training_dependencies(self):
+        """Test importing the API loads no pandas, matplotlib, sklearn or scipy"""
+        result = measure_import('rhythmiq_api')
+
+        assert result['training_modules'] == []
+        assert result['total_ms'] > 0
+        assert 'inference_session' in result['imports_ms']
@@ -0,0 +1,116 @@
+"""
+Test Suite for the RythmGuard Inference Session
+==============================================
+
+These tests check that the shared inference path classifies with a single
+forest pass and gives the same answers as calling the model directly.
+"""
+
+import os
+import sys
+
+import cv2
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+
+from inference_session import InferenceSession, DEFAULT_CLASS_NAMES
+
+TARGET_SIZE = (8, 8)
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+class CountingModel:
+    """Wrap a model and count how often each prediction method runs"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.calls = {'predict': 0, 'predict_proba': 0}
+
+    def predict(self, X):
+        self.calls['predict'] += 1
+        return self.model.predict(X)
+
+    def predict_proba(self, X):
+        self.calls['predict_proba'] += 1
+        return self.model.predict_proba(X)
+
+
+class TestInferenceSession:
+    """Test suite for InferenceSession"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Train a tiny forest on random 8x8 images"""
+        rng = np.random.RandomState(0)
+        self.X = rng.rand(60, TARGET_SIZE[0] * TARGET_SIZE[1] * 3).astype(np.float32)
+        y = np.arange(60) % len(CLASS_NAMES)
+        self.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.X, y)
+        self.images = [row.reshape(TARGET_SIZE[0], TARGET_SIZE[1], 3) for row in self.X[:10]]
+
+    def test_single_forest_pass(self):
+        """Test a batch is classified with exactly one predict_proba call"""
+        counting = CountingModel(self.model)
+        session = InferenceSession(counting, CLASS_NAMES, target_size=TARGET_SIZE)
+
+        results = session.predict(self.images)
+
+        assert counting.calls == {'predict': 0, 'predict_proba': 1}
+        expected = [CLASS_NAMES[label] for label in self.model.predict(self.X[:10])]
+        assert [result['predicted_class'] for result in results] == expected
+
+    def test_batch_matches_single(self):
+        """Test batch and single-image calls agree"""
+        session = InferenceSession(self.model, CLASS_NAMES, target_size=TARGET_SIZE)
+
+        batch = session.predict(self.images)
+        singles = [session.predict_one(image) for image in self.images]
+
+        for batch_result, single_result in zip(batch, singles):
+            assert batch_result['predicted_class'] == single_result['predicted_class']
+            assert batch_result['confidence'] == pytest.approx(single_result['confidence'])
+            assert batch_result['severity'] in ['Mild', 'Moderate', 'Severe']
+
+    def test_predict_paths_skips_unreadable(self, tmp_path):
+        """Test unreadable files yield None without failing the batch"""
+        session = InferenceSession(self.model, CLASS_NAMES, target_size=TARGET_SIZE)
+        good_path = str(tmp_path / 'good.png')
+        cv2.imwrite(good_path, np.zeros((8, 8, 3), dtype=np.uint8))
+
+        results = session.predict_paths([good_path, str(tmp_path / 'missing.png')])
+
+        assert results[0]['predicted_class'] in CLASS_NAMES
+        assert results[1] is None
+
+    def test_from_bundle_dict_and_bare_model(self, tmp_path):
+        """Test both bundle layouts load with the right class names"""
+        dict_path = str(tmp_path / 'bundle.joblib')
+        bare_path = str(tmp_path / 'bare.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES[::-1],
+                     'training_accuracy': 0.9}, dict_path)
+        joblib.dump(self.model, bare_path)
+
+        from_dict = InferenceSession.from_bundle(dict_path, target_size=TARGET_SIZE)
+        from_bare = InferenceSession.from_bundle(bare_path, target_size=TARGET_SIZE)
+
+        assert from_dict.class_names == CLASS_NAMES[::-1]
+        assert from_dict.metadata['training_accuracy'] == 0.9
+        assert 'model' not in from_dict.metadata
+        assert from_bare.class_names == DEFAULT_CLASS_NAMES
+
+    def test_string_labels(self):
+        """Test models trained on class names directly are supported"""
+        y = np.array(CLASS_NAMES)[np.arange(60) % len(CLASS_NAMES)]
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(self.X, y)
+        session = InferenceSession(model, target_size=TARGET_SIZE)
+
+        result = session.predict_one(self.images[0])
+
+        assert result['predicted_class'] == model.predict(self.X[:1])[0]
@@ -0,0 +1,67 @@
+"""
+Test Suite for the RhythmIQ Metrics
+===================================
+
+These tests cover the Prometheus text rendering of counters, gauges and
+histograms.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add API directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '09_python_api'))
+
+from metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_rendering():
+    """Labelled samples render with HELP/TYPE headers and escaped values"""
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('outcome',))
+    in_flight = registry.gauge('in_flight', 'In flight')
+
+    requests.inc(outcome='success')
+    requests.inc(2, outcome='bad "quote"')
+    in_flight.inc()
+    in_flight.dec()
+
+    text = registry.render()
+    assert '# HELP requests_total Requests\n# TYPE requests_total counter' in text
+    assert 'requests_total{outcome="success"} 1\n' in text
+    assert 'requests_total{outcome="bad \\"quote\\""} 2\n' in text
+    assert 'in_flight 0\n' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    """Bucket counts include every smaller bucket and end with +Inf"""
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value, stage='model')
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{stage="model",le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{stage="model",le="1"} 3\n' in text
+    assert 'latency_seconds_bucket{stage="model",le="+Inf"} 4\n' in text
+    assert 'latency_seconds_sum{stage="model"} 6.05\n' in text
+    assert 'latency_seconds_count{stage="model"} 4\n' in text
+
+
+def test_labels_must_match_declaration():
+    """Observing with the wrong labels is an error"""
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('stage',))
+    with pytest.raises(ValueError):
+        latency.observe(0.1, endpoint='/analyze')
+
+
+def test_collectors_run_before_render():
+    """Collectors refresh mirrored values at scrape time"""
+    registry = MetricsRegistry()
+    entries = registry.gauge('cache_entries', 'Entries')
+    registry.add_collector(lambda: entries.set(7))
+    assert 'cache_entries 7\n' in registry.render()
@@ -0,0 +1,83 @@
+"""
+Test Suite for the RhythmIQ Micro-Batcher
+=========================================
+
+These tests check that concurrent single-image requests are grouped into one
+model call and that each request gets its own probability row back.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+# Add API directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '09_python_api'))
+
+from micro_batcher import MicroBatcher
+
+
+class FakeSession:
+    """Session stand-in whose probabilities echo the input rows"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batch_sizes = []
+
+    def allocate(self, count):
+        return np.empty((count, 2), dtype=np.float32)
+
+    def predict_proba(self, features):
+        self.batch_sizes.append(len(features))
+        time.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return features * 2
+
+
+def submit_concurrently(batcher, session, count):
+    """Submit `count` rows from separate threads and collect results by index"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        results[index] = batcher.predict_proba(session, np.array([index, 1], dtype=np.float32), timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_requests_share_batches():
+    """Concurrent requests are batched and fanned back out in the right order"""
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=50)
+    session = FakeSession()
+
+    results = submit_concurrently(batcher, session, 8)
+
+    for index, row in enumerate(results):
+        np.testing.assert_array_equal(row, [index * 2, 2])
+    assert max(session.batch_sizes) > 1
+    assert all(size <= 8 for size in session.batch_sizes)
+
+    stats = batcher.stats()
+    assert stats['requests'] == 8
+    assert sum(size * count for size, count in stats['batch_size_counts'].items()) == 8
+
+
+def test_model_errors_reach_every_waiting_request():
+    """A failing model call fails the requests of that batch only"""
+    batcher = MicroBatcher(max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError):
+        batcher.predict_proba(FakeSession(fail=True), np.zeros(2, dtype=np.float32), timeout=5)
+
+    row = batcher.predict_proba(FakeSession(), np.ones(2, dtype=np.float32), timeout=5)
+    np.testing.assert_array_equal(row, [2, 2])
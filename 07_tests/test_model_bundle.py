@@ -0,0 +1,149 @@
+"""
+Test Suite for RythmGuard Model Bundles
+======================================
+
+These tests check that the memory-mappable bundle round-trips a trained
+forest and that MappedForestClassifier reproduces sklearn's predictions.
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+
+from model_bundle import (convert_to_mmap_bundle, is_mmap_bundle, load_bundle,
+                          load_mmap_bundle, mmap_bundle_path, preferred_bundle_path, save_mmap_bundle)
+from inference_session import InferenceSession
+
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+class TestMappedBundle:
+    """Test suite for the memory-mappable bundle format"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Train a small forest on random data"""
+        rng = np.random.RandomState(0)
+        self.X = rng.rand(120, 48).astype(np.float32)
+        self.y = rng.randint(0, len(CLASS_NAMES), 120)
+        self.X_test = rng.rand(40, 48).astype(np.float32)
+        self.model = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(self.X, self.y)
+
+    def test_round_trip_matches_sklearn(self, tmp_path):
+        """Mapped predictions equal the forest's own predict_proba"""
+        path = save_mmap_bundle(self.model, CLASS_NAMES, str(tmp_path / 'model.mmap'),
+                                metadata={'training_accuracy': np.float64(0.75)})
+
+        bundle = load_mmap_bundle(path)
+        mapped = bundle['model']
+
+        np.testing.assert_allclose(mapped.predict_proba(self.X_test),
+                                   self.model.predict_proba(self.X_test), atol=1e-12)
+        np.testing.assert_array_equal(mapped.predict(self.X_test), self.model.predict(self.X_test))
+        assert bundle['class_names'] == CLASS_NAMES
+        assert bundle['feature_shape'] == 48
+        assert bundle['training_accuracy'] == 0.75
+
+    def test_resave_leaves_mapped_bundle_intact(self, tmp_path):
+        """Re-saving a bundle in place does not change what a loaded copy predicts"""
+        path = str(tmp_path / 'model.mmap')
+        save_mmap_bundle(self.model, CLASS_NAMES, path)
+        served = load_mmap_bundle(path)['model']
+        expected = served.predict_proba(self.X_test)
+
+        retrained = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=1).fit(self.X, self.y)
+        save_mmap_bundle(retrained, CLASS_NAMES, path)
+
+        np.testing.assert_array_equal(served.predict_proba(self.X_test), expected)
+        np.testing.assert_allclose(load_mmap_bundle(path)['model'].predict_proba(self.X_test),
+                                   retrained.predict_proba(self.X_test), atol=1e-12)
+        assert sorted(os.listdir(tmp_path)) == ['model.mmap']
+
+    def test_stale_mapped_bundle_is_not_preferred(self, tmp_path):
+        """The mapped bundle is served only while it is at least as new as the joblib file"""
+        joblib_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, joblib_path)
+        mapped_path = convert_to_mmap_bundle(joblib_path)
+        assert preferred_bundle_path(joblib_path) == mapped_path
+
+        # Retrained by a script that writes no mapped bundle
+        manifest_mtime = os.stat(os.path.join(mapped_path, 'manifest.json')).st_mtime
+        os.utime(joblib_path, (manifest_mtime + 10, manifest_mtime + 10))
+        assert preferred_bundle_path(joblib_path) == joblib_path
+        assert preferred_bundle_path(str(tmp_path / 'missing.joblib')) is None
+
+    def test_arrays_are_memory_mapped(self, tmp_path):
+        """Node arrays are mapped read-only rather than read into memory"""
+        path = save_mmap_bundle(self.model, CLASS_NAMES, str(tmp_path / 'model.mmap'))
+
+        mapped = load_mmap_bundle(path)['model']
+
+        assert isinstance(mapped.threshold, np.memmap)
+        assert isinstance(mapped.children_left, np.memmap)
+        assert not mapped.threshold.flags.writeable
+
+    def test_tree_subset_matches_partial_forest(self, tmp_path):
+        """Evaluating a slice of trees equals averaging those estimators"""
+        path = save_mmap_bundle(self.model, CLASS_NAMES, str(tmp_path / 'model.mmap'))
+        mapped = load_mmap_bundle(path)['model']
+
+        expected = np.mean([tree.predict_proba(self.X_test) for tree in self.model.estimators_[:5]], axis=0)
+
+        np.testing.assert_allclose(mapped.predict_proba(self.X_test, trees=slice(0, 5)), expected, atol=1e-12)
+
+    def test_extra_trees_and_string_labels(self, tmp_path):
+        """Other forests and string class labels survive the round trip"""
+        labels = np.array(CLASS_NAMES)[self.y]
+        model = ExtraTreesClassifier(n_estimators=5, random_state=0).fit(self.X, labels)
+
+        mapped = load_mmap_bundle(save_mmap_bundle(model, CLASS_NAMES, str(tmp_path / 'et.mmap')))['model']
+
+        np.testing.assert_array_equal(mapped.predict(self.X_test), model.predict(self.X_test))
+
+    def test_convert_and_load_through_session(self, tmp_path):
+        """A converted joblib bundle loads through InferenceSession"""
+        joblib_path = str(tmp_path / 'rythmguard_model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES, 'feature_shape': 48}, joblib_path)
+
+        path = convert_to_mmap_bundle(joblib_path)
+
+        assert path == mmap_bundle_path(joblib_path)
+        assert is_mmap_bundle(path)
+        assert not is_mmap_bundle(joblib_path)
+        assert isinstance(load_bundle(joblib_path)['model'], RandomForestClassifier)
+
+        session = InferenceSession.from_bundle(path, target_size=(4, 4))
+        results = session.predict_features(self.X_test)
+        expected = [CLASS_NAMES[label] for label in self.model.predict(self.X_test)]
+        assert [result['predicted_class'] for result in results] == expected
+
+    def test_rejects_wrong_feature_count(self, tmp_path):
+        """Inputs with the wrong width are refused"""
+        mapped = load_mmap_bundle(save_mmap_bundle(self.model, CLASS_NAMES, str(tmp_path / 'model.mmap')))['model']
+
+        with pytest.raises(ValueError):
+            mapped.predict_proba(np.zeros((1, 10), dtype=np.float32))
+
+    def test_warm_up_touches_mapped_pages(self, tmp_path):
+        """Warming a mapped session faults in the node arrays and runs each batch size"""
+        path = save_mmap_bundle(self.model, CLASS_NAMES, str(tmp_path / 'model.mmap'))
+        session = InferenceSession.from_bundle(path, target_size=(4, 4))
+
+        report = session.warm_up((1, 3))
+
+        mapped = session.model
+        expected_bytes = sum(getattr(mapped, name).nbytes for name in
+                             ('children_left', 'children_right', 'feature', 'threshold', 'value', 'roots'))
+        assert report['mapped_bytes'] == expected_bytes
+        assert session.resident_bytes() == expected_bytes
+        assert [batch['batch_size'] for batch in report['batches']] == [1, 3]
+        assert report['model_version'] == session.model_version
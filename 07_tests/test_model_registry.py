@@ -0,0 +1,140 @@
+"""
+Test Suite for the RhythmIQ Model Registry
+==========================================
+
+These tests cover routing by name, version and weighted split, the
+per-model counters used to compare models, and the LRU model cache.
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add API directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '09_python_api'))
+
+from model_registry import ModelRegistry, parse_mapping
+
+
+def fake_session(version, size=0):
+    """Stand-in for an InferenceSession (only identity and size are used)"""
+    return SimpleNamespace(model_version=version, model_path=f'/models/{version}', resident_bytes=lambda: size)
+
+
+def test_parse_mapping():
+    """Settings are parsed in order and malformed items are rejected"""
+    assert parse_mapping('primary=90, compact = 10') == {'primary': '90', 'compact': '10'}
+    assert parse_mapping('') == {}
+    with pytest.raises(ValueError):
+        parse_mapping('compact')
+
+
+def test_routes_by_name_or_version():
+    """A requested name or model_version selects that model"""
+    primary, compact = fake_session('aaa111'), fake_session('bbb222')
+    registry = ModelRegistry('primary', lambda: primary)
+    registry.add('compact', compact)
+
+    assert registry.select() == ('primary', primary)
+    assert registry.select('compact') == ('compact', compact)
+    assert registry.select('bbb222') == ('compact', compact)
+    assert registry.select('aaa111') == ('primary', primary)
+    with pytest.raises(KeyError):
+        registry.select('missing')
+    with pytest.raises(ValueError):
+        registry.add('primary', compact)
+
+
+def test_weighted_split():
+    """Unnamed requests follow the configured weights"""
+    primary, compact = fake_session('aaa111'), fake_session('bbb222')
+    registry = ModelRegistry('primary', lambda: primary, {'primary': 3, 'compact': 1, 'unknown': 5},
+                             rng=random.Random(0))
+    registry.add('compact', compact)
+
+    chosen = [registry.select()[0] for _ in range(4000)]
+
+    assert set(chosen) == {'primary', 'compact'}
+    assert 0.2 < chosen.count('compact') / len(chosen) < 0.3
+
+
+def test_per_model_stats():
+    """Latency and class distribution are kept per model"""
+    registry = ModelRegistry('primary', lambda: fake_session('aaa111'))
+    registry.record('primary', 0.010, ['N'])
+    registry.record('primary', 0.030, ['N', 'V'])
+    registry.record('primary', 0.020, [])
+
+    stats = registry.stats()['primary']
+    assert stats['requests'] == 3
+    assert stats['failures'] == 1
+    assert stats['mean_latency_ms'] == pytest.approx(20.0)
+    assert stats['class_counts'] == {'N': 2, 'V': 1}
+    assert stats['model_version'] == 'aaa111'
+
+
+class TestModelCache:
+    """Test suite for on-demand loading and eviction under a memory budget"""
+
+    MB = 1024 * 1024
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Registry whose loader creates 40 MB fake sessions and counts loads"""
+        self.loads = []
+
+        def loader(model_path):
+            self.loads.append(model_path)
+            return fake_session(os.path.basename(model_path), 40 * self.MB)
+
+        self.registry = ModelRegistry('primary', lambda: fake_session('primary', 20 * self.MB),
+                                      loader=loader, memory_budget_bytes=100 * self.MB)
+        for name in ('a', 'b', 'c'):
+            self.registry.register(name, f'/models/{name}')
+
+    def test_loads_on_first_use_only(self):
+        """Models load lazily and are reused once loaded"""
+        assert self.loads == []
+        assert self.registry.get('a').model_version == 'a'
+        assert self.registry.get('a') is self.registry.get('a')
+        assert self.loads == ['/models/a']
+
+    def test_evicts_least_recently_used(self):
+        """Loading past the budget evicts the least recently used model"""
+        self.registry.get('a')
+        self.registry.get('b')
+        self.registry.get('a')
+        self.registry.get('c')
+
+        stats = self.registry.stats()
+        assert [name for name in 'abc' if stats[name]['loaded']] == ['a', 'c']
+        assert stats['b']['evictions'] == 1
+        assert self.registry.resident_bytes() == 100 * self.MB
+
+        self.registry.get('b')
+        assert self.loads[-1] == '/models/b'
+        assert self.registry.stats()['b']['loads'] == 2
+
+    def test_pinned_models_are_never_evicted(self):
+        """Pinned models stay loaded even when they are least recently used"""
+        self.registry.register('a', '/models/a', pinned=True)
+        self.registry.get('a')
+        self.registry.get('b')
+        self.registry.get('c')
+
+        stats = self.registry.stats()
+        assert stats['a']['loaded'] and stats['a']['pinned']
+        assert not stats['b']['loaded']
+        assert stats['primary']['pinned']
+
+    def test_failed_load_is_counted(self):
+        """A bundle that fails to load returns None and is counted"""
+        def failing_loader(model_path):
+            raise OSError('missing')
+
+        self.registry.loader = failing_loader
+        assert self.registry.select('a') == ('a', None)
+        assert self.registry.stats()['a']['load_failures'] == 1
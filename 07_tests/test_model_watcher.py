@@ -0,0 +1,72 @@
+"""
+Test Suite for the RhythmIQ Model Watcher
+=========================================
+
+These tests check that a rewritten bundle triggers exactly one reload, and
+only once it has stopped changing.
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from inference_session import InferenceSession
+from model_watcher import ModelWatcher
+
+
+def make_bundle(path, seed):
+    """Write a tiny joblib bundle"""
+    rng = np.random.RandomState(seed)
+    model = RandomForestClassifier(n_estimators=3, random_state=seed).fit(rng.rand(30, 12), np.arange(30) % 3)
+    joblib.dump({'model': model, 'class_names': ['F', 'M', 'N']}, path)
+
+
+def test_reloads_once_after_bundle_settles(tmp_path):
+    """A changed bundle is reloaded on the second poll that sees it, then not again"""
+    model_path = str(tmp_path / 'rythmguard_model.joblib')
+    make_bundle(model_path, 0)
+    state = {'session': InferenceSession.from_bundle(model_path, target_size=(2, 2))}
+    reloads = []
+
+    def reload(path):
+        reloads.append(path)
+        state['session'] = InferenceSession.from_bundle(path, target_size=(2, 2))
+        return True
+
+    watcher = ModelWatcher(60, lambda: state['session'], reload)
+    assert not watcher.poll()
+
+    make_bundle(model_path, 1)
+    os.utime(model_path, ns=(0, os.stat(model_path).st_mtime_ns + 1_000_000))
+
+    assert not watcher.poll()
+    assert watcher.poll()
+    assert reloads == [model_path]
+    assert not watcher.poll()
+
+
+def test_failed_version_is_not_retried(tmp_path):
+    """A bundle that failed to load is skipped until it changes again"""
+    model_path = str(tmp_path / 'rythmguard_model.joblib')
+    make_bundle(model_path, 0)
+    session = InferenceSession.from_bundle(model_path, target_size=(2, 2))
+    attempts = []
+
+    watcher = ModelWatcher(60, lambda: session, lambda path: attempts.append(path) and False)
+    make_bundle(model_path, 1)
+    os.utime(model_path, ns=(0, os.stat(model_path).st_mtime_ns + 1_000_000))
+
+    watcher.poll()
+    watcher.poll()
+    watcher.poll()
+    watcher.poll()
+    assert len(attempts) == 1
@@ -0,0 +1,182 @@
+"""
+Test Suite for the RhythmIQ Process Inference Executor
+=====================================================
+
+These tests check that images classified in worker processes through
+shared-memory slots give the same probabilities and features as the model
+in-process, and that failures, oversized images, model version mismatches,
+retirement, slot waits and dead workers are handled.
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from inference_session import InferenceSession
+from process_executor import ProcessInferenceExecutor
+from request_deadline import DeadlineExceeded
+
+TARGET_SIZE = (8, 8)
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+@pytest.fixture(scope='module')
+def bundle(tmp_path_factory):
+    """A tiny model bundle on disk and its session"""
+    rng = np.random.RandomState(0)
+    X = rng.rand(60, TARGET_SIZE[0] * TARGET_SIZE[1] * 3).astype(np.float32)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, np.arange(60) % len(CLASS_NAMES))
+    model_path = str(tmp_path_factory.mktemp('model') / 'model.joblib')
+    joblib.dump({'model': model, 'class_names': CLASS_NAMES}, model_path)
+    return InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+
+
+@pytest.fixture(scope='module')
+def executor(bundle):
+    """One worker process shared by the tests (starting one takes a while)"""
+    executor = ProcessInferenceExecutor(bundle.model_path, bundle.model_version, TARGET_SIZE,
+                                        workers=1, slot_bytes=64 * 1024)
+    executor.warm_up()
+    yield executor
+    executor.shutdown()
+
+
+def encode_png(seed):
+    """Encode a random 16x16 image as PNG bytes"""
+    image = np.random.RandomState(seed).randint(0, 256, (16, 16, 3), dtype=np.uint8)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+
+class TestProcessInferenceExecutor:
+    """Test suite for ProcessInferenceExecutor"""
+
+    def test_results_match_in_process_inference(self, bundle, executor):
+        """Test probabilities and features from the workers equal the session's own"""
+        for seed in range(3):
+            image_bytes = encode_png(seed)
+            expected_features = bundle.preprocessor.load_and_preprocess_bytes(image_bytes).reshape(-1)
+
+            result = executor.predict_bytes(image_bytes, reduced_decode=False, want_features=True)
+
+            np.testing.assert_array_equal(result.features, expected_features)
+            np.testing.assert_array_equal(result.probabilities,
+                                          bundle.predict_proba(expected_features.reshape(1, -1))[0])
+            assert result.decode_scale == 1
+            assert {'decode', 'resize', 'normalize', 'model'} <= set(result.timings)
+
+    def test_concurrent_requests_use_separate_slots(self, bundle, executor):
+        """Test more concurrent requests than slots all get their own answer"""
+        images = [encode_png(seed) for seed in range(8)]
+        results = [None] * len(images)
+
+        def classify(index):
+            results[index] = executor.predict_bytes(images[index]).probabilities
+
+        threads = [threading.Thread(target=classify, args=(index,)) for index in range(len(images))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for image_bytes, probabilities in zip(images, results):
+            features = bundle.preprocessor.load_and_preprocess_bytes(image_bytes).reshape(1, -1)
+            np.testing.assert_array_equal(probabilities, bundle.predict_proba(features)[0])
+
+    def test_deadline_budget_in_the_worker(self, bundle, executor):
+        """Test a worker runs part of the forest when short of time, and drops a late image"""
+        image_bytes = encode_png(4)
+        features = bundle.preprocessor.load_and_preprocess_bytes(image_bytes).reshape(1, -1)
+
+        # One second per tree and a second left: a single tree votes
+        result = executor.predict_bytes(image_bytes, reduced_decode=False, budget=(time.time() + 1.0, 1.0))
+        assert result.trees_used == 1
+        np.testing.assert_allclose(result.probabilities, bundle.model.estimators_[0].predict_proba(features)[0])
+
+        with pytest.raises(DeadlineExceeded) as excinfo:
+            executor.predict_bytes(image_bytes, budget=(time.time() - 1.0, None))
+        assert excinfo.value.stage == 'model'
+        assert executor.predict_bytes(image_bytes, budget=(time.time() + 60.0, None)).trees_used is None
+
+    def test_undecodable_image_is_reported(self, executor):
+        """Test an image the worker cannot decode comes back without probabilities"""
+        failed = executor.stats()['failed']
+
+        result = executor.predict_bytes(b'not an image')
+
+        assert result.probabilities is None
+        assert executor.stats()['failed'] == failed + 1
+
+    def test_oversized_image_is_refused(self, executor):
+        """Test images larger than a slot are left to the caller"""
+        image_bytes = bytes(executor.slot_bytes + 1)
+
+        assert not executor.fits(image_bytes)
+        with pytest.raises(ValueError):
+            executor.predict_bytes(image_bytes)
+
+    def test_other_model_version_is_refused(self, bundle):
+        """Test workers that loaded another bundle version do not answer for this one"""
+        executor = ProcessInferenceExecutor(bundle.model_path, 'some-other-version', TARGET_SIZE, workers=1)
+        try:
+            with pytest.raises(RuntimeError):
+                executor.warm_up()
+            assert executor.broken
+        finally:
+            executor.shutdown()
+
+    def test_slot_wait_times_out(self, executor, monkeypatch):
+        """Test a request without a timeout of its own stops waiting for a slot after slot_timeout"""
+        monkeypatch.setattr(executor, 'slot_timeout', 0.05)
+        taken = [executor._free.get() for _ in range(executor.slots)]
+        try:
+            with pytest.raises(FutureTimeoutError):
+                executor.predict_bytes(encode_png(0))
+        finally:
+            for slot in taken:
+                executor._free.put(slot)
+
+        assert executor.predict_bytes(encode_png(0)).probabilities is not None
+
+    def test_dead_worker_breaks_the_pool(self, bundle):
+        """Test a worker that died marks the pool broken and later requests are refused"""
+        executor = ProcessInferenceExecutor(bundle.model_path, bundle.model_version, TARGET_SIZE, workers=1)
+        try:
+            executor.warm_up()
+            for process in list(executor._pool._processes.values()):
+                process.kill()
+                process.join()
+
+            with pytest.raises(BrokenProcessPool):
+                executor.predict_bytes(encode_png(0))
+            assert executor.broken
+            assert executor.stats()['broken'] == executor.broken
+            with pytest.raises(RuntimeError):
+                executor.predict_bytes(encode_png(0))
+        finally:
+            executor.shutdown()
+
+    def test_retired_executor_refuses_new_requests(self, bundle):
+        """Test retiring shuts the pool down and later requests are refused"""
+        executor = ProcessInferenceExecutor(bundle.model_path, bundle.model_version, TARGET_SIZE, workers=1)
+        executor.predict_bytes(encode_png(0))
+
+        executor.retire()
+
+        assert executor.stats()['running'] is False
+        with pytest.raises(RuntimeError):
+            executor.predict_bytes(encode_png(0))
@@ -0,0 +1,55 @@
+"""
+Test Suite for the RhythmIQ Raw Tensor Input
+============================================
+
+These tests cover shape/dtype validation of raw tensor bodies and their
+conversion to model features.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add API directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '09_python_api'))
+
+from raw_tensor import encode_probabilities, parse_shape, parse_tensor, to_features
+
+IMAGE_SHAPE = (4, 4, 3)
+
+
+def test_parse_shape():
+    """Comma and x separators are accepted, bad dimensions are not"""
+    assert parse_shape('224,224,3') == (224, 224, 3)
+    assert parse_shape('2x224x224x3') == (2, 224, 224, 3)
+    for header in (None, '', '224,a,3', '0,4,3'):
+        with pytest.raises(ValueError):
+            parse_shape(header)
+
+
+def test_parse_tensor_batches_and_validates():
+    """A leading batch dimension is optional and the body length must match"""
+    pixels = np.arange(2 * 48, dtype=np.uint8)
+
+    assert parse_tensor(pixels[:48].tobytes(), '4,4,3', None, IMAGE_SHAPE, 8).shape == (1, 48)
+    assert parse_tensor(pixels.tobytes(), '2,4,4,3', 'uint8', IMAGE_SHAPE, 8).shape == (2, 48)
+
+    with pytest.raises(ValueError):
+        parse_tensor(pixels.tobytes(), '2,4,4,3', 'uint8', IMAGE_SHAPE, 1)
+    with pytest.raises(ValueError):
+        parse_tensor(pixels.tobytes(), '4,4,3', 'uint8', IMAGE_SHAPE, 8)
+    with pytest.raises(ValueError):
+        parse_tensor(pixels.tobytes(), '2,4,4,3', 'int16', IMAGE_SHAPE, 8)
+    with pytest.raises(ValueError):
+        parse_tensor(np.full(48, np.nan, dtype='<f4').tobytes(), '4,4,3', 'float32', IMAGE_SHAPE, 8)
+
+
+def test_features_match_preprocessor_scaling():
+    """uint8 pixels are scaled exactly like ECGPreprocessor (astype(float32) / 255)"""
+    pixels = np.arange(256, dtype=np.uint8).reshape(1, -1)
+    features = to_features(pixels, np.empty(pixels.shape, dtype=np.float32))
+
+    np.testing.assert_array_equal(features, pixels.astype(np.float32) / 255.0)
+    assert encode_probabilities(np.array([[0.25, 0.75]])) == np.array([0.25, 0.75], dtype='<f4').tobytes()
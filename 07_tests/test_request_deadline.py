@@ -0,0 +1,140 @@
+"""
+Test Suite for RhythmIQ Request Deadlines
+========================================
+
+These tests check how deadlines are read from the X-Deadline-Ms header,
+how the per-tree cost estimate turns time left into a number of trees,
+that a partial forest of every tree equals the forest, and that the
+micro-batcher drops images whose deadline passed while they were queued.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from inference_session import InferenceSession
+from micro_batcher import MicroBatcher
+from request_deadline import (Deadline, DeadlineExceeded, ForestCostEstimator, forest_size,
+                              partial_forest_proba)
+
+
+@pytest.fixture(scope='module')
+def forest():
+    """A small six-class forest"""
+    rng = np.random.RandomState(0)
+    return RandomForestClassifier(n_estimators=6, random_state=0).fit(rng.rand(60, 3), np.arange(60) % 6)
+
+
+class TestDeadline:
+    """Test suite for Deadline"""
+
+    def test_header_parsing(self):
+        """Test the header sets the budget, and no header falls back to the default"""
+        assert Deadline.from_header('250', started=10.0).expires_at == pytest.approx(10.25)
+        assert Deadline.from_header(None, started=10.0) is None
+        assert Deadline.from_header(None, started=10.0, default_ms=100).budget_seconds == pytest.approx(0.1)
+
+    @pytest.mark.parametrize('value', ['soon', '0', '-1', 'inf', 'nan'])
+    def test_bad_header_is_refused(self, value):
+        """Test malformed, non-positive and infinite budgets raise ValueError"""
+        with pytest.raises(ValueError):
+            Deadline.from_header(value)
+
+    def test_check_raises_once_expired(self):
+        """Test check() lets a stage start in time and names the stage it refuses"""
+        Deadline(60.0).check('decode')
+        with pytest.raises(DeadlineExceeded) as raised:
+            Deadline(1.0, started=time.perf_counter() - 2.0).check('model')
+        assert raised.value.stage == 'model'
+
+
+class TestForestCostEstimator:
+    """Test suite for ForestCostEstimator"""
+
+    def test_unknown_cost_allows_whole_forest(self):
+        """Test the whole forest is tried until a cost has been measured"""
+        assert ForestCostEstimator().trees_within('v1', 0.001, 100) == 100
+
+    def test_trees_fit_the_budget(self):
+        """Test the budget is divided by the moving average per tree, within 1..n_trees"""
+        costs = ForestCostEstimator(ewma_alpha=0.5)
+        costs.observe('v1', 1.0, 100)
+        costs.observe('v1', 3.0, 100)
+
+        assert costs.seconds_per_tree('v1') == pytest.approx(0.02)
+        assert costs.trees_within('v1', 0.5, 100) == 25
+        assert costs.trees_within('v1', 0.0, 100) == 1
+        assert costs.trees_within('v1', 60.0, 100) == 100
+        assert costs.seconds_per_tree('v2') is None
+
+    def test_paths_are_estimated_separately(self):
+        """Test a fast path does not make the request-thread estimate optimistic"""
+        costs = ForestCostEstimator()
+        costs.observe('v1', 0.1, 100, 'partitions')
+
+        assert costs.trees_within('v1', 0.5, 100, 'partitions') == 100
+        assert costs.trees_within('v1', 0.5, 100) == 100
+        assert costs.seconds_per_tree('v1') is None
+
+        # A partial forest falls back to the slowest measured path, then to the direct one
+        costs.observe('v1', 2.0, 100, 'batch')
+        assert costs.partial_trees('v1', 0.5, 100) == 25
+        costs.observe('v1', 1.0, 100, 'direct')
+        assert costs.partial_trees('v1', 0.5, 100) == 50
+        assert ForestCostEstimator().partial_trees('v1', 0.5, 100) == 1
+
+    def test_old_versions_are_forgotten(self):
+        """Test only the most recent model versions are remembered"""
+        costs = ForestCostEstimator(max_versions=2)
+        for version in ('v1', 'v2', 'v3'):
+            costs.observe(version, 1.0, 10)
+        assert costs.seconds_per_tree('v1') is None
+        assert costs.seconds_per_tree('v3') == pytest.approx(0.1)
+
+
+class TestPartialForest:
+    """Test suite for partial_forest_proba"""
+
+    def test_every_tree_equals_the_forest(self, forest):
+        """Test a partial forest of all trees gives the forest's probabilities"""
+        X = np.random.RandomState(1).rand(4, 3).astype(np.float32)
+        assert forest_size(forest) == 6
+        np.testing.assert_allclose(partial_forest_proba(forest, X, 6), forest.predict_proba(X), rtol=1e-12)
+
+    def test_first_trees_vote(self, forest):
+        """Test fewer trees average only the first trees' probabilities"""
+        X = np.random.RandomState(2).rand(3, 3).astype(np.float32)
+        expected = (forest.estimators_[0].predict_proba(X) + forest.estimators_[1].predict_proba(X)) / 2
+        np.testing.assert_allclose(partial_forest_proba(forest, X, 2), expected, rtol=1e-12)
+
+    def test_non_forest_has_no_size(self):
+        """Test models without trees are reported as not degradable"""
+        assert forest_size(object()) is None
+
+
+class TestBatcherDeadlines:
+    """Test suite for deadlines in the micro-batcher"""
+
+    def test_expired_image_is_dropped(self, forest):
+        """Test an image whose deadline passed is not classified, while others are"""
+        session = InferenceSession(forest, ['F', 'M', 'N', 'Q', 'S', 'V'], target_size=(1, 1))
+        batcher = MicroBatcher(max_batch_size=4, max_wait_ms=1)
+        row = np.random.RandomState(3).rand(3).astype(np.float32)
+
+        expired = batcher.submit(session, row, expires_at=time.perf_counter() - 1.0)
+        live = batcher.submit(session, row, expires_at=time.perf_counter() + 60.0)
+
+        with pytest.raises(DeadlineExceeded):
+            expired.result(timeout=5)
+        np.testing.assert_allclose(live.result(timeout=5), forest.predict_proba(row[np.newaxis])[0])
+        assert batcher.stats()['expired'] == 1
@@ -0,0 +1,139 @@
+"""
+Test Suite for the RhythmIQ Result Cache
+========================================
+
+These tests cover LRU/TTL eviction and single-flight deduplication of
+concurrent identical requests.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add API directory to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '09_python_api'))
+
+from result_cache import ResultCache
+
+
+def test_key_depends_on_bytes_and_model_version():
+    """Same bytes under another model version is a different entry"""
+    assert ResultCache.key_for(b'abc', 'v1') == ResultCache.key_for(b'abc', 'v1')
+    assert ResultCache.key_for(b'abc', 'v1') != ResultCache.key_for(b'abc', 'v2')
+    assert ResultCache.key_for(b'abc', 'v1') != ResultCache.key_for(b'abd', 'v1')
+
+
+def test_hits_and_lru_eviction():
+    """Least recently used entries are evicted first"""
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+
+    assert cache.get_or_compute('a', lambda: 1) == (1, 'miss')
+    assert cache.get_or_compute('b', lambda: 2) == (2, 'miss')
+    assert cache.get_or_compute('a', lambda: -1) == (1, 'hit')
+    cache.get_or_compute('c', lambda: 3)
+
+    assert cache.get_or_compute('a', lambda: -1) == (1, 'hit')
+    assert cache.get_or_compute('b', lambda: 22) == (22, 'miss')
+    assert cache.stats()['evictions'] == 2
+
+
+def test_ttl_expiry():
+    """Expired entries are recomputed"""
+    cache = ResultCache(max_entries=10, ttl_seconds=0.01)
+
+    cache.get_or_compute('a', lambda: 1)
+    time.sleep(0.02)
+
+    assert cache.get_or_compute('a', lambda: 2) == (2, 'miss')
+    assert cache.stats()['expirations'] == 1
+
+
+def test_failures_are_not_cached():
+    """Errors propagate and None results are recomputed next time"""
+    cache = ResultCache()
+
+    def explode():
+        raise RuntimeError("decode failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('a', explode)
+    assert cache.get_or_compute('a', lambda: None) == (None, 'miss')
+    assert cache.get_or_compute('a', lambda: 5) == (5, 'miss')
+
+
+def test_single_flight_runs_computation_once():
+    """Concurrent identical requests share one computation"""
+    cache = ResultCache()
+    calls = []
+    statuses = []
+    barrier = threading.Barrier(6)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'result'
+
+    def worker():
+        barrier.wait()
+        statuses.append(cache.get_or_compute('same', compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result == 'result' for result, _ in statuses)
+    assert sorted(status for _, status in statuses).count('miss') == 1
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] + stats['coalesced'] == 5
+
+
+def test_non_leading_call_is_never_waited_for():
+    """A call that may not lead computes on its own, and others do not wait for it"""
+    cache = ResultCache()
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def slow_partial():
+        started.set()
+        release.wait(5)
+        return 'degraded'
+
+    thread = threading.Thread(target=lambda: results.append(
+        cache.get_or_compute('same', slow_partial, cacheable=lambda value: value != 'degraded', lead=False)))
+    thread.start()
+    started.wait(5)
+
+    assert cache.get_or_compute('same', lambda: 'full') == ('full', 'miss')
+    release.set()
+    thread.join()
+    assert results == [('degraded', 'miss')]
+    assert cache.get_or_compute('same', lambda: 'other') == ('full', 'hit')
+
+
+def test_follower_stops_waiting_after_its_timeout():
+    """A follower with a wait timeout computes the result itself once it runs out"""
+    cache = ResultCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'leader'
+
+    leader = threading.Thread(target=lambda: cache.get_or_compute('same', slow))
+    leader.start()
+    started.wait(5)
+
+    assert cache.get_or_compute('same', lambda: 'follower', wait_timeout=0.01) == ('follower', 'miss')
+    release.set()
+    leader.join()
+    assert cache.stats()['coalesced'] == 0
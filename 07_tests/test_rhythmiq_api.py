@@ -0,0 +1,771 @@
+"""
+Test Suite for the RhythmIQ Python ML API
+=========================================
+
+These tests drive the Flask endpoints with a tiny RandomForest trained on
+random 8x8 images, so they run without the real dataset or trained model.
+"""
+
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+
+import cv2
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+import rhythmiq_api
+from inference_session import InferenceSession
+
+TARGET_SIZE = (8, 8)
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+def encode_png(image):
+    """Encode a BGR uint8 image as PNG bytes"""
+    ok, buffer = cv2.imencode('.png', image)
+    assert ok
+    return buffer.tobytes()
+
+
+class TestRhythmIQAPI:
+    """Test suite for the Flask inference endpoints"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Install a tiny model in the API globals"""
+        rng = np.random.RandomState(0)
+        X = rng.rand(60, TARGET_SIZE[0] * TARGET_SIZE[1] * 3).astype(np.float32)
+        y = np.arange(60) % len(CLASS_NAMES)
+        self.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+        rhythmiq_api.session = InferenceSession(self.model, CLASS_NAMES, target_size=TARGET_SIZE)
+        if rhythmiq_api.result_cache is not None:
+            rhythmiq_api.result_cache.clear()
+        self.client = rhythmiq_api.app.test_client()
+
+        self.images = [rng.randint(0, 256, (16, 16, 3), dtype=np.uint8) for _ in range(3)]
+        yield
+        rhythmiq_api.session = None
+        rhythmiq_api.warmup_report = None
+
+    def expected_class(self, image):
+        """Classify an image directly with the model"""
+        processed = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        processed = cv2.resize(processed, TARGET_SIZE).astype(np.float32) / 255.0
+        label = self.model.predict(processed.reshape(1, -1))[0]
+        return CLASS_NAMES[label]
+
+    def test_analyze_single_image(self):
+        """Test /analyze returns the model's prediction"""
+        response = self.client.post('/analyze', data={
+            'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+        })
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['success'] is True
+        assert body['predicted_class'] == self.expected_class(self.images[0])
+        assert body['severity'] in ['Mild', 'Moderate', 'Severe']
+        assert body['filename'] == 'strip.png'
+
+    def test_analyze_batch_matches_single(self):
+        """Test /analyze_batch gives per-image results in request order"""
+        response = self.client.post('/analyze_batch', data={
+            'images': [(io.BytesIO(encode_png(image)), f'strip_{i}.png')
+                       for i, image in enumerate(self.images)]
+        })
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['total'] == 3
+        assert body['succeeded'] == 3
+        for i, result in enumerate(body['results']):
+            assert result['index'] == i
+            assert result['filename'] == f'strip_{i}.png'
+            assert result['predicted_class'] == self.expected_class(self.images[i])
+
+    def test_analyze_batch_isolates_bad_images(self):
+        """Test an undecodable image fails alone without failing the batch"""
+        response = self.client.post('/analyze_batch', data={
+            'images': [
+                (io.BytesIO(encode_png(self.images[0])), 'good.png'),
+                (io.BytesIO(b'not an image'), 'bad.png'),
+                (io.BytesIO(encode_png(self.images[1])), 'good2.png'),
+            ]
+        })
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['succeeded'] == 2
+        assert body['failed'] == 1
+        assert body['results'][1]['success'] is False
+        assert body['results'][2]['predicted_class'] == self.expected_class(self.images[1])
+
+    def test_analyze_batch_requires_images(self):
+        """Test /analyze_batch rejects an empty request"""
+        response = self.client.post('/analyze_batch', data={})
+        assert response.status_code == 400
+
+    def test_stats_reports_micro_batching(self):
+        """Test /stats exposes realized batch sizes after a request"""
+        self.client.post('/analyze', data={
+            'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+        })
+
+        stats = self.client.get('/stats').get_json()['micro_batching']
+        if rhythmiq_api.batcher is None:
+            assert stats == {'enabled': False}
+        else:
+            assert stats['requests'] >= 1
+            assert stats['batches'] >= 1
+
+    def test_repeated_upload_is_served_from_cache(self):
+        """Test a re-uploaded image is answered from the result cache"""
+        if rhythmiq_api.result_cache is None:
+            pytest.skip("Result cache disabled")
+
+        responses = [self.client.post('/analyze', data={
+            'image': (io.BytesIO(encode_png(self.images[2])), f'upload_{i}.png')
+        }) for i in range(2)]
+
+        assert responses[0].headers['X-Cache'] == 'MISS'
+        assert responses[1].headers['X-Cache'] == 'HIT'
+        first, second = (response.get_json() for response in responses)
+        assert second['predicted_class'] == first['predicted_class']
+        assert second['filename'] == 'upload_1.png'
+
+    def test_metrics_report_stage_latencies(self):
+        """Test /metrics exposes per-stage histograms and request outcomes"""
+        self.client.post('/analyze', data={
+            'image': (io.BytesIO(encode_png(self.images[1])), 'strip.png')
+        })
+        self.client.post('/analyze', data={
+            'image': (io.BytesIO(b'not an image'), 'broken.png')
+        })
+
+        response = self.client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        text = response.get_data(as_text=True)
+
+        for stage in ('decode', 'color', 'resize', 'normalize', 'model', 'severity'):
+            assert f'rhythmiq_stage_duration_seconds_count{{stage="{stage}"}}' in text
+        assert 'rhythmiq_requests_total{endpoint="/analyze",outcome="success"}' in text
+        assert 'rhythmiq_requests_total{endpoint="/analyze",outcome="client_error"}' in text
+        assert 'rhythmiq_requests_in_flight 1' in text
+        assert 'rhythmiq_process_memory_bytes{kind="rss"}' in text
+
+    def test_ready_only_after_warm_up(self):
+        """Test /ready stays 503 until warm-up has run, while /health is already up"""
+        assert self.client.get('/health').status_code == 200
+        assert self.client.get('/ready').status_code == 503
+
+        rhythmiq_api.warmup_report = rhythmiq_api.warm_up_session(rhythmiq_api.session)
+
+        response = self.client.get('/ready')
+        assert response.status_code == 200
+        warmup = response.get_json()['warmup']
+        assert [batch['batch_size'] for batch in warmup['batches']] == rhythmiq_api.WARMUP_BATCH_SIZES
+
+    def test_admin_reload_swaps_model(self, tmp_path, monkeypatch):
+        """Test /admin/reload loads, warms and serves a new bundle"""
+        model_path = str(tmp_path / 'rythmguard_model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        monkeypatch.setenv('RHYTHMIQ_MODEL_PATH', model_path)
+        monkeypatch.setattr(rhythmiq_api, 'ADMIN_TOKEN', 'secret')
+        monkeypatch.setattr(rhythmiq_api, 'load_session', self.load_small_session)
+        old_session = rhythmiq_api.session
+
+        assert self.client.post('/admin/reload').status_code == 401
+        response = self.client.post('/admin/reload?wait=true', headers={'X-Admin-Token': 'secret'})
+
+        assert response.status_code == 200
+        assert rhythmiq_api.session is not old_session
+        health = self.client.get('/health').get_json()
+        assert health['model']['model_path'] == model_path
+        assert health['model']['model_version'] == rhythmiq_api.session.model_version
+        assert health['reload']['reloads'] >= 1
+        assert self.client.get('/ready').status_code == 200
+
+    def test_reload_warms_new_process_pool(self, tmp_path, monkeypatch):
+        """Test a reload starts the new version's worker processes before serving it and retires the old pool"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'INFERENCE_PROCESSES', 1)
+        monkeypatch.setattr(rhythmiq_api, 'process_executor', None)
+        monkeypatch.setattr(rhythmiq_api, 'load_session', self.load_small_session)
+        old_executor = rhythmiq_api.get_process_executor(rhythmiq_api.session)
+        old_executor.warm_up()
+
+        new_path = str(tmp_path / 'model_v2.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES, 'version': 'v2'}, new_path)
+        try:
+            ok, error = rhythmiq_api.swap_model(new_path)
+            stats = rhythmiq_api.process_executor.stats()
+        finally:
+            rhythmiq_api.process_executor.shutdown()
+            old_executor.shutdown()
+
+        assert ok, error
+        assert stats['running'] is True
+        assert stats['model_version'] == rhythmiq_api.session.model_version
+        assert old_executor.stats()['retired'] is True
+        assert rhythmiq_api.get_process_executor(rhythmiq_api.session) is rhythmiq_api.process_executor
+
+    def test_failed_reload_keeps_serving(self, monkeypatch):
+        """Test a bundle that fails to load leaves the current model in place"""
+        monkeypatch.setenv('RHYTHMIQ_MODEL_PATH', '/nonexistent/rythmguard_model.joblib')
+        monkeypatch.setattr(rhythmiq_api, 'ADMIN_TOKEN', 'secret')
+        old_session = rhythmiq_api.session
+
+        response = self.client.post('/admin/reload?wait=true', headers={'X-Admin-Token': 'secret'})
+
+        assert response.status_code == 500
+        assert rhythmiq_api.session is old_session
+        assert self.client.get('/health').get_json()['reload']['last_error']
+
+    @staticmethod
+    def load_small_session(model_path):
+        """load_session for the 8x8 test bundles"""
+        loaded = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        return loaded, loaded.warm_up((1,)), 0.0
+
+    def test_header_routes_to_registered_model(self, monkeypatch):
+        """Test X-Model-Version picks a registry model and responses are tagged"""
+        rng = np.random.RandomState(1)
+        X = rng.rand(60, TARGET_SIZE[0] * TARGET_SIZE[1] * 3).astype(np.float32)
+        candidate = InferenceSession(RandomForestClassifier(n_estimators=3, random_state=1).fit(
+            X, np.arange(60) % len(CLASS_NAMES)), CLASS_NAMES, target_size=TARGET_SIZE)
+        registry = rhythmiq_api.ModelRegistry('primary', lambda: rhythmiq_api.session)
+        registry.add('compact', candidate)
+        monkeypatch.setattr(rhythmiq_api, 'model_registry', registry)
+
+        def analyze(model=None):
+            return self.client.post('/analyze', headers={'X-Model-Version': model} if model else {}, data={
+                'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+            })
+
+        default, routed, unknown = analyze(), analyze('compact'), analyze('missing')
+
+        assert default.headers['X-Model-Name'] == 'primary'
+        assert default.get_json()['model_version'] == rhythmiq_api.session.model_version
+        assert routed.headers['X-Model-Name'] == 'compact'
+        assert routed.headers['X-Model-Version'] == candidate.model_version
+        assert unknown.status_code == 400
+
+        models = self.client.get('/stats').get_json()['models']
+        assert models['compact']['requests'] == 1
+        assert sum(models['compact']['class_counts'].values()) == 1
+        assert models['primary']['requests'] == 1
+
+    def test_shadow_receives_preprocessed_input(self, tmp_path, monkeypatch):
+        """Test /analyze hands sampled inputs to the shadow model off the request path"""
+        candidate = InferenceSession(self.model, CLASS_NAMES, target_size=TARGET_SIZE, model_version='candidate')
+        shadow = rhythmiq_api.ShadowEvaluator('compact', lambda: candidate, str(tmp_path / 'shadow.sqlite'),
+                                              sample_rate=1.0)
+        monkeypatch.setattr(rhythmiq_api, 'shadow', shadow)
+
+        response = self.client.post('/analyze', data={
+            'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+        })
+
+        assert response.status_code == 200
+        assert shadow.join()
+        stats = self.client.get('/stats').get_json()['shadow']
+        assert stats['evaluated'] == 1
+        assert stats['agreement_rate'] == 1.0
+
+    def test_oversized_uploads_are_refused(self, monkeypatch):
+        """Test uploads over the per-image limit get 413 (single) or a per-image error (batch)"""
+        monkeypatch.setattr(rhythmiq_api, 'MAX_UPLOAD_MB', 0.001)
+        large = encode_png(np.random.RandomState(2).randint(0, 256, (64, 64, 3), dtype=np.uint8))
+        small = encode_png(np.zeros((4, 4, 3), dtype=np.uint8))
+        assert len(large) > 1024 > len(small)
+
+        single = self.client.post('/analyze', data={'image': (io.BytesIO(large), 'large.png')})
+        batch = self.client.post('/analyze_batch', data={'images': [
+            (io.BytesIO(large), 'large.png'), (io.BytesIO(small), 'small.png')
+        ]})
+
+        assert single.status_code == 413
+        assert single.get_json()['success'] is False
+        results = batch.get_json()['results']
+        assert results[0]['success'] is False and 'larger than' in results[0]['error']
+        assert results[1]['success'] is True
+
+    def test_oversized_part_is_refused_without_temporary_file(self, monkeypatch):
+        """Test an image part over the per-image limit gets 413 from memory, never spooled to disk"""
+        import werkzeug.wrappers.request
+        spooled = []
+        # werkzeug's own factory is what spools parts to a temporary file
+        monkeypatch.setattr(werkzeug.wrappers.request, 'default_stream_factory',
+                            lambda **kwargs: spooled.append(kwargs))
+        monkeypatch.setattr(rhythmiq_api, 'MAX_UPLOAD_MB', 0.01)
+
+        response = self.client.post('/analyze', data={'image': (io.BytesIO(b'\0' * 600 * 1024), 'sheet.png')})
+
+        assert response.status_code == 413
+        assert 'larger than' in response.get_json()['error']
+        assert spooled == []
+
+    def test_request_over_content_length_is_refused(self, monkeypatch):
+        """Test a request body over MAX_CONTENT_LENGTH gets a JSON 413"""
+        monkeypatch.setitem(rhythmiq_api.app.config, 'MAX_CONTENT_LENGTH', 1024)
+        response = self.client.post('/analyze', data={'image': (io.BytesIO(b'\0' * 4096), 'big.png')})
+
+        assert response.status_code == 413
+        assert response.get_json()['success'] is False
+
+    def test_decode_scale_is_reported(self):
+        """Test images several times larger than the model input report their decode scale"""
+        large = encode_png(np.random.RandomState(3).randint(0, 256, (40, 40, 3), dtype=np.uint8))
+
+        response = self.client.post('/analyze', data={'image': (io.BytesIO(large), 'large.png')})
+
+        expected = 4 if rhythmiq_api.REDUCED_DECODE else 1
+        assert response.get_json()['decode_scale'] == expected
+
+    def test_analyze_raw_matches_image_upload(self):
+        """Test a raw RGB tensor gives the same answer as uploading the same pixels as PNG"""
+        bgr = np.random.RandomState(4).randint(0, 256, (TARGET_SIZE[1], TARGET_SIZE[0], 3), dtype=np.uint8)
+        rgb = np.ascontiguousarray(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+
+        uploaded = self.client.post('/analyze', data={'image': (io.BytesIO(encode_png(bgr)), 'strip.png')}).get_json()
+        raw = self.client.post('/analyze_raw', data=rgb.tobytes(),
+                               headers={'X-Tensor-Shape': '8,8,3'}).get_json()
+        as_float = self.client.post('/analyze_raw', data=(rgb.astype(np.float32) / 255.0).tobytes(),
+                                    headers={'X-Tensor-Shape': '1,8,8,3', 'X-Tensor-Dtype': 'float32'}).get_json()
+
+        for response in (raw, as_float):
+            assert response['total'] == 1
+            assert response['results'][0]['predicted_class'] == uploaded['predicted_class']
+            assert response['results'][0]['confidence'] == uploaded['confidence']
+
+    def test_analyze_raw_binary_answer(self):
+        """Test the compact binary answer is the float32 probability matrix"""
+        batch = np.random.RandomState(5).randint(0, 256, (3, TARGET_SIZE[1], TARGET_SIZE[0], 3), dtype=np.uint8)
+
+        response = self.client.post('/analyze_raw', data=batch.tobytes(), headers={
+            'X-Tensor-Shape': '3,8,8,3', 'Accept': 'application/octet-stream'
+        })
+
+        assert response.mimetype == 'application/octet-stream'
+        assert response.headers['X-Tensor-Shape'] == f'3,{len(CLASS_NAMES)}'
+        assert response.headers['X-Class-Names'] == ','.join(CLASS_NAMES)
+        probabilities = np.frombuffer(response.data, dtype='<f4').reshape(3, -1)
+        expected = self.model.predict_proba(batch.reshape(3, -1).astype(np.float32) / np.float32(255.0))
+        np.testing.assert_allclose(probabilities, expected, rtol=1e-6)
+
+    def test_analyze_raw_rejects_wrong_shape(self):
+        """Test tensors that do not match the model input are refused"""
+        pixels = np.zeros((16, 16, 3), dtype=np.uint8).tobytes()
+
+        wrong_shape = self.client.post('/analyze_raw', data=pixels, headers={'X-Tensor-Shape': '16,16,3'})
+        wrong_length = self.client.post('/analyze_raw', data=pixels, headers={'X-Tensor-Shape': '8,8,3'})
+        missing = self.client.post('/analyze_raw', data=pixels)
+
+        assert wrong_shape.status_code == wrong_length.status_code == missing.status_code == 400
+        assert 'does not match' in wrong_shape.get_json()['error']
+
+    def test_overload_is_rejected_with_retry_after(self, monkeypatch):
+        """Test requests beyond the admission limits get 429 and the slot is released afterwards"""
+        from admission_control import AdmissionController
+        admission = AdmissionController(max_concurrent=1, max_queue=0)
+        monkeypatch.setattr(rhythmiq_api, 'admission', admission)
+        upload = lambda: {'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')}
+
+        admission.acquire()
+        rejected = self.client.post('/analyze', data=upload())
+        health = self.client.get('/health')
+        admission.release()
+        accepted = self.client.post('/analyze', data=upload())
+
+        assert rejected.status_code == 429
+        assert int(rejected.headers['Retry-After']) >= 1
+        assert rejected.get_json()['success'] is False
+        assert health.status_code == 200
+        assert accepted.status_code == 200
+        stats = self.client.get('/stats').get_json()['admission']
+        assert stats['active'] == 0
+        assert stats['rejected']['queue_full'] == 1
+        assert 'rhythmiq_admission_rejections_total{reason="queue_full"} 1' in self.client.get('/metrics').get_data(as_text=True)
+
+    def test_urgent_request_uses_reserved_slot(self, monkeypatch):
+        """Test an urgent upload is admitted on the reserved slot while routine ones are refused"""
+        from admission_control import AdmissionController
+        admission = AdmissionController(max_concurrent=2, max_queue=0, reserved_slots=1)
+        monkeypatch.setattr(rhythmiq_api, 'admission', admission)
+        upload = lambda: {'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')}
+
+        admission.acquire()
+        routine = self.client.post('/analyze', data=upload())
+        urgent = self.client.post('/analyze', headers={'X-Priority': 'URGENT'}, data=upload())
+        query_urgent = self.client.post('/analyze?priority=urgent', data=upload())
+        form_urgent = self.client.post('/analyze', data={**upload(), 'priority': 'urgent'})
+        unknown = self.client.post('/analyze', headers={'X-Priority': 'stat'}, data=upload())
+        admission.release()
+
+        assert routine.status_code == 429
+        assert urgent.status_code == query_urgent.status_code == 200
+        # The body is not read before admission, so a form field does not count
+        assert form_urgent.status_code == 429
+        assert unknown.status_code == 400
+        stats = self.client.get('/stats').get_json()['admission']['priorities']
+        assert stats['urgent']['admitted'] == 2
+        assert stats['routine']['rejected']['queue_full'] == 2
+        assert 'rhythmiq_admission_wait_seconds_count{priority="urgent"} 2' in \
+            self.client.get('/metrics').get_data(as_text=True)
+
+    def test_bulk_job_from_zip_archive(self, tmp_path, monkeypatch):
+        """Test POST /jobs queues a zip archive and GET /jobs/<id> reports its results"""
+        from bulk_jobs import JobRunner, JobStore
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession(self.model, CLASS_NAMES, target_size=TARGET_SIZE,
+                                                model_path=model_path)
+        runner = JobRunner(JobStore(str(tmp_path / 'jobs.sqlite')), workers=1)
+        monkeypatch.setattr(rhythmiq_api, 'job_runner', runner)
+        monkeypatch.setattr(rhythmiq_api, 'JOB_DIR', str(tmp_path / 'jobs'))
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            for index, image in enumerate(self.images):
+                zip_file.writestr(f'strips/{index}.png', encode_png(image))
+        archive.seek(0)
+        submitted = self.client.post('/jobs', data={'archive': (archive, 'strips.zip')})
+        job_id = submitted.get_json()['job_id']
+
+        try:
+            runner.process(runner.store.claim_next('test-host:1', 60), 'test-host:1')
+        finally:
+            runner.stop()
+        report = self.client.get(f'/jobs/{job_id}').get_json()
+
+        assert submitted.status_code == 202
+        assert submitted.headers['Location'] == f'/jobs/{job_id}'
+        assert report['status'] == 'completed'
+        assert report['progress']['completed'] == len(self.images)
+        assert [result['name'] for result in report['results']] == ['strips/0.png', 'strips/1.png', 'strips/2.png']
+        assert [result['predicted_class'] for result in report['results']] == \
+            [self.expected_class(image) for image in self.images]
+        assert not os.path.exists(tmp_path / 'jobs' / job_id)
+        assert self.client.get('/jobs/missing').status_code == 404
+
+    def test_bulk_job_server_paths_need_allowed_root(self, tmp_path, monkeypatch):
+        """Test server-side paths outside RHYTHMIQ_JOB_INPUT_ROOTS are refused"""
+        from bulk_jobs import JobRunner, JobStore
+        rhythmiq_api.session = InferenceSession(self.model, CLASS_NAMES, target_size=TARGET_SIZE,
+                                                model_path=str(tmp_path / 'model.joblib'), model_version='test')
+        monkeypatch.setattr(rhythmiq_api, 'job_runner', JobRunner(JobStore(str(tmp_path / 'jobs.sqlite'))))
+        monkeypatch.setattr(rhythmiq_api, 'JOB_INPUT_ROOTS', [str(tmp_path / 'allowed')])
+
+        response = self.client.post('/jobs', json={'paths': ['/etc']})
+        empty = self.client.post('/jobs', json={})
+
+        assert response.status_code == 400
+        assert 'outside' in response.get_json()['error']
+        assert empty.status_code == 400
+
+    def test_batch_streams_ndjson_in_completion_order(self, monkeypatch):
+        """Test streamed batches emit one line per image as it finishes, then a summary"""
+        classify_upload = rhythmiq_api.classify_upload
+
+        def slow_first(active_session, model_name, filename, image_bytes):
+            if filename == 'slow.png':
+                time.sleep(0.3)
+            return classify_upload(active_session, model_name, filename, image_bytes)
+
+        monkeypatch.setattr(rhythmiq_api, 'classify_upload', slow_first)
+        names = ['slow.png', 'b.png', 'c.png']
+        response = self.client.post('/analyze_batch', data={
+            'images': [(io.BytesIO(encode_png(image)), name) for image, name in zip(self.images, names)]
+                      + [(io.BytesIO(b'not an image'), 'broken.png')]
+        }, headers={'Accept': 'application/x-ndjson'})
+
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        results, summary = lines[:-1], lines[-1]
+
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        assert results[-1]['index'] == 0
+        assert sorted(result['index'] for result in results) == [0, 1, 2, 3]
+        for result in results[:-1]:
+            if result['index'] < 3:
+                assert result['predicted_class'] == self.expected_class(self.images[result['index']])
+                assert result['filename'] == names[result['index']]
+        broken = [result for result in results if result['index'] == 3][0]
+        assert broken['success'] is False
+        assert summary['done'] is True
+        assert (summary['total'], summary['succeeded'], summary['failed']) == (4, 3, 1)
+
+    def test_batch_stream_query_parameter(self):
+        """Test ?stream=true selects the NDJSON response without an Accept header"""
+        response = self.client.post('/analyze_batch?stream=true', data={
+            'images': [(io.BytesIO(encode_png(self.images[0])), 'a.png')]
+        })
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert response.mimetype == 'application/x-ndjson'
+        assert json.loads(lines[0])['severity'] in ['Mild', 'Moderate', 'Severe']
+        assert json.loads(lines[1])['done'] is True
+
+    def test_responses_carry_request_id_and_server_timing(self, capsys):
+        """Test /analyze echoes the request ID, breaks down stage timings and logs one JSON line"""
+        response = self.client.post('/analyze', data={
+            'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+        }, headers={'X-Request-ID': 'webapp-123'})
+
+        timing = dict(entry.split(';', 1) for entry in response.headers['Server-Timing'].split(', '))
+        log_lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()
+                     if line.startswith('{') and '"event": "request"' in line]
+
+        assert response.headers['X-Request-ID'] == 'webapp-123'
+        for stage in ('decode', 'resize', 'normalize', 'model', 'severity', 'total'):
+            assert timing[stage].startswith('dur=')
+        assert log_lines[-1]['request_id'] == 'webapp-123'
+        assert log_lines[-1]['status'] == 200
+        assert set(log_lines[-1]['stages_ms']) >= {'decode', 'model', 'severity'}
+
+    def test_unsafe_request_id_is_replaced(self):
+        """Test a malformed X-Request-ID is replaced by a generated one"""
+        response = self.client.get('/health', headers={'X-Request-ID': 'bad id; <script>'})
+
+        assert response.headers['X-Request-ID'] != 'bad id; <script>'
+        assert len(response.headers['X-Request-ID']) == 32
+        assert response.headers['Server-Timing'].startswith('total;dur=')
+
+    def test_analyze_in_inference_process(self, tmp_path, monkeypatch):
+        """Test /analyze answers from a worker process when inference processes are enabled"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'INFERENCE_PROCESSES', 1)
+        monkeypatch.setattr(rhythmiq_api, 'process_executor', None)
+
+        try:
+            response = self.client.post('/analyze', data={
+                'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+            })
+            stats = self.client.get('/stats').get_json()['inference_processes']
+        finally:
+            rhythmiq_api.process_executor.shutdown()
+
+        timing = dict(entry.split(';', 1) for entry in response.headers['Server-Timing'].split(', '))
+        assert response.status_code == 200
+        assert response.get_json()['predicted_class'] == self.expected_class(self.images[0])
+        assert {'decode', 'model', 'ipc'} <= set(timing)
+        assert stats['completed'] == 1
+        assert stats['model_version'] == rhythmiq_api.session.model_version
+
+    def test_worker_error_falls_back_in_process(self, tmp_path, monkeypatch):
+        """Test an image the worker fails on is classified in-process instead of answering 500"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'INFERENCE_PROCESSES', 1)
+        # Output slots too small for the model's classes, so the worker raises ValueError
+        monkeypatch.setattr(rhythmiq_api, 'process_executor', rhythmiq_api.ProcessInferenceExecutor(
+            model_path, rhythmiq_api.session.model_version, TARGET_SIZE, workers=1, max_classes=2))
+
+        try:
+            response = self.client.post('/analyze', data={
+                'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+            })
+        finally:
+            rhythmiq_api.process_executor.shutdown()
+
+        assert response.status_code == 200
+        assert response.get_json()['predicted_class'] == self.expected_class(self.images[0])
+
+    def test_broken_process_pool_is_restarted(self, tmp_path, monkeypatch):
+        """Test a pool whose worker died is replaced in the background while requests classify in-process"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'INFERENCE_PROCESSES', 1)
+        monkeypatch.setattr(rhythmiq_api, 'WORKER_RESTART_SECONDS', 0)
+        monkeypatch.setattr(rhythmiq_api, 'process_executor', None)
+        monkeypatch.setattr(rhythmiq_api, 'worker_restarts', {kind: {'broken': None, 'failures': 0}
+                                                                  for kind in ('processes', 'partitions')})
+        broken = rhythmiq_api.get_process_executor(rhythmiq_api.session)
+
+        def analyze(image):
+            return self.client.post('/analyze', data={'image': (io.BytesIO(encode_png(image)), 'strip.png')})
+
+        try:
+            broken.warm_up()
+            for process in list(broken._pool._processes.values()):
+                process.kill()
+                process.join()
+            response = analyze(self.images[0])
+            assert rhythmiq_api.get_process_executor(rhythmiq_api.session) is None
+
+            deadline = time.time() + 30
+            while rhythmiq_api.process_executor is broken and time.time() < deadline:
+                time.sleep(0.05)
+            executor = rhythmiq_api.process_executor
+            assert executor is not broken
+            analyze(self.images[1])
+            stats = executor.stats()
+        finally:
+            rhythmiq_api.process_executor.shutdown()
+            broken.shutdown()
+
+        assert response.status_code == 200
+        assert response.get_json()['predicted_class'] == self.expected_class(self.images[0])
+        assert broken.stats()['retired'] is True
+        assert stats['completed'] == 1
+
+    def test_stats_report_thread_budget(self):
+        """Test /stats shows the thread budget and the served model's n_jobs"""
+        stats = self.client.get('/stats').get_json()['threads']
+
+        assert stats['budget'] == rhythmiq_api.INFERENCE_THREADS
+        assert stats['model_n_jobs'] == self.model.n_jobs
+        assert stats['opencv_threads'] >= 1
+
+    def test_analyze_on_forest_partitions(self, tmp_path, monkeypatch):
+        """Test /analyze classifies on the forest partitions when they are enabled"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'FOREST_PARTITIONS', 2)
+        monkeypatch.setattr(rhythmiq_api, 'partitioned_forest', None)
+
+        try:
+            response = self.client.post('/analyze', data={
+                'image': (io.BytesIO(encode_png(self.images[1])), 'strip.png')
+            })
+            stats = self.client.get('/stats').get_json()['forest_partitions']
+        finally:
+            rhythmiq_api.partitioned_forest.shutdown()
+
+        assert response.status_code == 200
+        assert response.get_json()['predicted_class'] == self.expected_class(self.images[1])
+        assert stats['served'] == 1
+        assert stats['partitions'] == 2
+
+    def test_reload_starts_new_forest_partitions(self, tmp_path, monkeypatch):
+        """Test a reload starts the new version's forest partitions before serving it"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'FOREST_PARTITIONS', 2)
+        monkeypatch.setattr(rhythmiq_api, 'partitioned_forest', None)
+        monkeypatch.setattr(rhythmiq_api, 'load_session', self.load_small_session)
+        old_forest = rhythmiq_api.get_partitioned_forest(rhythmiq_api.session)
+        old_forest.start()
+
+        new_path = str(tmp_path / 'model_v2.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES, 'version': 'v2'}, new_path)
+        try:
+            ok, error = rhythmiq_api.swap_model(new_path)
+            stats = rhythmiq_api.partitioned_forest.stats()
+        finally:
+            rhythmiq_api.partitioned_forest.shutdown()
+            old_forest.shutdown()
+
+        assert ok, error
+        assert stats['running'] is True
+        assert stats['model_version'] == rhythmiq_api.session.model_version
+
+    def test_broken_forest_partitions_are_restarted(self, tmp_path, monkeypatch):
+        """Test partitions whose worker died are replaced in the background instead of staying off"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': self.model, 'class_names': CLASS_NAMES}, model_path)
+        rhythmiq_api.session = InferenceSession.from_bundle(model_path, target_size=TARGET_SIZE)
+        monkeypatch.setattr(rhythmiq_api, 'FOREST_PARTITIONS', 2)
+        monkeypatch.setattr(rhythmiq_api, 'WORKER_RESTART_SECONDS', 0)
+        monkeypatch.setattr(rhythmiq_api, 'partitioned_forest', None)
+        monkeypatch.setattr(rhythmiq_api, 'worker_restarts', {kind: {'broken': None, 'failures': 0}
+                                                                  for kind in ('processes', 'partitions')})
+        features = np.zeros((1, rhythmiq_api.session.feature_count), dtype=np.float32)
+        broken = rhythmiq_api.get_partitioned_forest(rhythmiq_api.session)
+
+        try:
+            broken.start()
+            broken._workers[0][0].kill()
+            broken._workers[0][0].join()
+            with pytest.raises(RuntimeError):
+                broken.try_predict_proba(features)
+            assert rhythmiq_api.get_partitioned_forest(rhythmiq_api.session) is None
+
+            deadline = time.time() + 30
+            while rhythmiq_api.partitioned_forest is broken and time.time() < deadline:
+                time.sleep(0.05)
+            forest = rhythmiq_api.get_partitioned_forest(rhythmiq_api.session)
+            assert forest is not None and forest is not broken
+            probabilities = forest.try_predict_proba(features)
+        finally:
+            rhythmiq_api.partitioned_forest.shutdown()
+            broken.shutdown()
+
+        assert np.allclose(probabilities, self.model.predict_proba(features))
+        assert rhythmiq_api.worker_restarts['partitions']['failures'] == 1
+
+    def test_expired_deadline_is_dropped(self):
+        """Test a request whose deadline has passed gets 504 instead of being classified"""
+        response = self.client.post('/analyze', headers={'X-Deadline-Ms': '0.001'}, data={
+            'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+        })
+
+        assert response.status_code == 504
+        assert response.get_json()['stage'] == 'decode'
+        text = self.client.get('/metrics').get_data(as_text=True)
+        assert 'rhythmiq_deadline_outcomes_total{outcome="exceeded"}' in text
+
+    def test_malformed_deadline_is_rejected(self):
+        """Test a non-numeric or non-positive X-Deadline-Ms is a client error"""
+        for value in ('soon', '-5'):
+            response = self.client.post('/analyze', headers={'X-Deadline-Ms': value}, data={
+                'image': (io.BytesIO(encode_png(self.images[0])), 'strip.png')
+            })
+            assert response.status_code == 400
+
+    def test_tight_deadline_degrades_to_partial_forest(self, monkeypatch):
+        """Test a deadline too short for the whole forest is answered by fewer trees, uncached"""
+        costs = rhythmiq_api.ForestCostEstimator()
+        # One second per tree, however the forest runs: a 2 s budget leaves room for a single tree
+        for path in ('partitions', 'batch', 'direct'):
+            costs.observe(rhythmiq_api.session.model_version, 5.0, 5, path)
+        monkeypatch.setattr(rhythmiq_api, 'forest_costs', costs)
+
+        responses = [self.client.post('/analyze', headers={'X-Deadline-Ms': '2000'}, data={
+            'image': (io.BytesIO(encode_png(self.images[2])), 'strip.png')
+        }) for _ in range(2)]
+
+        body = responses[0].get_json()
+        assert responses[0].status_code == 200
+        assert responses[0].headers['X-Degraded'] == 'partial-forest'
+        assert body['degraded'] is True
+        assert (body['trees_used'], body['trees_total']) == (1, 5)
+        if rhythmiq_api.result_cache is not None:
+            assert responses[1].headers['X-Cache'] == 'MISS'
+
+        processed = cv2.cvtColor(self.images[2], cv2.COLOR_BGR2RGB)
+        processed = cv2.resize(processed, TARGET_SIZE).astype(np.float32) / 255.0
+        first_tree = self.model.estimators_[0].predict_proba(processed.reshape(1, -1))[0]
+        assert body['predicted_class'] == CLASS_NAMES[int(np.argmax(first_tree))]
+
+    def test_generous_deadline_uses_whole_forest(self):
+        """Test a deadline with room to spare gives the normal, undegraded answer"""
+        response = self.client.post('/analyze', headers={'X-Deadline-Ms': '60000'}, data={
+            'image': (io.BytesIO(encode_png(self.images[1])), 'strip.png')
+        })
+
+        body = response.get_json()
+        assert body['degraded'] is False
+        assert 'X-Degraded' not in response.headers
+        assert body['predicted_class'] == self.expected_class(self.images[1])
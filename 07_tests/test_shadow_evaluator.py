@@ -0,0 +1,106 @@
+"""
+Test Suite for the RhythmIQ Shadow Evaluation
+=============================================
+
+These tests check that sampled requests are compared with a candidate model
+in the background, logged to SQLite, and dropped rather than waited on when
+the worker falls behind.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+sys.path.append(os.path.join(project_root, '09_python_api'))
+
+from inference_session import InferenceSession
+from shadow_evaluator import ShadowEvaluator
+
+TARGET_SIZE = (4, 4)
+CLASS_NAMES = ['F', 'M', 'N', 'Q', 'S', 'V']
+
+
+class TestShadowEvaluator:
+    """Test suite for ShadowEvaluator"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Primary and candidate forests on random 4x4 images"""
+        rng = np.random.RandomState(0)
+        self.X = rng.rand(60, TARGET_SIZE[0] * TARGET_SIZE[1] * 3).astype(np.float32)
+        y = np.arange(60) % len(CLASS_NAMES)
+        self.primary = InferenceSession(RandomForestClassifier(n_estimators=5, random_state=0).fit(self.X, y),
+                                        CLASS_NAMES, target_size=TARGET_SIZE)
+        self.candidate = InferenceSession(RandomForestClassifier(n_estimators=2, random_state=1).fit(self.X, y),
+                                          CLASS_NAMES, target_size=TARGET_SIZE)
+        self.db_path = str(tmp_path / 'shadow.sqlite')
+
+    def offer_all(self, shadow, count):
+        """Offer the first rows of X as if the primary model had served them"""
+        for features in self.X[:count]:
+            prediction = self.primary.describe(self.primary.predict_proba(features.reshape(1, -1))[0])
+            shadow.offer('primary', self.primary, features, prediction, 0.001)
+
+    def test_logs_agreement_and_confidence_delta(self):
+        """Every sampled request is compared with the candidate and written to SQLite"""
+        shadow = ShadowEvaluator('compact', lambda: self.candidate, self.db_path, sample_rate=1.0)
+
+        self.offer_all(shadow, 10)
+        assert shadow.join()
+
+        rows = sqlite3.connect(self.db_path).execute(
+            'SELECT primary_class, candidate_class, agree, confidence_delta, candidate_version '
+            'FROM shadow_results').fetchall()
+        assert len(rows) == 10
+        expected = [self.candidate.describe(p)['predicted_class'] for p in self.candidate.predict_proba(self.X[:10])]
+        assert [row[1] for row in rows] == expected
+        assert all(row[2] == int(row[0] == row[1]) for row in rows)
+        assert rows[0][4] == self.candidate.model_version
+
+        stats = shadow.stats()
+        assert stats['evaluated'] == 10
+        assert stats['agreement_rate'] == pytest.approx(sum(row[2] for row in rows) / 10)
+
+    def test_sampling_and_candidate_traffic_skipped(self):
+        """Only the sampled fraction is shadowed and the candidate never shadows itself"""
+        shadow = ShadowEvaluator('compact', lambda: self.candidate, self.db_path, sample_rate=0.0)
+        self.offer_all(shadow, 5)
+
+        shadow.sample_rate = 1.0
+        prediction = {'predicted_class': 'N', 'confidence': 0.5}
+        assert not shadow.offer('compact', self.candidate, self.X[0], prediction, 0.001)
+        assert shadow.stats()['sampled'] == 0
+
+        partial = ShadowEvaluator('compact', lambda: self.candidate, self.db_path, sample_rate=0.3,
+                                  rng=random.Random(0))
+        sampled = sum(partial.offer('primary', self.primary, self.X[0], prediction, 0.001) for _ in range(1000))
+        assert 250 < sampled < 350
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """A slow candidate makes new samples drop, never wait"""
+        release = threading.Event()
+
+        def slow_candidate():
+            release.wait(5)
+            return self.candidate
+
+        shadow = ShadowEvaluator('compact', slow_candidate, self.db_path, sample_rate=1.0, queue_size=2)
+        self.offer_all(shadow, 10)
+
+        stats = shadow.stats()
+        assert stats['dropped'] >= 7
+        assert stats['sampled'] + stats['dropped'] == 10
+
+        release.set()
+        assert shadow.join()
+        assert shadow.stats()['evaluated'] == stats['sampled']
@@ -9,19 +9,16 @@ for consumption by the Java web application.
 import sys
 import json
 import os
-import numpy as np
-import joblib
-from PIL import Image
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import your existing modules
 try:
     import sys
-    sys.path.append('../02_preprocessing')
-    sys.path.append('../03_model_training')
-    from ecg_preprocessor import ECGPreprocessor
-    from severity_predictor import SeverityPredictor
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.append(os.path.join(project_root, '02_preprocessing'))
+    sys.path.append(os.path.join(project_root, '03_model_training'))
+    from inference_session import InferenceSession
 except ImportError as e:
     print(json.dumps({
         "error": f"Failed to import required modules: {str(e)}",
@@ -49,53 +46,33 @@ def analyze_single_ecg(image_path):
                 "success": False
             }
         
-        # Load model and preprocessor
-        model = joblib.load(model_path)
-        preprocessor = ECGPreprocessor()
-        severity_predictor = SeverityPredictor()
+        # Load model bundle, preprocessor and severity predictor once
+        session = InferenceSession.from_bundle(model_path)
         
-        # Load and preprocess image
+        # Load, preprocess and classify image (single forest pass)
         try:
-            image = Image.open(image_path).convert('RGB')
-            image_array = np.array(image)
-            
-            # Preprocess image
-            processed_image = preprocessor.preprocess_single_image(image_array)
-            
-            # Reshape for model prediction
-            processed_flat = processed_image.reshape(1, -1)
-            
-            # Make prediction
-            prediction = model.predict(processed_flat)[0]
-            probabilities = model.predict_proba(processed_flat)[0]
+            prediction = session.predict_path(image_path)
+            if prediction is None:
+                raise ValueError(f"Could not load image: {image_path}")
             
             # Get confidence
-            confidence = float(np.max(probabilities) * 100)
-            
-            # Get class names
-            class_names = model.classes_
-            predicted_class = prediction
-            
-            # Predict severity
-            severity_result = severity_predictor.predict_severity(predicted_class, confidence)
-            severity = severity_result['severity']
-            severity_confidence = severity_result['confidence']
+            confidence = prediction['confidence'] * 100
             
             # Prepare results
             result = {
                 "success": True,
                 "filename": os.path.basename(image_path),
-                "class": predicted_class,
+                "class": prediction['predicted_class'],
                 "confidence": confidence,
-                "severity": severity,
-                "severity_confidence": severity_confidence,
+                "severity": prediction['severity'],
+                "severity_confidence": prediction['severity_confidence'],
                 "all_probabilities": {
-                    str(class_names[i]): float(probabilities[i] * 100) 
-                    for i in range(len(class_names))
+                    class_name: probability * 100
+                    for class_name, probability in prediction['probabilities'].items()
                 },
                 "model_info": {
-                    "classes": list(class_names),
-                    "total_classes": len(class_names)
+                    "classes": list(prediction['probabilities']),
+                    "total_classes": len(prediction['probabilities'])
                 }
             }
             
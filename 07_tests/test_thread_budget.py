@@ -0,0 +1,69 @@
+"""
+Test Suite for the RythmGuard Inference Thread Budget
+====================================================
+
+These tests check that the budget replaces the n_jobs a forest was pickled
+with, caps OpenCV's thread pool, and leaves everything alone when set to 0.
+"""
+
+import os
+import sys
+
+import cv2
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+# Add module directories to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, '02_preprocessing'))
+sys.path.append(os.path.join(project_root, '03_model_training'))
+
+from inference_session import InferenceSession
+from thread_budget import apply_thread_budget, resolve_threads, set_model_threads
+
+
+@pytest.fixture
+def forest():
+    """A tiny forest trained the way the training scripts do, with n_jobs=-1"""
+    rng = np.random.RandomState(0)
+    return RandomForestClassifier(n_estimators=3, n_jobs=-1, random_state=0).fit(rng.rand(20, 4), np.arange(20) % 2)
+
+
+class TestThreadBudget:
+    """Test suite for the thread budget helpers"""
+
+    def test_resolve_threads(self):
+        """Test 0 means library defaults and -1 one thread per core"""
+        assert resolve_threads(0) is None
+        assert resolve_threads(-1) == (os.cpu_count() or 1)
+        assert resolve_threads(3) == 3
+
+    def test_model_n_jobs_is_overridden(self, forest):
+        """Test the pickled n_jobs is replaced, and kept with a budget of 0"""
+        assert set_model_threads(forest, 0) == -1
+        assert set_model_threads(forest, 2) == 2
+        assert set_model_threads(object(), 2) is None
+
+    def test_session_applies_budget_at_load(self, forest, tmp_path):
+        """Test a bundle loaded with a budget predicts with that many threads"""
+        model_path = str(tmp_path / 'model.joblib')
+        joblib.dump({'model': forest, 'class_names': ['N', 'V']}, model_path)
+
+        session = InferenceSession.from_bundle(model_path, target_size=(2, 2), threads=1)
+        unchanged = InferenceSession.from_bundle(model_path, target_size=(2, 2))
+
+        assert session.model.n_jobs == 1
+        assert unchanged.model.n_jobs == -1
+
+    def test_opencv_threads_are_capped(self):
+        """Test the budget caps OpenCV and is reported back"""
+        previous = cv2.getNumThreads()
+        try:
+            report = apply_thread_budget(1)
+            assert cv2.getNumThreads() == 1
+            assert report['budget'] == 1
+            assert report['opencv_threads'] == 1
+        finally:
+            cv2.setNumThreads(previous)
@@ -0,0 +1,264 @@
+"""
+🫀 RhythmIQ Admission Control
+============================
+Bounds how many inference requests run at once and how many may wait for
+a slot. Requests beyond that are rejected straight away with a Retry-After
+estimate derived from the measured service time, so overload turns into
+fast 429s instead of unbounded latency.
+
+Every request has a priority with its own bounded queue. When a slot frees
+up, the queues are served in proportion to their weights (stride
+scheduling: each queue's pass advances by 1/weight per request served, and
+the queue with the lowest pass goes next), and a few slots are reserved for
+the highest priority, so a burst of routine uploads cannot hold every slot
+while urgent ones wait behind it.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+DEFAULT_PRIORITY_WEIGHTS = {'urgent': 4.0, 'routine': 1.0}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, reason, retry_after):
+        """
+        Initialize the rejection
+
+        Args:
+            reason (str): 'queue_full' or 'queue_timeout'
+            retry_after (int): Seconds the client should wait before retrying
+        """
+        super().__init__(f"Server busy ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    """One request waiting in the queue"""
+
+    __slots__ = ('event', 'admitted', 'enqueued', 'priority')
+
+    def __init__(self, priority):
+        self.event = threading.Event()
+        self.admitted = False
+        self.enqueued = time.perf_counter()
+        self.priority = priority
+
+
+class _PriorityClass:
+    """Queue and counters of one priority"""
+
+    def __init__(self, weight, wait_window):
+        self.weight = weight
+        self.waiters = deque()
+        self.pass_value = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {'queue_full': 0, 'queue_timeout': 0}
+        self.waited = 0
+        self.wait_total = 0.0
+        self.recent_waits = deque(maxlen=wait_window)
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with bounded, weighted-fair per-priority wait queues
+    """
+
+    def __init__(self, max_concurrent=8, max_queue=16, queue_timeout=5.0, ewma_alpha=0.2,
+                 priority_weights=None, reserved_slots=0, wait_window=1024):
+        """
+        Initialize the admission controller
+
+        Args:
+            max_concurrent (int): Requests allowed to run at once
+            max_queue (int): Requests allowed to wait for a slot, per priority
+            queue_timeout (float): Seconds a request waits before it is rejected
+            ewma_alpha (float): Weight of the newest service time in the moving average
+            priority_weights (dict): Priority name -> share of freed slots, highest priority
+                first; the last one is the default (default: DEFAULT_PRIORITY_WEIGHTS)
+            reserved_slots (int): Slots only the highest priority may take
+                (at most max_concurrent - 1)
+            wait_window (int): Recent waits per priority kept for the p95 in stats()
+        """
+        weights = dict(priority_weights or DEFAULT_PRIORITY_WEIGHTS)
+        if not weights or any(not weight > 0 for weight in weights.values()):
+            raise ValueError(f"Priority weights must be positive, got {weights}")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.ewma_alpha = ewma_alpha
+        self.priorities = list(weights)
+        self.default_priority = self.priorities[-1]
+        self.reserved_slots = max(0, min(reserved_slots, max_concurrent - 1))
+        self._lock = threading.Lock()
+        self._classes = {name: _PriorityClass(float(weight), wait_window) for name, weight in weights.items()}
+        self._active = 0
+        self._virtual_time = 0.0
+
+        # Counters for monitoring
+        self._service_ewma = None
+
+    def _slot_limit(self, priority):
+        """Slots a priority may fill: all of them for the highest, the unreserved ones otherwise"""
+        if priority == self.priorities[0]:
+            return self.max_concurrent
+        return self.max_concurrent - self.reserved_slots
+
+    def acquire(self, timeout=None, priority=None):
+        """
+        Take a slot, waiting in the priority's queue if none is free for it
+
+        Args:
+            timeout (float): Longest wait for this request, if shorter than queue_timeout
+                (e.g. what is left of its deadline)
+            priority (str): Request priority (default: the lowest)
+
+        Returns:
+            float: Seconds spent waiting for the slot
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait timed out
+            ValueError: If the priority is unknown
+        """
+        priority = priority or self.default_priority
+        if priority not in self._classes:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {self.priorities}")
+        queue = self._classes[priority]
+
+        with self._lock:
+            # Waiters are handed every slot they may take as it frees up, so a
+            # free slot here means nobody of this priority is waiting for it
+            if self._active < self._slot_limit(priority):
+                self._active += 1
+                queue.admitted += 1
+                queue.recent_waits.append(0.0)
+                return 0.0
+            if len(queue.waiters) >= self.max_queue:
+                queue.rejected['queue_full'] += 1
+                raise AdmissionRejected('queue_full', self._retry_after_locked(priority))
+            if not queue.waiters:
+                # An idle queue does not bank credit for the time nobody was waiting in it
+                queue.pass_value = max(queue.pass_value, self._virtual_time)
+            waiter = _Waiter(priority)
+            queue.waiters.append(waiter)
+            queue.queued += 1
+
+        waiter.event.wait(self.queue_timeout if timeout is None else max(0.0, min(timeout, self.queue_timeout)))
+
+        with self._lock:
+            waited = time.perf_counter() - waiter.enqueued
+            if not waiter.admitted:
+                # Timed out; the slot may have been handed over just now
+                queue.waiters.remove(waiter)
+                queue.rejected['queue_timeout'] += 1
+                raise AdmissionRejected('queue_timeout', self._retry_after_locked(priority))
+            queue.waited += 1
+            queue.wait_total += waited
+            queue.recent_waits.append(waited)
+            return waited
+
+    def release(self, service_seconds=None):
+        """
+        Give a slot back and hand it to the next waiting request
+
+        Args:
+            service_seconds (float): How long the request held the slot
+        """
+        with self._lock:
+            if service_seconds is not None:
+                if self._service_ewma is None:
+                    self._service_ewma = service_seconds
+                else:
+                    self._service_ewma += self.ewma_alpha * (service_seconds - self._service_ewma)
+
+            self._active -= 1
+            self._dispatch_locked()
+
+    def _dispatch_locked(self):
+        """Hand free slots to waiting requests, the queue with the lowest pass first"""
+        while True:
+            eligible = [name for name in self.priorities
+                        if self._classes[name].waiters and self._active < self._slot_limit(name)]
+            if not eligible:
+                return
+            # Ties go to the higher priority (listed first)
+            name = min(eligible, key=lambda candidate: self._classes[candidate].pass_value)
+            queue = self._classes[name]
+            self._virtual_time = queue.pass_value
+            queue.pass_value += 1.0 / queue.weight
+
+            waiter = queue.waiters.popleft()
+            waiter.admitted = True
+            self._active += 1
+            queue.admitted += 1
+            waiter.event.set()
+
+    def retry_after(self, priority=None):
+        """
+        Seconds a rejected client should wait before retrying
+
+        Args:
+            priority (str): Priority of the client's requests (default: the lowest)
+
+        Returns:
+            int: At least 1
+        """
+        with self._lock:
+            return self._retry_after_locked(priority or self.default_priority)
+
+    def _retry_after_locked(self, priority):
+        """Time to drain the priority's queue ahead of a new request at the measured service rate"""
+        service = self._service_ewma if self._service_ewma is not None else 1.0
+        ahead = len(self._classes[priority].waiters)
+        return max(1, int(math.ceil(service * (ahead + 1) / self._slot_limit(priority))))
+
+    def stats(self):
+        """
+        Report occupancy and counters
+
+        Returns:
+            dict: Limits, active/waiting requests, admissions, rejections and wait times
+        """
+        with self._lock:
+            classes = self._classes.values()
+            waited = sum(queue.waited for queue in classes)
+            return {
+                'enabled': True,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_seconds': self.queue_timeout,
+                'reserved_slots': self.reserved_slots,
+                'active': self._active,
+                'waiting': sum(len(queue.waiters) for queue in classes),
+                'admitted': sum(queue.admitted for queue in classes),
+                'queued': sum(queue.queued for queue in classes),
+                'rejected': {reason: sum(queue.rejected[reason] for queue in classes)
+                             for reason in ('queue_full', 'queue_timeout')},
+                'mean_queue_wait_ms': sum(queue.wait_total for queue in classes) / waited * 1000.0 if waited else 0.0,
+                'service_time_ewma_ms': self._service_ewma * 1000.0 if self._service_ewma is not None else None,
+                'retry_after_seconds': self._retry_after_locked(self.default_priority),
+                'priorities': {name: self._priority_stats_locked(name) for name in self.priorities}
+            }
+
+    def _priority_stats_locked(self, name):
+        """Queue and wait-time counters of one priority"""
+        queue = self._classes[name]
+        waits = np.array(queue.recent_waits) * 1000.0
+        return {
+            'weight': queue.weight,
+            'slots': self._slot_limit(name),
+            'waiting': len(queue.waiters),
+            'admitted': queue.admitted,
+            'queued': queue.queued,
+            'rejected': dict(queue.rejected),
+            'mean_queue_wait_ms': queue.wait_total / queue.waited * 1000.0 if queue.waited else 0.0,
+            'p95_queue_wait_ms': float(np.percentile(waits, 95)) if len(waits) else 0.0
+        }
@@ -0,0 +1,616 @@
+"""
+🫀 RhythmIQ Bulk Jobs
+====================
+Asynchronous screening of large image sets (a zip archive or files already on
+the server). Jobs and per-image results live in SQLite, so a restart resumes
+the images that were not finished. A dispatcher thread claims one job at a
+time under a lease (several gunicorn workers can share the database) and
+classifies it in chunks on a process pool whose workers load the model once.
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '02_preprocessing'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    model_path TEXT NOT NULL,
+    model_version TEXT,
+    target_size TEXT NOT NULL,
+    input_dir TEXT,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    processing_seconds REAL NOT NULL DEFAULT 0,
+    worker_seconds REAL NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+# Images classified per process pool task
+DEFAULT_CHUNK_SIZE = 32
+
+
+class JobInputError(ValueError):
+    """Raised when a job submission has no usable images or an unsafe path"""
+
+
+def _is_image(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def extract_archive(archive, input_dir, max_images, max_bytes):
+    """
+    Extract the images of a zip archive for a job
+
+    Members are written under generated names, so paths inside the archive
+    can never escape input_dir; non-image members are skipped.
+
+    Args:
+        archive (str or file): Zip file path or seekable file object
+        input_dir (str): Directory the images are written to
+        max_images (int): Most images accepted
+        max_bytes (int): Most uncompressed bytes accepted
+
+    Returns:
+        list: (name inside the archive, extracted path), in archive order
+
+    Raises:
+        JobInputError: If the archive is invalid, empty or over the limits
+    """
+    try:
+        zip_file = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise JobInputError("Not a valid zip archive")
+
+    with zip_file:
+        members = [info for info in zip_file.infolist() if not info.is_dir() and _is_image(info.filename)]
+        if not members:
+            raise JobInputError("The archive contains no images")
+        if len(members) > max_images:
+            raise JobInputError(f"Too many images: {len(members)} (maximum {max_images})")
+        if sum(info.file_size for info in members) > max_bytes:
+            raise JobInputError(f"Archive expands to more than {max_bytes / 1024 / 1024:.0f} MB")
+
+        os.makedirs(input_dir, exist_ok=True)
+        items = []
+        for index, info in enumerate(members):
+            path = os.path.join(input_dir, f'{index:06d}{os.path.splitext(info.filename)[1].lower()}')
+            with zip_file.open(info) as source, open(path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            items.append((info.filename, path))
+        return items
+
+
+def resolve_server_paths(paths, allowed_roots, input_dir, max_images, max_bytes):
+    """
+    Expand server-side paths into the images of a job
+
+    Each path may be an image, a directory (its images, recursively) or a zip
+    archive (extracted into input_dir). Only paths under allowed_roots are read.
+
+    Args:
+        paths (list): Paths sent by the client
+        allowed_roots (list): Directories jobs may read from
+        input_dir (str): Where archives are extracted
+        max_images (int): Most images accepted
+        max_bytes (int): Most uncompressed archive bytes accepted
+
+    Returns:
+        list: (name, path) per image
+
+    Raises:
+        JobInputError: If a path is outside the roots, missing or yields no images
+    """
+    roots = [os.path.realpath(root) for root in allowed_roots]
+    if not roots:
+        raise JobInputError("Server-side paths are disabled (set RHYTHMIQ_JOB_INPUT_ROOTS)")
+
+    items = []
+    for requested in paths:
+        path = os.path.realpath(str(requested))
+        if not any(path == root or path.startswith(root + os.sep) for root in roots):
+            raise JobInputError(f"Path is outside the allowed input directories: {requested}")
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                items.extend((os.path.join(directory, name), os.path.join(directory, name))
+                             for name in sorted(files) if _is_image(name))
+        elif path.lower().endswith('.zip') and os.path.isfile(path):
+            archive_dir = os.path.join(input_dir, f'{len(items):06d}')
+            items.extend((f'{requested}:{name}', extracted) for name, extracted in
+                         extract_archive(path, archive_dir, max_images - len(items), max_bytes))
+        elif os.path.isfile(path) and _is_image(path):
+            items.append((path, path))
+        else:
+            raise JobInputError(f"Not an image, directory or zip archive: {requested}")
+        if len(items) > max_images:
+            raise JobInputError(f"Too many images: more than {max_images}")
+
+    if not items:
+        raise JobInputError("No images found")
+    return items
+
+
+def _owner_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _owner_is_dead(owner):
+    """Whether a lease holder is a process on this host that no longer exists"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class JobStore:
+    """
+    SQLite persistence for jobs and their per-image results
+    """
+
+    def __init__(self, db_path):
+        """
+        Initialize the store; the database is created on first use
+
+        Args:
+            db_path (str): SQLite file
+        """
+        self.db_path = db_path
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _ensure_schema(self):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                # WAL lets GET /jobs read while a dispatcher writes results
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.executescript(_SCHEMA)
+            finally:
+                connection.close()
+            self._schema_ready = True
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one unit of work, committed on success"""
+        if not self._schema_ready:
+            self._ensure_schema()
+        connection = sqlite3.connect(self.db_path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+            connection.commit()
+        finally:
+            connection.close()
+
+    def create_job(self, items, model_path, model_version, target_size, input_dir=None, job_id=None):
+        """
+        Record a new job with all of its images pending
+
+        Args:
+            items (list): (name, path) per image
+            model_path (str): Bundle the job is classified with
+            model_version (str): Version of that bundle
+            target_size (tuple): Model input size (height, width)
+            input_dir (str): Directory holding extracted images, removed when the job ends
+            job_id (str): Id to use (generated if omitted)
+
+        Returns:
+            str: Job id
+        """
+        job_id = job_id or uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO jobs (id, created_at, status, model_path, model_version, target_size, '
+                'input_dir, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, time.time(), 'queued', model_path, model_version,
+                 ','.join(str(dim) for dim in target_size), input_dir, len(items)))
+            connection.executemany('INSERT INTO job_items (job_id, idx, name, path) VALUES (?, ?, ?, ?)',
+                                   [(job_id, index, name, path) for index, (name, path) in enumerate(items)])
+        return job_id
+
+    def claim_next(self, owner, lease_seconds):
+        """
+        Take the oldest job nobody is working on
+
+        A running job whose lease expired, or whose owner process on this host
+        died, is taken over: that is how a restart resumes unfinished work.
+
+        Args:
+            owner (str): Claiming process ("host:pid")
+            lease_seconds (float): How long the claim holds without renewal
+
+        Returns:
+            dict: Job row, or None if there is nothing to do
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at").fetchall()
+            for row in rows:
+                if row['owner'] and row['owner'] != owner and row['lease_expires'] > now \
+                        and not _owner_is_dead(row['owner']):
+                    continue
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, lease_expires = ?, "
+                    "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (owner, now + lease_seconds, now, row['id']))
+                job = dict(row)
+                job['resumed'] = row['status'] == 'running'
+                return job
+        return None
+
+    def renew(self, job_id, owner, lease_seconds):
+        """Extend a claim held by owner"""
+        with self._connect() as connection:
+            connection.execute('UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ?',
+                               (time.time() + lease_seconds, job_id, owner))
+
+    def pending_items(self, job_id):
+        """
+        Images of a job that have no result yet
+
+        Returns:
+            list: (index, path)
+        """
+        with self._connect() as connection:
+            return [(row['idx'], row['path']) for row in connection.execute(
+                "SELECT idx, path FROM job_items WHERE job_id = ? AND status = 'pending' ORDER BY idx",
+                (job_id,))]
+
+    def record_results(self, job_id, results, processing_seconds, worker_seconds):
+        """
+        Store the outcome of one chunk and advance the job counters
+
+        Args:
+            job_id (str): Job id
+            results (list): (index, result dict or None, error or None)
+            processing_seconds (float): Wall-clock time the dispatcher spent on the job since the last chunk
+            worker_seconds (float): Time the worker spent classifying the chunk
+        """
+        completed = sum(1 for _, result, _ in results if result is not None)
+        with self._connect() as connection:
+            connection.executemany(
+                'UPDATE job_items SET status = ?, result = ?, error = ? WHERE job_id = ? AND idx = ?',
+                [('completed' if result is not None else 'failed',
+                  json.dumps(result) if result is not None else None, error, job_id, index)
+                 for index, result, error in results])
+            connection.execute(
+                'UPDATE jobs SET completed = completed + ?, failed = failed + ?, '
+                'processing_seconds = processing_seconds + ?, worker_seconds = worker_seconds + ? WHERE id = ?',
+                (completed, len(results) - completed, processing_seconds, worker_seconds, job_id))
+
+    def finish(self, job_id, status='completed', error=None):
+        """
+        Mark a job done and release its claim
+
+        Returns:
+            str: The job's input directory to clean up, if any
+        """
+        with self._connect() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, error = ?, finished_at = ?, owner = NULL, lease_expires = NULL '
+                'WHERE id = ?', (status, error, time.time(), job_id))
+            row = connection.execute('SELECT input_dir FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row['input_dir'] if row else None
+
+    def get(self, job_id, offset=0, limit=100):
+        """
+        Report a job's progress, throughput and a page of its results
+
+        Args:
+            job_id (str): Job id
+            offset (int): First result returned
+            limit (int): Most results returned
+
+        Returns:
+            dict: Job report, or None if the job does not exist
+        """
+        with self._connect() as connection:
+            row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            items = connection.execute(
+                'SELECT idx, name, status, result, error FROM job_items WHERE job_id = ? '
+                'ORDER BY idx LIMIT ? OFFSET ?', (job_id, limit, offset)).fetchall()
+
+        processed = row['completed'] + row['failed']
+        results = []
+        for item in items:
+            entry = {'index': item['idx'], 'name': item['name'], 'status': item['status']}
+            if item['result'] is not None:
+                entry.update(json.loads(item['result']))
+            if item['error'] is not None:
+                entry['error'] = item['error']
+            results.append(entry)
+
+        return {
+            'job_id': row['id'],
+            'status': row['status'],
+            'model_version': row['model_version'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+            'error': row['error'],
+            'progress': {
+                'total': row['total'],
+                'completed': row['completed'],
+                'failed': row['failed'],
+                'pending': row['total'] - processed,
+                'fraction': processed / row['total'] if row['total'] else 1.0
+            },
+            'throughput': {
+                'images_per_second': processed / row['processing_seconds'] if row['processing_seconds'] else 0.0,
+                'processing_seconds': row['processing_seconds'],
+                'worker_ms_per_image': row['worker_seconds'] / processed * 1000.0 if processed else 0.0
+            },
+            'results': results,
+            'offset': offset,
+            'limit': limit
+        }
+
+    def counts(self):
+        """
+        Number of jobs in each status
+
+        Returns:
+            dict: status -> count
+        """
+        if not self._schema_ready and not os.path.exists(self.db_path):
+            return {}
+        with self._connect() as connection:
+            return {row['status']: row['count'] for row in connection.execute(
+                'SELECT status, COUNT(*) AS count FROM jobs GROUP BY status')}
+
+
+# Worker process state: the session is loaded once by the pool initializer
+_worker_session = None
+
+
+def _init_worker(model_path, target_size):
+    """Process pool initializer: load the model once for this worker"""
+    global _worker_session
+    from inference_session import InferenceSession
+    from thread_budget import apply_thread_budget
+
+    # The pool already runs one process per core it was given
+    apply_thread_budget(1)
+    _worker_session = InferenceSession.from_bundle(model_path, target_size=target_size, threads=1)
+
+
+def _classify_chunk(items):
+    """
+    Process pool task: classify a chunk of image files
+
+    Args:
+        items (list): (index, path)
+
+    Returns:
+        tuple: ([(index, result or None, error or None)], seconds spent)
+    """
+    started = time.perf_counter()
+    predictions = _worker_session.predict_paths([path for _, path in items])
+    results = []
+    for (index, _), prediction in zip(items, predictions):
+        if prediction is None:
+            results.append((index, None, 'Could not decode image'))
+            continue
+        results.append((index, {
+            'predicted_class': prediction['predicted_class'],
+            'confidence': prediction['confidence'],
+            'severity': prediction['severity'],
+            'severity_confidence': prediction['severity_confidence']
+        }, None))
+    return results, time.perf_counter() - started
+
+
+class JobRunner:
+    """
+    Background dispatcher that works through queued jobs on a process pool
+    """
+
+    def __init__(self, store, workers=2, chunk_size=DEFAULT_CHUNK_SIZE, lease_seconds=60.0,
+                 poll_seconds=2.0, mp_context='spawn'):
+        """
+        Initialize the runner
+
+        Args:
+            store (JobStore): Job persistence
+            workers (int): Processes in the pool
+            chunk_size (int): Images per pool task
+            lease_seconds (float): Claim duration, renewed after every chunk
+            poll_seconds (float): How often to look for work when idle
+            mp_context (str): multiprocessing start method ('spawn' is safe
+                from threaded servers)
+        """
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.mp_context = mp_context
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pool = None
+        self._pool_key = None
+        self._current_job = None
+
+    def start(self):
+        """Start the dispatcher thread (no-op if already running in this process)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rhythmiq-jobs', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Stop the dispatcher after the chunks in flight and shut the pool down"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def wake(self):
+        """Look for work now instead of at the next poll"""
+        self._wake.set()
+
+    def stats(self):
+        """
+        Report runner settings and job counts
+
+        Returns:
+            dict: Workers, chunk size, current job and jobs per status
+        """
+        return {
+            'enabled': True,
+            'workers': self.workers,
+            'chunk_size': self.chunk_size,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'current_job': self._current_job,
+            'jobs': self.store.counts()
+        }
+
+    def _run(self):
+        owner = _owner_id()
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim_next(owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not read the job queue: {e}")
+                job = None
+            if job is None:
+                # Free the workers' model copies while there is nothing to do
+                if self._pool is not None:
+                    self._pool.shutdown(wait=True)
+                    self._pool = None
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            try:
+                self._current_job = job['id']
+                self.process(job, owner)
+            except Exception as e:
+                print(f"⚠️ Job {job['id']} failed: {e}")
+                self._cleanup(self.store.finish(job['id'], 'failed', str(e)))
+            finally:
+                self._current_job = None
+
+    def _get_pool(self, model_path, target_size):
+        """Process pool with the job's model loaded, recreated when the model changes"""
+        key = (model_path, target_size)
+        if self._pool is not None and self._pool_key != key:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context(self.mp_context),
+                                             initializer=_init_worker, initargs=key)
+            self._pool_key = key
+        return self._pool
+
+    def process(self, job, owner):
+        """
+        Classify every pending image of a claimed job
+
+        Args:
+            job (dict): Row returned by JobStore.claim_next
+            owner (str): Claim holder
+        """
+        target_size = tuple(int(dim) for dim in job['target_size'].split(','))
+        pending = self.store.pending_items(job['id'])
+        chunks = [pending[start:start + self.chunk_size] for start in range(0, len(pending), self.chunk_size)]
+        print(f"📦 {'Resuming' if job.get('resumed') else 'Starting'} job {job['id']}: "
+              f"{len(pending)} of {job['total']} images to classify")
+
+        in_flight = {}
+        retried = set()
+        last = time.perf_counter()
+        while (chunks or in_flight) and not self._stop.is_set():
+            # Keep every worker busy with one chunk queued behind it
+            pool = self._get_pool(job['model_path'], target_size)
+            while chunks and len(in_flight) < self.workers * 2:
+                chunk = chunks.pop(0)
+                in_flight[pool.submit(_classify_chunk, chunk)] = chunk
+
+            done, _ = wait(in_flight, timeout=self.lease_seconds / 3, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = in_flight.pop(future)
+                try:
+                    results, worker_seconds = future.result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. out of memory): retry the chunk once on a fresh pool
+                    self._pool = None
+                    if chunk[0][0] not in retried:
+                        retried.add(chunk[0][0])
+                        chunks.append(chunk)
+                        continue
+                    results, worker_seconds = [(index, None, 'Worker process died') for index, _ in chunk], 0.0
+                except Exception as e:
+                    results, worker_seconds = [(index, None, str(e)) for index, _ in chunk], 0.0
+                now = time.perf_counter()
+                self.store.record_results(job['id'], results, now - last, worker_seconds)
+                last = now
+            self.store.renew(job['id'], owner, self.lease_seconds)
+
+        if self._stop.is_set():
+            return
+        self._cleanup(self.store.finish(job['id']))
+        report = self.store.get(job['id'], limit=0)
+        print(f"✅ Job {job['id']} finished: {report['progress']['completed']} classified, "
+              f"{report['progress']['failed']} failed, "
+              f"{report['throughput']['images_per_second']:.1f} images/s")
+
+    @staticmethod
+    def _cleanup(input_dir):
+        if input_dir:
+            shutil.rmtree(input_dir, ignore_errors=True)
@@ -0,0 +1,345 @@
+"""
+🫀 RhythmIQ Partitioned Forest
+=============================
+Splits the trees of the served forest across long-lived worker processes so
+a single image is evaluated by every core at once. Worker i keeps only its
+contiguous slice of trees; a request is written once into a shared-memory
+input block, every worker adds up the class probabilities of its trees into
+its own row of a shared-memory output block, and the parent sums the rows
+and divides by the number of trees, which is how the forest averages them.
+
+Only one request is broadcast at a time: a request that finds the workers
+busy is told so straight away and takes the normal path instead, so the
+partitioned forest lowers latency when traffic is light and never queues.
+
+A worker given a joblib bundle has to load the whole forest before it can
+drop the other slices, so those workers start one after another and the
+peak stays near one model plus the slices loaded so far. Workers given a
+.mmap bundle only page in their own trees and start all at once.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+from model_bundle import is_mmap_bundle
+
+
+def tree_slices(n_trees, partitions):
+    """
+    Split the trees into contiguous, near-equal slices
+
+    Args:
+        n_trees (int): Trees in the forest
+        partitions (int): Number of slices (capped at n_trees)
+
+    Returns:
+        list: slice per partition
+    """
+    bounds = np.linspace(0, n_trees, min(partitions, n_trees) + 1).round().astype(int)
+    return [slice(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def partial_probability_sum(model, trees, X):
+    """
+    Sum of the class probabilities of a slice of trees
+
+    Args:
+        model: Forest (sklearn estimators_ or MappedForestClassifier)
+        trees (slice): Trees to evaluate
+        X (numpy.ndarray): float32 feature matrix
+
+    Returns:
+        numpy.ndarray: Shape (n_samples, n_classes); divide by the forest's
+            tree count to get the forest's probabilities
+    """
+    if hasattr(model, 'roots'):
+        # Mapped forest: evaluates a subset of its trees directly
+        return model.predict_proba(X, trees=trees) * len(range(*trees.indices(len(model.roots))))
+
+    total = np.zeros((len(X), len(model.classes_)), dtype=np.float64)
+    for estimator in model.estimators_[trees]:
+        total += estimator.predict_proba(X, check_input=False)
+    return total
+
+
+def _partition_worker(connection, model_path, trees, input_name, output_name, partition, max_rows):
+    """
+    Worker process: hold one slice of trees and evaluate it on every broadcast
+
+    Messages from the parent are the number of rows to evaluate (None stops
+    the worker); the answer is None on success or an error message.
+    """
+    from model_bundle import bundle_version, load_bundle
+    from thread_budget import apply_thread_budget
+
+    apply_thread_budget(1)
+    try:
+        bundle = load_bundle(model_path)
+        model = bundle['model'] if isinstance(bundle, dict) else bundle
+        if hasattr(model, 'estimators_'):
+            # Keep only this worker's trees in memory
+            model.estimators_ = model.estimators_[trees]
+            trees = slice(0, len(model.estimators_))
+        inputs = shared_memory.SharedMemory(name=input_name)
+        outputs = shared_memory.SharedMemory(name=output_name)
+        n_features, n_classes = model.n_features_in_, len(model.classes_)
+        connection.send(('ready', bundle_version(model_path)))
+    except Exception as e:
+        connection.send(('error', str(e)))
+        return
+
+    while True:
+        try:
+            rows = connection.recv()
+        except EOFError:
+            break
+        if rows is None:
+            break
+        try:
+            X = np.ndarray((rows, n_features), dtype=np.float32, buffer=inputs.buf)
+            partial = np.ndarray((max_rows, n_classes), dtype=np.float64, buffer=outputs.buf,
+                                 offset=partition * max_rows * n_classes * 8)
+            partial[:rows] = partial_probability_sum(model, trees, X)
+            connection.send(None)
+        except Exception as e:
+            connection.send(str(e))
+
+
+class PartitionedForest:
+    """
+    Forest evaluated by several worker processes, each holding a slice of its trees
+    """
+
+    def __init__(self, model_path, model_version, n_trees, n_features, n_classes, partitions=2, max_rows=16,
+                 timeout=30.0, mp_context='spawn'):
+        """
+        Initialize the partitioned forest (workers start on first use, or with start())
+
+        Args:
+            model_path (str): Bundle every worker loads its slice from
+            model_version (str): Version the parent serves; workers that load another are refused
+            n_trees (int): Trees in the forest
+            n_features (int): Input features
+            n_classes (int): Probability columns
+            partitions (int): Worker processes (at most one per tree)
+            max_rows (int): Largest batch broadcast at once
+            timeout (float): Seconds to wait for a worker before giving up on it
+            mp_context (str): multiprocessing start method
+        """
+        self.model_path = model_path
+        self.model_version = model_version
+        self.n_trees = n_trees
+        self.n_features = n_features
+        self.n_classes = n_classes
+        self.slices = tree_slices(n_trees, partitions)
+        self.partitions = len(self.slices)
+        self.max_rows = max_rows
+        self.timeout = timeout
+        self.mp_context = mp_context
+        self._start_lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._pid = None
+        self._workers = []
+        self._blocks = None
+        self._broken = None
+        self._closed = False
+
+        # Counters for monitoring
+        self._served = 0
+        self._busy_skips = 0
+        self._timeouts = 0
+        self._seconds = 0.0
+
+    @property
+    def broken(self):
+        """Why the workers became unusable, or None"""
+        return self._broken
+
+    def start(self):
+        """
+        Start the workers in this process and wait until each holds its trees
+
+        Raises:
+            RuntimeError: If a worker fails to load its slice or loads another bundle version,
+                or the forest has been shut down
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._closed:
+                raise RuntimeError("Partitioned forest has been shut down")
+            if self._pid == os.getpid():
+                return
+            context = multiprocessing.get_context(self.mp_context)
+            self._blocks = [
+                shared_memory.SharedMemory(create=True, size=self.max_rows * self.n_features * 4),
+                shared_memory.SharedMemory(create=True, size=self.partitions * self.max_rows * self.n_classes * 8)
+            ]
+            self._workers = []
+            self._broken = None
+            self._pid = os.getpid()
+            # Workers load a joblib bundle whole, so only one does at a time
+            one_at_a_time = not is_mmap_bundle(self.model_path)
+            for partition, trees in enumerate(self.slices):
+                parent_end, child_end = context.Pipe()
+                process = context.Process(target=_partition_worker, daemon=True, args=(
+                    child_end, self.model_path, trees, self._blocks[0].name, self._blocks[1].name,
+                    partition, self.max_rows))
+                process.start()
+                child_end.close()
+                self._workers.append((process, parent_end))
+                if one_at_a_time:
+                    self._wait_ready(parent_end)
+
+        if not one_at_a_time:
+            for process, connection in self._workers:
+                self._wait_ready(connection)
+
+    def _wait_ready(self, connection):
+        """Wait until a worker holds its trees, checking it loaded the expected version"""
+        status, detail = self._receive(connection)
+        if status != 'ready':
+            self._fail(f"Forest partition failed to load: {detail}")
+        if detail != self.model_version:
+            self._fail(f"Forest partition loaded model {detail}, expected {self.model_version}")
+
+    def _receive(self, connection, timeout=None):
+        """Wait for one worker's answer, treating silence or a dead worker as a failure"""
+        try:
+            if connection.poll(self.timeout if timeout is None else timeout):
+                return connection.recv()
+        except (EOFError, OSError):
+            pass
+        self._fail("Forest partition worker stopped answering")
+
+    def _drain(self, connections):
+        """Collect the answers of an abandoned broadcast, then free the workers for the next one"""
+        try:
+            for connection in connections:
+                self._receive(connection)
+        except RuntimeError as e:
+            print(f"⚠️ {e}")
+        finally:
+            self._busy.release()
+
+    def _fail(self, message):
+        """Mark the workers unusable and raise"""
+        self._broken = message
+        raise RuntimeError(message)
+
+    def try_predict_proba(self, features, timeout=None):
+        """
+        Classify a batch with every worker at once, unless they are busy
+
+        Args:
+            features (numpy.ndarray): Shape (n_samples, n_features), at most max_rows samples
+            timeout (float): Longest wait for the answer (e.g. what is left of a deadline);
+                the workers finish the abandoned broadcast before taking the next one
+
+        Returns:
+            numpy.ndarray: Class probabilities, or None if another request holds the workers
+
+        Raises:
+            ValueError: If there are more than max_rows samples
+            RuntimeError: If the workers are broken or fail
+            concurrent.futures.TimeoutError: If the workers did not answer within timeout
+        """
+        if len(features) > self.max_rows:
+            raise ValueError(f"{len(features)} samples, at most {self.max_rows} can be broadcast at once")
+        if not self._busy.acquire(blocking=False):
+            with self._start_lock:
+                self._busy_skips += 1
+            return None
+        draining = False
+        try:
+            self.start()
+            if self._broken:
+                raise RuntimeError(self._broken)
+
+            started = time.perf_counter()
+            expires_at = started + timeout if timeout is not None else None
+            rows = len(features)
+            inputs, outputs = self._blocks
+            np.ndarray((rows, self.n_features), dtype=np.float32, buffer=inputs.buf)[:] = features
+            for _, connection in self._workers:
+                try:
+                    connection.send(rows)
+                except OSError:
+                    self._fail("Forest partition worker stopped answering")
+            errors = []
+            for index, (_, connection) in enumerate(self._workers):
+                if expires_at is not None and not connection.poll(max(0.0, expires_at - time.perf_counter())):
+                    # Their answers must still be read before the next broadcast
+                    draining = True
+                    threading.Thread(target=self._drain, args=([worker[1] for worker in self._workers[index:]],),
+                                     name='rhythmiq-partition-drain', daemon=True).start()
+                    with self._start_lock:
+                        self._timeouts += 1
+                    raise FutureTimeoutError(f"Forest partitions did not answer within {timeout * 1000.0:.0f} ms")
+                errors.append(self._receive(connection))
+            if any(errors):
+                raise RuntimeError(f"Forest partition failed: {next(error for error in errors if error)}")
+
+            partials = np.ndarray((self.partitions, self.max_rows, self.n_classes), dtype=np.float64,
+                                  buffer=outputs.buf)
+            probabilities = partials[:, :rows].sum(axis=0) / self.n_trees
+            with self._start_lock:
+                self._served += 1
+                self._seconds += time.perf_counter() - started
+            return probabilities
+        finally:
+            if not draining:
+                self._busy.release()
+
+    def shutdown(self):
+        """Stop the workers (after any broadcast in progress) and release the shared memory"""
+        with self._busy:
+            self._closed = True
+            if self._pid != os.getpid():
+                return
+            for process, connection in self._workers:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            for process, connection in self._workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+                connection.close()
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._workers = []
+            self._blocks = None
+            self._pid = None
+
+    def stats(self):
+        """
+        Report settings and counters
+
+        Returns:
+            dict: Partitions, trees per partition, requests served and skipped while busy, mean latency
+        """
+        with self._start_lock:
+            return {
+                'enabled': True,
+                'partitions': self.partitions,
+                'trees_per_partition': [trees.stop - trees.start for trees in self.slices],
+                'model_version': self.model_version,
+                'running': self._pid == os.getpid() and not self._broken,
+                'broken': self._broken,
+                'served': self._served,
+                'skipped_busy': self._busy_skips,
+                'timed_out': self._timeouts,
+                'mean_ms': self._seconds / self._served * 1000.0 if self._served else 0.0
+            }
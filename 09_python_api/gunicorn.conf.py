@@ -0,0 +1,47 @@
+"""
+🫀 RhythmIQ gunicorn configuration
+=================================
+Production server settings: one worker per core, the model preloaded in the
+master and shared copy-on-write with every worker.
+"""
+
+import multiprocessing
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from process_memory import memory_usage, format_memory
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8083)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Enough threads for every admitted request plus the admission queue, so
+# excess load is queued and shed by the API rather than in the accept backlog
+_admission_threads = int(os.environ.get('RHYTHMIQ_MAX_CONCURRENT_REQUESTS', 8)) + \
+    int(os.environ.get('RHYTHMIQ_MAX_QUEUED_REQUESTS', 16))
+threads = int(os.environ.get('RHYTHMIQ_WORKER_THREADS', max(4, _admission_threads)))
+worker_class = 'gthread'
+timeout = int(os.environ.get('RHYTHMIQ_WORKER_TIMEOUT', 120))
+
+# Load the model once in the master before forking workers
+preload_app = True
+
+
+def when_ready(server):
+    """Log master memory once the model is loaded"""
+    server.log.info(f"🫀 Master memory after model preload: {format_memory(memory_usage())}")
+
+
+def post_worker_init(worker):
+    """Log each worker's memory split right after it starts"""
+    worker.log.info(f"👷 Worker memory: {format_memory(memory_usage())}")
+
+    # Threads do not survive the fork, so every worker watches the bundle itself
+    # and runs a job dispatcher (jobs are claimed under a lease in SQLite); with
+    # RHYTHMIQ_INFERENCE_PROCESSES / RHYTHMIQ_FOREST_PARTITIONS each worker also
+    # starts its own inference pool and forest partitions
+    import rhythmiq_api
+    rhythmiq_api.start_model_watcher()
+    rhythmiq_api.start_job_runner()
+    rhythmiq_api.start_process_executor()
+    rhythmiq_api.start_forest_partitions()
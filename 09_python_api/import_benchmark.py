@@ -0,0 +1,139 @@
+"""
+🫀 RhythmIQ Import-Time Benchmark
+================================
+Measures how long importing the API takes in a fresh interpreter, using
+``python -X importtime``, and fails when it exceeds a budget or when a
+training-only dependency (pandas, matplotlib, sklearn, scipy) is pulled into
+the serving path. Cold start matters for autoscaled instances.
+
+    python 09_python_api/import_benchmark.py --budget-ms 1000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules only needed for training, evaluation and plotting; none of them may
+# be imported just by loading the API (a pickled sklearn model still imports
+# sklearn when it is loaded, which is the model runtime, not the import path)
+TRAINING_ONLY_MODULES = ('pandas', 'matplotlib', 'sklearn', 'scipy')
+
+DEFAULT_BUDGET_MS = float(os.environ.get('RHYTHMIQ_IMPORT_BUDGET_MS', 1000))
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVING_PATH = [
+    os.path.join(project_root, '02_preprocessing'),
+    os.path.join(project_root, '03_model_training'),
+    os.path.join(project_root, '09_python_api')
+]
+
+
+def parse_importtime(output):
+    """
+    Parse the stderr of ``python -X importtime``
+
+    Args:
+        output (str): Lines like "import time:  self [us] | cumulative | name"
+
+    Returns:
+        list: (depth, name, cumulative microseconds) in the order printed;
+            children are printed before the module that imported them
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            cumulative = int(cumulative)
+        except ValueError:
+            continue
+        stripped = name.lstrip(' ')
+        entries.append(((len(name) - len(stripped) - 1) // 2, stripped.strip(), cumulative))
+    return entries
+
+
+def import_breakdown(entries, module):
+    """
+    Cumulative import time of a module and of each module it imports directly
+
+    Args:
+        entries (list): Output of parse_importtime
+        module (str): Top-level module imported
+
+    Returns:
+        tuple: (module microseconds, {direct import: microseconds})
+    """
+    children = {}
+    for depth, name, cumulative in entries:
+        if depth == 0:
+            if name == module:
+                return cumulative, children
+            children = {}
+        elif depth == 1:
+            children[name] = cumulative
+    raise ValueError(f"{module} does not appear in the importtime output")
+
+
+def measure_import(module='rhythmiq_api'):
+    """
+    Import a module in a fresh interpreter and time it
+
+    Args:
+        module (str): Module to import
+
+    Returns:
+        dict: 'total_ms' for the module, 'imports_ms' per direct import and
+            the 'training_modules' that ended up in sys.modules
+    """
+    code = (f"import sys; import {module}; "
+            f"print(','.join(m for m in {TRAINING_ONLY_MODULES!r} if m in sys.modules))")
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(SERVING_PATH + [env.get('PYTHONPATH', '')]).rstrip(os.pathsep)
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True,
+                            text=True, env=env, cwd=project_root)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    total, children = import_breakdown(parse_importtime(result.stderr), module)
+    stdout_lines = result.stdout.strip().splitlines()
+    heavy = stdout_lines[-1].split(',') if stdout_lines else []
+    return {
+        'total_ms': total / 1000.0,
+        'imports_ms': {name: us / 1000.0 for name, us in children.items()},
+        'training_modules': [name for name in heavy if name]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the API import time against a budget')
+    parser.add_argument('--module', default='rhythmiq_api', help='Module to import')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='Allowed import time')
+    parser.add_argument('--repeats', type=int, default=3, help='Fresh interpreters to time (best is kept)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest direct imports to list')
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.repeats)]
+    best = min(runs, key=lambda run: run['total_ms'])
+
+    print(f"⏱️ import {args.module}: {best['total_ms']:.0f} ms "
+          f"(best of {args.repeats}, budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(best['imports_ms'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {ms:8.1f} ms  {name}")
+
+    failed = False
+    if best['training_modules']:
+        print(f"❌ Training-only modules imported by the serving path: {', '.join(best['training_modules'])}")
+        failed = True
+    if best['total_ms'] > args.budget_ms:
+        print(f"❌ Import time over budget by {best['total_ms'] - args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ Import time within budget")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+🫀 RhythmIQ Metrics
+==================
+Minimal Prometheus metrics (counters, gauges, histograms) rendered in the
+text exposition format for the API's /metrics endpoint.
+
+Under gunicorn every worker keeps its own metrics; Prometheus scrapes
+whichever worker answers, so aggregate per-worker series (sum / rate) in
+queries rather than reading one scrape as the whole service.
+"""
+
+import math
+import threading
+
+# Latency buckets in seconds, from sub-millisecond decode up to slow forest passes
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    """Format a sample value the way Prometheus expects"""
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    """Render a label dict as {name="value",...}"""
+    if not labels:
+        return ''
+    escaped = []
+    for name, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Metric:
+    """Base class holding one metric family and its labelled children"""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Initialize the metric
+
+        Args:
+            name (str): Metric name
+            documentation (str): HELP text
+            labelnames (tuple): Label names every sample must provide
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Validate labels and turn them into a hashable key"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        """Turn a key back into a label dict"""
+        return dict(zip(self.labelnames, key))
+
+    def render(self):
+        """
+        Render the metric family
+
+        Returns:
+            list: Exposition format lines
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f'{self.name}{_format_labels(self._labels(key))} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Increase the counter"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value, **labels):
+        """Mirror a total counted elsewhere (e.g. a component's own counters)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        """Current count"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        """Set the gauge"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """Increase the gauge"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """Decrease the gauge"""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        """Current value"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize the histogram
+
+        Args:
+            name (str): Metric name
+            documentation (str): HELP text
+            labelnames (tuple): Label names every sample must provide
+            buckets (tuple): Upper bounds of the buckets (+Inf is added)
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """Record one observation"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def snapshot(self, **labels):
+        """
+        Copy of one child's state
+
+        Returns:
+            dict: {'buckets': [(upper_bound, cumulative_count)], 'sum': float, 'count': int}
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {'buckets': [(bound, 0) for bound in self.buckets], 'sum': 0.0, 'count': 0}
+            counts = list(state['counts'])
+            total, count = state['sum'], state['count']
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {'buckets': cumulative, 'sum': total, 'count': count}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            keys = sorted(self._values)
+        for key in keys:
+            labels = self._labels(key)
+            snapshot = self.snapshot(**labels)
+            for bound, cumulative in snapshot['buckets']:
+                bucket_labels = dict(labels, le=_format_value(float(bound)))
+                lines.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(snapshot["sum"])}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {snapshot["count"]}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together
+    """
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        """
+        Add a metric to the registry
+
+        Args:
+            metric (_Metric): Counter, Gauge or Histogram
+
+        Returns:
+            _Metric: The metric, for chaining at definition time
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Create and register a Counter"""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Create and register a Gauge"""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """Create and register a Histogram"""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        """
+        Run a callback before every render, to refresh gauges from other components
+
+        Args:
+            collector (callable): Called with no arguments
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format
+
+        Returns:
+            str: Exposition text
+        """
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,174 @@
+"""
+🫀 RhythmIQ Micro-Batching
+=========================
+Collects single-image requests that arrive close together and classifies
+them with one batched predict_proba call, then hands each request its own
+row of probabilities back.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from request_deadline import DeadlineExceeded
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching queue in front of InferenceSession.predict_proba
+    """
+
+    def __init__(self, max_batch_size=16, max_wait_ms=5.0):
+        """
+        Initialize the micro-batcher
+
+        Args:
+            max_batch_size (int): Largest batch handed to the model
+            max_wait_ms (float): How long the first request of a batch waits for company
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # Realized batch statistics
+        self._batch_sizes = {}
+        self._batches = 0
+        self._requests = 0
+        self._queue_wait_total = 0.0
+        self._expired = 0
+
+    def submit(self, session, features, expires_at=None):
+        """
+        Queue one flattened image for classification
+
+        Args:
+            session (InferenceSession): Session whose model classifies the image
+            features (numpy.ndarray): Flattened preprocessed image
+            expires_at (float): perf_counter() after which the image is dropped
+                instead of classified (its future raises DeadlineExceeded)
+
+        Returns:
+            concurrent.futures.Future: Resolves to the image's probability row
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((session, features, future, time.perf_counter(), expires_at))
+        return future
+
+    def predict_proba(self, session, features, timeout=None, expires_at=None):
+        """
+        Classify one flattened image through the batching queue
+
+        Args:
+            session (InferenceSession): Session whose model classifies the image
+            features (numpy.ndarray): Flattened preprocessed image
+            timeout (float): Seconds to wait for the result
+            expires_at (float): perf_counter() after which the image is dropped
+
+        Returns:
+            numpy.ndarray: Class probabilities for the image
+
+        Raises:
+            concurrent.futures.TimeoutError: If the result takes longer than timeout
+            DeadlineExceeded: If the image expired before its batch ran
+        """
+        return self.submit(session, features, expires_at).result(timeout)
+
+    def stats(self):
+        """
+        Report realized batch sizes
+
+        Returns:
+            dict: Batching settings and counters
+        """
+        with self._lock:
+            batches = self._batches
+            return {
+                'enabled': True,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'batches': batches,
+                'requests': self._requests,
+                'mean_batch_size': self._requests / batches if batches else 0.0,
+                'mean_queue_wait_ms': self._queue_wait_total / self._requests * 1000.0 if self._requests else 0.0,
+                'expired': self._expired,
+                'batch_size_counts': dict(sorted(self._batch_sizes.items()))
+            }
+
+    def _ensure_worker(self):
+        """Start the worker thread (again after a fork, threads do not survive it)"""
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='rhythmiq-micro-batcher', daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the window closes"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Worker loop: collect a batch, evaluate it per session, fan results out"""
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+
+            # Images whose deadline passed while queued are dropped, not classified
+            expired = [item for item in batch if item[4] is not None and item[4] <= started]
+            for item in expired:
+                item[2].set_exception(DeadlineExceeded('model'))
+            batch = [item for item in batch if item[4] is None or item[4] > started]
+            if expired:
+                with self._lock:
+                    self._expired += len(expired)
+            if not batch:
+                continue
+
+            # Requests may target different sessions (e.g. during a model swap)
+            groups = {}
+            for item in batch:
+                groups.setdefault(id(item[0]), []).append(item)
+
+            for items in groups.values():
+                self._evaluate(items)
+
+            with self._lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                self._queue_wait_total += sum(started - item[3] for item in batch)
+
+    def _evaluate(self, items):
+        """Run one predict_proba over every request for the same session"""
+        session = items[0][0]
+        try:
+            features = session.allocate(len(items))
+            for row, item in enumerate(items):
+                features[row] = item[1]
+            probabilities = session.predict_proba(features)
+        except Exception as e:
+            for item in items:
+                item[2].set_exception(e)
+            return
+
+        for row, item in enumerate(items):
+            item[2].set_result(probabilities[row])
@@ -0,0 +1,340 @@
+"""
+🫀 RhythmIQ Model Registry
+=========================
+Several named models served side by side, so a candidate can be compared
+with the primary model on live traffic. Each request is routed either to
+the model it asks for (by name or version) or by a weighted random split,
+and per-model latency and class distribution are kept for the comparison.
+
+Registered bundles are loaded on first use and kept in an LRU cache: when
+the resident size of the loaded models exceeds the memory budget, the least
+recently used unpinned models are dropped (requests still running on them
+keep their reference until they finish).
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+from model_bundle import bundle_version
+
+
+def parse_mapping(value):
+    """
+    Parse a "name=value,name=value" setting
+
+    Args:
+        value (str): Setting text (may be empty)
+
+    Returns:
+        dict: name -> value string, in the order given
+    """
+    mapping = {}
+    for item in (value or '').split(','):
+        if not item.strip():
+            continue
+        name, separator, setting = item.partition('=')
+        if not separator or not name.strip() or not setting.strip():
+            raise ValueError(f"Expected name=value, got: {item!r}")
+        mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class ModelRegistry:
+    """
+    Named inference sessions with request routing, an LRU cache under a
+    memory budget, and per-model counters
+    """
+
+    def __init__(self, primary_name='primary', get_primary=None, weights=None, rng=None,
+                 loader=None, memory_budget_bytes=0, measure=None):
+        """
+        Initialize the registry
+
+        Args:
+            primary_name (str): Name the primary model is served under (always pinned)
+            get_primary (callable): Returns the primary session (hot reload swaps it)
+            weights (dict): name -> traffic weight; by default all traffic goes
+                to the primary model and others are only reached by name
+            rng (random.Random): Random source for the weighted split
+            loader (callable): Loads (and warms up) a session from a bundle path
+            memory_budget_bytes (int): Resident size allowed for all loaded models,
+                primary included (0 = unlimited)
+            measure (callable): Resident bytes of a session (default: session.resident_bytes())
+        """
+        self.primary_name = primary_name
+        self.get_primary = get_primary or (lambda: None)
+        self.weights = {name: float(weight) for name, weight in (weights or {}).items()}
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.measure = measure or (lambda session: session.resident_bytes())
+        self._rng = rng or random.Random()
+        self._specs = OrderedDict()
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._cache_counters = {}
+
+        if any(weight < 0 for weight in self.weights.values()):
+            raise ValueError("Model weights must not be negative")
+
+    def register(self, name, model_path, pinned=False):
+        """
+        Make a bundle available under a name; it is loaded on first use
+
+        Args:
+            name (str): Model name used for routing and reporting
+            model_path (str): Bundle to load
+            pinned (bool): Never evict the model once loaded
+        """
+        if name == self.primary_name:
+            raise ValueError(f"'{name}' is reserved for the primary model")
+        with self._lock:
+            self._specs[name] = {'model_path': model_path, 'pinned': pinned, 'version': None}
+            self._cache_counters.setdefault(name, {'loads': 0, 'load_failures': 0, 'evictions': 0,
+                                                   'load_seconds': 0.0})
+
+    def add(self, name, session, pinned=False):
+        """
+        Serve an already loaded session under a name
+
+        Args:
+            name (str): Model name used for routing and reporting
+            session (InferenceSession): Loaded, warmed-up session
+            pinned (bool): Never evict the model
+        """
+        self.register(name, session.model_path, pinned)
+        self._store(name, session)
+
+    def names(self):
+        """Names of every model, primary first"""
+        with self._lock:
+            return [self.primary_name] + list(self._specs)
+
+    def is_pinned(self, name):
+        """Whether a model is exempt from eviction"""
+        with self._lock:
+            return name == self.primary_name or (name in self._specs and self._specs[name]['pinned'])
+
+    def get(self, name):
+        """
+        Session served under a name, loading it if needed
+
+        Args:
+            name (str): Model name
+
+        Returns:
+            InferenceSession: The session, or None if unknown or it failed to load
+        """
+        if name == self.primary_name:
+            return self.get_primary()
+
+        with self._lock:
+            session = self._cached(name)
+            if session is not None or name not in self._specs or self.loader is None:
+                return session
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+            model_path = self._specs[name]['model_path']
+
+        # One load per model at a time; concurrent requests wait for it
+        with load_lock:
+            with self._lock:
+                session = self._cached(name)
+                if session is not None:
+                    return session
+
+            started = time.perf_counter()
+            try:
+                session = self.loader(model_path)
+            except Exception as e:
+                print(f"⚠️ Could not load model '{name}' from {model_path}: {e}")
+                with self._lock:
+                    self._cache_counters[name]['load_failures'] += 1
+                return None
+
+            with self._lock:
+                self._cache_counters[name]['loads'] += 1
+                self._cache_counters[name]['load_seconds'] += time.perf_counter() - started
+            self._store(name, session)
+            return session
+
+    def _cached(self, name):
+        """Loaded session for a name, marked as most recently used (lock held)"""
+        session = self._sessions.get(name)
+        if session is not None:
+            self._sessions.move_to_end(name)
+        return session
+
+    def _store(self, name, session):
+        """Keep a loaded session and evict others until the budget fits"""
+        size = self.measure(session)
+        with self._lock:
+            self._sessions[name] = session
+            self._sessions.move_to_end(name)
+            self._sizes[name] = size
+            self._specs[name]['version'] = session.model_version
+            evicted = self._evict_locked(keep=name)
+
+        for evicted_name, evicted_size in evicted:
+            print(f"♻️ Evicted model '{evicted_name}' ({evicted_size / 1024 / 1024:.1f} MB) to stay within the memory budget")
+
+    def _primary_bytes(self):
+        primary = self.get_primary()
+        return self.measure(primary) if primary is not None else 0
+
+    def _evict_locked(self, keep):
+        """Drop least recently used unpinned models until under budget (lock held)"""
+        if not self.memory_budget_bytes:
+            return []
+
+        total = self._primary_bytes() + sum(self._sizes.values())
+        evicted = []
+        for name in list(self._sessions):
+            if total <= self.memory_budget_bytes:
+                break
+            if name == keep or self._specs[name]['pinned']:
+                continue
+            del self._sessions[name]
+            size = self._sizes.pop(name)
+            total -= size
+            self._cache_counters[name]['evictions'] += 1
+            evicted.append((name, size))
+        return evicted
+
+    def resident_bytes(self):
+        """
+        Resident size of every loaded model, primary included
+
+        Returns:
+            int: Bytes
+        """
+        with self._lock:
+            return self._primary_bytes() + sum(self._sizes.values())
+
+    def resolve(self, requested):
+        """
+        Find the model a client asked for
+
+        Args:
+            requested (str): Model name or model_version
+
+        Returns:
+            str: Model name, or None if nothing matches
+        """
+        for name in self.names():
+            if name == requested or self._version_of(name) == requested:
+                return name
+        return None
+
+    def _version_of(self, name):
+        """Version of a model without loading it"""
+        if name == self.primary_name:
+            primary = self.get_primary()
+            return primary.model_version if primary is not None else None
+
+        with self._lock:
+            spec = self._specs.get(name)
+            if spec is None:
+                return None
+            if spec['version'] is None:
+                try:
+                    spec['version'] = bundle_version(spec['model_path'])
+                except OSError:
+                    return None
+            return spec['version']
+
+    def select(self, requested=None):
+        """
+        Route a request to a model
+
+        Args:
+            requested (str): Model name or version the client asked for, if any
+
+        Returns:
+            tuple: (model name, InferenceSession); the session is None when the
+                chosen model could not be loaded
+
+        Raises:
+            KeyError: If the requested model is unknown
+        """
+        if requested:
+            name = self.resolve(requested)
+            if name is None:
+                raise KeyError(requested)
+            return name, self.get(name)
+
+        names = [name for name in self.names() if self.weights.get(name, 0) > 0]
+        if names:
+            total = sum(self.weights[name] for name in names)
+            point = self._rng.uniform(0, total)
+            for name in names:
+                point -= self.weights[name]
+                if point <= 0:
+                    break
+        else:
+            name = self.primary_name
+        return name, self.get(name)
+
+    def record(self, name, seconds, predicted_classes):
+        """
+        Count one request served by a model
+
+        Args:
+            name (str): Model name
+            seconds (float): Time spent serving the request
+            predicted_classes (list): Class predicted for each image (empty if the request failed)
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, {'requests': 0, 'failures': 0, 'seconds': 0.0,
+                                                  'class_counts': {}})
+            stats['requests'] += 1
+            stats['seconds'] += seconds
+            if not predicted_classes:
+                stats['failures'] += 1
+            for predicted_class in predicted_classes:
+                stats['class_counts'][predicted_class] = stats['class_counts'].get(predicted_class, 0) + 1
+
+    def stats(self):
+        """
+        Report every model with its routing weight, cache state and counters
+
+        Returns:
+            dict: name -> version, weight, loaded/pinned state, resident size,
+                load/eviction counters, requests, failures, mean latency and class counts
+        """
+        report = {}
+        for name in self.names():
+            version = self._version_of(name)
+            pinned = self.is_pinned(name)
+            if name == self.primary_name:
+                primary = self.get_primary()
+                loaded = primary is not None
+                model_path = primary.model_path if loaded else None
+                resident = self.measure(primary) if loaded else 0
+            with self._lock:
+                if name != self.primary_name:
+                    loaded = name in self._sessions
+                    model_path = self._specs[name]['model_path']
+                    resident = self._sizes.get(name, 0)
+                stats = self._stats.get(name, {'requests': 0, 'failures': 0, 'seconds': 0.0, 'class_counts': {}})
+                report[name] = {
+                    'model_version': version,
+                    'model_path': model_path,
+                    'weight': self.weights.get(name, 0.0),
+                    'loaded': loaded,
+                    'pinned': pinned,
+                    'resident_mb': resident / 1024 / 1024,
+                    'requests': stats['requests'],
+                    'failures': stats['failures'],
+                    'mean_latency_ms': stats['seconds'] / stats['requests'] * 1000.0 if stats['requests'] else 0.0,
+                    'class_counts': dict(sorted(stats['class_counts'].items()))
+                }
+                report[name].update(self._cache_counters.get(name, {}))
+        return report
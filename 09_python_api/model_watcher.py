@@ -0,0 +1,93 @@
+"""
+🫀 RhythmIQ Model Watcher
+========================
+Polls the bundle the API is serving and triggers a hot reload once a
+retrained model has been written over it.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+from model_bundle import bundle_version
+
+
+class ModelWatcher:
+    """
+    Background poller that reloads the model when its bundle changes on disk
+    """
+
+    def __init__(self, interval_seconds, get_session, reload):
+        """
+        Initialize the watcher
+
+        Args:
+            interval_seconds (float): Seconds between polls
+            get_session (callable): Returns the session currently serving (or None)
+            reload (callable): Called with the bundle path; returns True if the reload succeeded
+        """
+        self.interval_seconds = interval_seconds
+        self.get_session = get_session
+        self.reload = reload
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # A version must be seen on two consecutive polls before reloading,
+        # so a bundle still being written is not picked up half-way
+        self._candidate = None
+        self._failed_version = None
+
+    def start(self):
+        """Start polling in a daemon thread (no-op if already running in this process)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rhythmiq-model-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop polling"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️ Model watcher error: {e}")
+
+    def poll(self):
+        """
+        Check the served bundle once and reload it if it changed
+
+        Returns:
+            bool: True if a reload was triggered
+        """
+        active_session = self.get_session()
+        if active_session is None or not active_session.model_path:
+            return False
+
+        try:
+            version = bundle_version(active_session.model_path)
+        except OSError:
+            # Bundle is being replaced right now; look again next poll
+            self._candidate = None
+            return False
+
+        if version == active_session.model_version or version == self._failed_version:
+            self._candidate = None
+            return False
+
+        if version != self._candidate:
+            self._candidate = version
+            return False
+
+        print(f"🔄 Model bundle changed on disk ({active_session.model_version} → {version}), reloading...")
+        self._candidate = None
+        if not self.reload(active_session.model_path):
+            self._failed_version = version
+        return True
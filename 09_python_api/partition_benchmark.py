@@ -0,0 +1,82 @@
+"""
+🫀 RhythmIQ Forest Partition Benchmark
+=====================================
+Single-image model latency of the whole forest in one thread against the
+same forest split across P worker processes (PartitionedForest), for several
+P, and checks that the probabilities are unchanged.
+
+    python 09_python_api/partition_benchmark.py --model 05_trained_models/rythmguard_model.joblib --partitions 1,2,4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+from forest_partition import PartitionedForest
+from inference_session import InferenceSession
+
+
+def latencies(predict, rows, repeats):
+    """
+    Time one call per row
+
+    Args:
+        predict (callable): Takes a (1, n_features) matrix
+        rows (numpy.ndarray): Feature matrix
+        repeats (int): Passes over the rows
+
+    Returns:
+        numpy.ndarray: Milliseconds per call
+    """
+    timings = []
+    for _ in range(repeats):
+        for row in rows:
+            started = time.perf_counter()
+            predict(row[np.newaxis])
+            timings.append((time.perf_counter() - started) * 1000.0)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-image latency with the forest split across processes')
+    parser.add_argument('--model', required=True, help='Model bundle (.joblib or .mmap directory)')
+    parser.add_argument('--partitions', default='1,2,4', help='Worker process counts to try')
+    parser.add_argument('--images', type=int, default=20, help='Distinct random inputs')
+    parser.add_argument('--repeats', type=int, default=5, help='Passes over the inputs')
+    args = parser.parse_args()
+
+    # The budget the API would apply; the pickled n_jobs=-1 would add joblib overhead per call
+    session = InferenceSession.from_bundle(args.model, threads=1)
+    model = session.model
+    rows = np.random.default_rng(0).random((args.images, session.feature_count), dtype=np.float32)
+    expected = session.predict_proba(rows)
+
+    baseline = latencies(session.predict_proba, rows, args.repeats)
+    print(f"🌲 {model.n_estimators} trees, {os.cpu_count()} CPUs")
+    print(f"{'setup':>14} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}")
+    print(f"{'in-process':>14} {np.percentile(baseline, 50):>8.2f} {np.percentile(baseline, 95):>8.2f} {1.0:>7.2f}x")
+
+    for partitions in [int(count) for count in args.partitions.split(',')]:
+        forest = PartitionedForest(session.model_path, session.model_version, model.n_estimators,
+                                   session.feature_count, len(model.classes_), partitions=partitions,
+                                   max_rows=args.images)
+        try:
+            forest.start()
+            deviation = np.abs(forest.try_predict_proba(rows) - expected).max()
+            timings = latencies(forest.try_predict_proba, rows, args.repeats)
+        finally:
+            forest.shutdown()
+        speedup = np.percentile(baseline, 50) / np.percentile(timings, 50)
+        print(f"{f'{forest.partitions} partitions':>14} {np.percentile(timings, 50):>8.2f} "
+              f"{np.percentile(timings, 95):>8.2f} {speedup:>7.2f}x   (max deviation {deviation:.1e})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+🫀 RhythmIQ Priority Load Test
+=============================
+Floods a running API with routine /analyze uploads from closed-loop clients
+while a steady trickle of urgent uploads arrives, and reports latency and
+admission queue wait per class. It runs twice: first with the urgent
+uploads sent unflagged, as every request was scheduled before priorities
+(first come, first served), then flagged with X-Priority: urgent, so the
+isolation the scheduler gives them is visible side by side.
+
+Start the API with admission control and without the result cache (which
+would answer repeated images without queueing), e.g.
+
+    RHYTHMIQ_CACHE_MAX_ENTRIES=0 RHYTHMIQ_MAX_CONCURRENT_REQUESTS=2 python 09_python_api/rhythmiq_api.py
+    python 09_python_api/priority_load_test.py --routine-clients 8 --urgent-interval-ms 250 --slo-ms 500
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from process_benchmark import synthetic_images
+
+
+def post_image(url, image_bytes, priority=None, timeout=30.0):
+    """
+    Upload one image to /analyze
+
+    Args:
+        url (str): /analyze URL
+        image_bytes (bytes): Encoded image
+        priority (str): X-Priority header value, or None to send none
+        timeout (float): Socket timeout in seconds
+
+    Returns:
+        tuple: (HTTP status, seconds until the answer, admission queue wait in seconds)
+    """
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="strip.png"\r\n'
+            f'Content-Type: image/png\r\n\r\n').encode() + image_bytes + f'\r\n--{boundary}--\r\n'.encode()
+    headers = {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    if priority:
+        headers['X-Priority'] = priority
+
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, body, headers), timeout=timeout) as response:
+            response.read()
+            status, timing = response.status, response.headers.get('Server-Timing', '')
+    except urllib.error.HTTPError as e:
+        status, timing = e.code, e.headers.get('Server-Timing', '')
+    return status, time.perf_counter() - started, queue_wait(timing)
+
+
+def queue_wait(server_timing):
+    """Admission wait in seconds from a Server-Timing header (0 if it did not queue)"""
+    for entry in server_timing.split(','):
+        name, _, duration = entry.strip().partition(';dur=')
+        if name == 'queue' and duration:
+            return float(duration) / 1000.0
+    return 0.0
+
+
+def run_phase(url, images, routine_clients, urgent_interval, duration, flag_urgent):
+    """
+    Run routine clients back to back and urgent uploads at a fixed interval
+
+    Args:
+        url (str): /analyze URL
+        images (list): Encoded images to cycle through
+        routine_clients (int): Concurrent routine clients, each sending its next upload as soon as one returns
+        urgent_interval (float): Seconds between urgent uploads
+        duration (float): Seconds to run
+        flag_urgent (bool): Send X-Priority: urgent with the urgent uploads
+
+    Returns:
+        dict: class name -> list of (status, latency, queue wait)
+    """
+    results = {'routine': [], 'urgent': []}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def record(name, outcome):
+        with lock:
+            results[name].append(outcome)
+
+    def routine_client(offset):
+        sent = offset
+        while time.perf_counter() < stop_at:
+            record('routine', post_image(url, images[sent % len(images)]))
+            sent += routine_clients
+
+    def urgent_upload(index):
+        record('urgent', post_image(url, images[index % len(images)], 'urgent' if flag_urgent else None))
+
+    threads = [threading.Thread(target=routine_client, args=(offset,)) for offset in range(routine_clients)]
+    for thread in threads:
+        thread.start()
+
+    # Urgent uploads arrive on their own schedule, whatever the routine load is doing
+    index = 0
+    next_at = time.perf_counter() + urgent_interval
+    while next_at < stop_at:
+        time.sleep(max(0.0, next_at - time.perf_counter()))
+        threads.append(threading.Thread(target=urgent_upload, args=(index,)))
+        threads[-1].start()
+        index += 1
+        next_at += urgent_interval
+
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarize(outcomes):
+    """Answered/rejected counts and latency and queue-wait percentiles in milliseconds"""
+    answered = [(latency, wait) for status, latency, wait in outcomes if status == 200]
+    latencies = np.array([latency for latency, _ in answered]) * 1000.0
+    waits = np.array([wait for _, wait in answered]) * 1000.0
+    percentile = lambda values, q: float(np.percentile(values, q)) if len(values) else float('nan')
+    return {
+        'answered': len(answered),
+        'rejected': sum(1 for status, _, _ in outcomes if status == 429),
+        'failed': sum(1 for status, _, _ in outcomes if status not in (200, 429)),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'p95_queue_ms': percentile(waits, 95)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Urgent-upload latency under a routine flood, without and with priorities')
+    parser.add_argument('--url', default='http://localhost:8083', help='API base URL')
+    parser.add_argument('--routine-clients', type=int, default=8, help='Closed-loop routine clients')
+    parser.add_argument('--urgent-interval-ms', type=float, default=250, help='Time between urgent uploads')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per phase')
+    parser.add_argument('--images', type=int, default=32, help='Distinct synthetic images')
+    parser.add_argument('--slo-ms', type=float, default=None, help='Urgent p95 latency target for the priority phase')
+    args = parser.parse_args()
+
+    url = args.url.rstrip('/') + '/analyze'
+    images = synthetic_images(args.images)
+    # One untimed upload so the model is warm before anything is measured
+    post_image(url, images[0])
+
+    print(f"🚦 {args.routine_clients} routine clients, one urgent upload every {args.urgent_interval_ms:g} ms, "
+          f"{args.duration:g} s per phase")
+    print(f"{'phase':>9} {'class':>8} {'ok':>6} {'429':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p95 queue':>10}")
+    urgent_p95 = None
+    for phase, flag_urgent in (('fifo', False), ('priority', True)):
+        results = run_phase(url, images, args.routine_clients, args.urgent_interval_ms / 1000.0, args.duration,
+                            flag_urgent)
+        for name in ('urgent', 'routine'):
+            summary = summarize(results[name])
+            print(f"{phase:>9} {name:>8} {summary['answered']:>6} {summary['rejected']:>5} {summary['p50_ms']:>8.1f} "
+                  f"{summary['p95_ms']:>8.1f} {summary['p99_ms']:>8.1f} {summary['p95_queue_ms']:>10.1f}")
+            if summary['failed']:
+                print(f"⚠️ {summary['failed']} {name} uploads failed in the {phase} phase")
+        urgent_p95 = summarize(results['urgent'])['p95_ms']
+
+    if args.slo_ms is not None:
+        met = urgent_p95 <= args.slo_ms
+        print(f"{'✅' if met else '❌'} Urgent p95 {urgent_p95:.1f} ms against a {args.slo_ms:g} ms target")
+        return 0 if met else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+🫀 RhythmIQ Threads vs Processes Benchmark
+=========================================
+Classifies the same encoded ECG images with P request threads sharing one
+interpreter, and with P threads feeding P inference worker processes
+(ProcessInferenceExecutor), for P = 1 .. cores. Throughput that stops
+growing with threads but keeps growing with processes is the GIL. Both
+sides run with the thread budget the workers use (one forest, OpenCV and
+BLAS thread per request), so only the GIL differs between them.
+
+    python 09_python_api/process_benchmark.py --model 05_trained_models/rythmguard_model.joblib
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+from inference_session import InferenceSession
+from process_executor import ProcessInferenceExecutor
+from thread_budget import apply_thread_budget
+
+
+def synthetic_images(count, size=(1600, 1200), seed=0):
+    """
+    Encode synthetic ECG-sized images as PNG
+
+    Args:
+        count (int): Number of distinct images
+        size (tuple): (width, height) of each image
+        seed (int): Random seed
+
+    Returns:
+        list: Encoded image bytes
+    """
+    rng = np.random.default_rng(seed)
+    images = []
+    for _ in range(count):
+        pixels = np.full((size[1], size[0], 3), 255, dtype=np.uint8)
+        # A noisy trace on a white background compresses like a real scan
+        for row in range(0, size[1], size[1] // 6):
+            trace = row + (rng.standard_normal(size[0]).cumsum() % 40).astype(int)
+            pixels[np.clip(trace, 0, size[1] - 1), np.arange(size[0])] = 0
+        images.append(cv2.imencode('.png', pixels)[1].tobytes())
+    return images
+
+
+def run_threads(session, images, parallelism, reduced_decode):
+    """Classify every image with `parallelism` threads in this process"""
+    def classify(image_bytes):
+        image = session.preprocessor.load_and_preprocess_bytes(image_bytes, reduced_decode=reduced_decode)
+        return session.predict_proba(image.reshape(1, -1))[0]
+
+    with ThreadPoolExecutor(parallelism) as pool:
+        list(pool.map(classify, images))
+
+
+def run_processes(executor, images, parallelism, reduced_decode):
+    """Classify every image with `parallelism` threads feeding the worker processes"""
+    with ThreadPoolExecutor(parallelism) as pool:
+        list(pool.map(lambda image_bytes: executor.predict_bytes(image_bytes, reduced_decode), images))
+
+
+def throughput(run, images, repeats):
+    """Best images per second over a number of runs"""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run(images)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return len(images) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare thread and process inference scaling')
+    parser.add_argument('--model', required=True, help='Model bundle (.joblib or .mmap directory)')
+    parser.add_argument('--images', type=int, default=64, help='Images per run')
+    parser.add_argument('--max-parallelism', type=int, default=os.cpu_count() or 1,
+                        help='Largest thread / process count tried')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per setting (best is kept)')
+    parser.add_argument('--full-decode', action='store_true', help='Disable reduced-resolution decoding')
+    args = parser.parse_args()
+
+    # Same budget as _init_worker, so the threads do not get the pickled n_jobs=-1 the processes lack
+    apply_thread_budget(1)
+    session = InferenceSession.from_bundle(args.model, threads=1)
+    images = synthetic_images(args.images)
+    reduced_decode = not args.full_decode
+    slot_bytes = max(len(image_bytes) for image_bytes in images)
+    print(f"🫀 {len(images)} images of ~{slot_bytes / 1024:.0f} KB, model {session.model_version}, "
+          f"{os.cpu_count()} CPUs")
+
+    baseline = None
+    print(f"{'P':>3} {'threads img/s':>14} {'processes img/s':>16} {'speedup':>8}")
+    for parallelism in range(1, args.max_parallelism + 1):
+        thread_rate = throughput(lambda batch: run_threads(session, batch, parallelism, reduced_decode),
+                                 images, args.repeats)
+
+        executor = ProcessInferenceExecutor(session.model_path, session.model_version, session.target_size,
+                                            workers=parallelism, slot_bytes=slot_bytes)
+        try:
+            executor.warm_up()
+            process_rate = throughput(lambda batch: run_processes(executor, batch, parallelism, reduced_decode),
+                                      images, args.repeats)
+        finally:
+            executor.shutdown()
+
+        baseline = baseline or thread_rate
+        print(f"{parallelism:>3} {thread_rate:>14.1f} {process_rate:>16.1f} {process_rate / baseline:>7.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
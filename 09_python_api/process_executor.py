@@ -0,0 +1,387 @@
+"""
+🫀 RhythmIQ Process Inference Executor
+=====================================
+Runs preprocessing and prediction in a pool of worker processes so decode,
+color conversion, resize and the Python glue around them no longer share one
+GIL with the request threads. Every worker loads the model once (a .mmap
+bundle is shared between them through the page cache).
+
+Payloads never go through pickle: the request thread copies the encoded
+image into a free slot of a shared-memory input block, the worker decodes it
+from there and writes the class probabilities (and, when asked, the
+preprocessed features) into the matching slot of a shared-memory output
+block. Only the slot number, a few sizes and the stage timings are pickled.
+"""
+
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '02_preprocessing'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+
+class ProcessInferenceResult:
+    """Outcome of one image classified in a worker process"""
+
+    __slots__ = ('probabilities', 'features', 'decode_scale', 'timings', 'trees_used')
+
+    def __init__(self, probabilities, features, decode_scale, timings, trees_used=None):
+        self.probabilities = probabilities
+        self.features = features
+        self.decode_scale = decode_scale
+        self.timings = timings
+        # Set when only part of the forest voted to meet a deadline
+        self.trees_used = trees_used
+
+
+# Worker process state, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(model_path, target_size, block_names, slot_bytes, max_classes):
+    """
+    Process pool initializer: load the model and attach the shared blocks
+
+    Workers share the parent's resource tracker, so attaching registers
+    nothing new and the parent alone unlinks the blocks.
+    """
+    from inference_session import InferenceSession
+    from thread_budget import apply_thread_budget
+
+    # Parallelism comes from the processes; one forest, OpenCV and BLAS thread each
+    apply_thread_budget(1)
+    _worker['session'] = InferenceSession.from_bundle(model_path, target_size=target_size, threads=1)
+    _worker['blocks'] = [shared_memory.SharedMemory(name=name) for name in block_names]
+    _worker['slot_bytes'] = slot_bytes
+    _worker['max_classes'] = max_classes
+
+
+def _worker_version_task(_):
+    """Worker task: report the model version this worker loaded"""
+    return _worker['session'].model_version
+
+
+def _process_slot(slot, nbytes, reduced_decode, want_features, budget=None):
+    """
+    Worker task: classify the encoded image held in an input slot
+
+    Args:
+        slot (int): Slot index
+        nbytes (int): Length of the encoded image in the slot
+        reduced_decode (bool): Decode large images at reduced resolution
+        want_features (bool): Also write the preprocessed features to the output slot
+        budget (tuple): (time.time() by which the model stage must end, seconds per tree
+            or None) when the request has a deadline
+
+    Returns:
+        tuple: (success, n_classes, decode scale, stage timings, model version, trees used or None)
+
+    Raises:
+        DeadlineExceeded: If the deadline passed before the model stage
+    """
+    from request_deadline import DeadlineExceeded, forest_size, partial_forest_proba
+
+    session = _worker['session']
+    inputs, probability_block, feature_block = _worker['blocks']
+    encoded = np.ndarray((nbytes,), dtype=np.uint8, buffer=inputs.buf, offset=slot * _worker['slot_bytes'])
+    timings = {}
+    decode_info = {}
+    image = session.preprocessor.load_and_preprocess_bytes(
+        encoded, timings=timings, reduced_decode=reduced_decode, decode_info=decode_info)
+    if image is None:
+        return False, 0, decode_info.get('decode_scale', 1), timings, session.model_version, None
+
+    # Wall-clock time, as monotonic clocks are not guaranteed to agree between processes
+    trees = None
+    if budget is not None:
+        expires_at, per_tree = budget
+        seconds = expires_at - time.time()
+        if seconds <= 0:
+            raise DeadlineExceeded('model')
+        n_trees = forest_size(session.model)
+        if n_trees is not None and per_tree and seconds < n_trees * per_tree:
+            trees = max(1, min(n_trees - 1, int(seconds / per_tree)))
+
+    started = time.perf_counter()
+    if trees is None:
+        probabilities = session.predict_proba(image.reshape(1, -1))[0]
+    else:
+        probabilities = partial_forest_proba(session.model, image.reshape(1, -1), trees)[0]
+    timings['model'] = time.perf_counter() - started
+
+    if len(probabilities) > _worker['max_classes']:
+        raise ValueError(f"Model has {len(probabilities)} classes, output slots hold {_worker['max_classes']}")
+    np.ndarray((len(probabilities),), dtype=np.float64, buffer=probability_block.buf,
+               offset=slot * _worker['max_classes'] * 8)[:] = probabilities
+    if want_features:
+        np.ndarray((image.size,), dtype=np.float32, buffer=feature_block.buf,
+                   offset=slot * image.size * 4)[:] = image.reshape(-1)
+    return True, len(probabilities), decode_info.get('decode_scale', 1), timings, session.model_version, trees
+
+
+class ProcessInferenceExecutor:
+    """
+    Pool of inference worker processes fed through shared-memory slots
+    """
+
+    def __init__(self, model_path, model_version, target_size, workers=2, slot_bytes=2 * 1024 * 1024,
+                 slots=None, max_classes=64, slot_timeout=10.0, mp_context='spawn'):
+        """
+        Initialize the executor (processes start on first use, or with start())
+
+        Args:
+            model_path (str): Bundle every worker loads
+            model_version (str): Version the parent is serving; answers from a
+                worker that loaded a different version are refused
+            target_size (tuple): Model input size (width, height) as in InferenceSession
+            workers (int): Worker processes
+            slot_bytes (int): Largest encoded image passed through shared memory
+            slots (int): Requests that can be in the pool at once (default workers * 2)
+            max_classes (int): Room for class probabilities per output slot
+            slot_timeout (float): Longest wait for a free slot when a request has no timeout of its own
+            mp_context (str): multiprocessing start method
+        """
+        self.model_path = model_path
+        self.model_version = model_version
+        self.target_size = tuple(target_size)
+        self.workers = workers
+        self.slot_bytes = slot_bytes
+        self.slots = slots or workers * 2
+        self.max_classes = max_classes
+        self.slot_timeout = slot_timeout
+        self.feature_count = self.target_size[0] * self.target_size[1] * 3
+        self.mp_context = mp_context
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._blocks = None
+        self._free = None
+        self._users = 0
+        self._retired = False
+        self._broken = None
+
+        # Counters for monitoring
+        self._completed = 0
+        self._failed = 0
+        self._slot_wait_seconds = 0.0
+
+    @property
+    def broken(self):
+        """Why the pool became unusable (a worker died or loaded another version), or None"""
+        return self._broken
+
+    def _note_broken(self, error):
+        """Remember that the pool is unusable when a worker process died"""
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._broken = str(error) or "An inference worker process died"
+
+    def fits(self, image_bytes):
+        """Whether an encoded image fits in a shared-memory slot"""
+        return len(image_bytes) <= self.slot_bytes
+
+    def start(self):
+        """Create the shared blocks and the pool in this process (no-op if already running)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Encoded inputs, float64 probabilities and float32 features, one slot each per request
+            self._blocks = [shared_memory.SharedMemory(create=True, size=self.slots * size) for size in
+                            (self.slot_bytes, self.max_classes * 8, self.feature_count * 4)]
+            self._free = queue.Queue()
+            for slot in range(self.slots):
+                self._free.put(slot)
+            self._pool = ProcessPoolExecutor(
+                self.workers, multiprocessing.get_context(self.mp_context), initializer=_init_worker,
+                initargs=(self.model_path, self.target_size, [block.name for block in self._blocks],
+                          self.slot_bytes, self.max_classes))
+            self._pid = os.getpid()
+
+    def warm_up(self):
+        """
+        Start the workers and wait until they have loaded the model
+
+        Returns:
+            float: Seconds taken
+
+        Raises:
+            RuntimeError: If a worker loaded a different model version
+            BrokenProcessPool: If a worker died, e.g. while loading the model
+        """
+        self.start()
+        started = time.perf_counter()
+        try:
+            versions = set(self._pool.map(_worker_version_task, range(self.workers)))
+        except BrokenProcessPool as e:
+            self._note_broken(e)
+            raise
+        if versions != {self.model_version}:
+            with self._lock:
+                self._broken = f"Workers loaded model {sorted(versions)}, expected {self.model_version}"
+            raise RuntimeError(self._broken)
+        return time.perf_counter() - started
+
+    def predict_bytes(self, image_bytes, reduced_decode=True, want_features=False, timeout=None, budget=None):
+        """
+        Preprocess and classify one encoded image in a worker process
+
+        Args:
+            image_bytes (bytes): Encoded image (at most slot_bytes)
+            reduced_decode (bool): Decode large images at reduced resolution
+            want_features (bool): Also return the preprocessed features
+            timeout (float): Longest wait for a slot and the worker's answer (default:
+                slot_timeout for the slot, no limit for the answer)
+            budget (tuple): Deadline for the worker's model stage, see _process_slot;
+                the worker runs part of the forest when the whole one does not fit
+
+        Returns:
+            ProcessInferenceResult: None in probabilities if the image could not be decoded
+
+        Raises:
+            ValueError: If the image does not fit in a slot
+            RuntimeError: If the executor is retired or broken, or the worker serves a different model version
+            concurrent.futures.TimeoutError: If no slot was free in time or there was no answer within timeout
+            DeadlineExceeded: If the worker found the deadline passed before the model stage
+        """
+        if not self.fits(image_bytes):
+            raise ValueError(f"Image of {len(image_bytes)} bytes does not fit a {self.slot_bytes} byte slot")
+        with self._lock:
+            if self._retired:
+                raise RuntimeError("Executor has been retired")
+            if self._broken:
+                raise RuntimeError(self._broken)
+            self._users += 1
+        try:
+            self.start()
+            started = time.perf_counter()
+            slot_timeout = self.slot_timeout if timeout is None else timeout
+            try:
+                slot = self._free.get(timeout=slot_timeout)
+            except queue.Empty:
+                raise FutureTimeoutError(f"No inference slot free within {slot_timeout * 1000.0:.0f} ms")
+            waited = time.perf_counter() - started
+            remaining = None if timeout is None else max(0.0, timeout - waited)
+            result = self._run_slot(slot, image_bytes, reduced_decode, want_features, remaining, budget)
+        finally:
+            self._leave()
+
+        with self._lock:
+            if result.probabilities is None:
+                self._failed += 1
+            else:
+                self._completed += 1
+            self._slot_wait_seconds += waited
+        return result
+
+    def _run_slot(self, slot, image_bytes, reduced_decode, want_features, timeout=None, budget=None):
+        """
+        Copy an image into its input slot, classify it in a worker and read the outputs back
+
+        The slot is freed once the worker is done with it, which may be after
+        this call gave up waiting.
+        """
+        inputs, probability_block, feature_block = self._blocks
+        start = slot * self.slot_bytes
+        inputs.buf[start:start + len(image_bytes)] = image_bytes
+        try:
+            future = self._pool.submit(_process_slot, slot, len(image_bytes), reduced_decode, want_features, budget)
+        except BaseException as e:
+            self._free.put(slot)
+            self._note_broken(e)
+            raise
+        try:
+            success, n_classes, decode_scale, timings, version, trees_used = future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            future.add_done_callback(lambda _: self._free.put(slot))
+            raise
+        except BaseException as e:
+            self._free.put(slot)
+            self._note_broken(e)
+            raise
+
+        try:
+            return self._read_slot(slot, success, n_classes, decode_scale, timings, version, trees_used,
+                                   want_features)
+        finally:
+            self._free.put(slot)
+
+    def _read_slot(self, slot, success, n_classes, decode_scale, timings, version, trees_used, want_features):
+        """Build the result of a finished worker task from its output slots"""
+        probability_block, feature_block = self._blocks[1:]
+        if version != self.model_version:
+            raise RuntimeError(f"Worker loaded model {version}, expected {self.model_version}")
+        if not success:
+            return ProcessInferenceResult(None, None, decode_scale, timings)
+
+        probabilities = np.ndarray((n_classes,), dtype=np.float64, buffer=probability_block.buf,
+                                   offset=slot * self.max_classes * 8).copy()
+        features = None
+        if want_features:
+            features = np.ndarray((self.feature_count,), dtype=np.float32, buffer=feature_block.buf,
+                                  offset=slot * self.feature_count * 4).copy()
+        return ProcessInferenceResult(probabilities, features, decode_scale, timings, trees_used)
+
+    def _leave(self):
+        """A request is done with the executor; the last one out of a retired executor shuts it down"""
+        with self._lock:
+            self._users -= 1
+            if not (self._retired and self._users == 0):
+                return
+        self.shutdown()
+
+    def retire(self):
+        """Refuse new requests and shut down once the ones in flight have finished"""
+        with self._lock:
+            self._retired = True
+            if self._users:
+                return
+        self.shutdown()
+
+    def shutdown(self, wait=True):
+        """Stop the workers and release the shared memory"""
+        with self._lock:
+            if self._pid != os.getpid() or self._pool is None:
+                return
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            for block in self._blocks:
+                block.close()
+                block.unlink()
+            self._pool = None
+            self._blocks = None
+            self._pid = None
+
+    def stats(self):
+        """
+        Report settings and counters
+
+        Returns:
+            dict: Workers, slots, model version, completed/failed counts and mean slot wait
+        """
+        with self._lock:
+            handled = self._completed + self._failed
+            return {
+                'enabled': True,
+                'workers': self.workers,
+                'slots': self.slots,
+                'slot_mb': self.slot_bytes / 1024 / 1024,
+                'model_version': self.model_version,
+                'running': self._pid == os.getpid() and self._pool is not None,
+                'retired': self._retired,
+                'broken': self._broken,
+                'completed': self._completed,
+                'failed': self._failed,
+                'mean_slot_wait_ms': self._slot_wait_seconds / handled * 1000.0 if handled else 0.0
+            }
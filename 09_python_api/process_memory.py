@@ -0,0 +1,74 @@
+"""
+🫀 RhythmIQ Process Memory Report
+================================
+Reports how much of a process's resident memory is private and how much is
+shared with other processes (e.g. gunicorn workers sharing the model pages
+they inherited copy-on-write from the master).
+"""
+
+import os
+import sys
+
+# smaps_rollup fields reported, in kB
+_SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_clean_mb',
+    'Shared_Dirty': 'shared_dirty_mb',
+    'Private_Clean': 'private_clean_mb',
+    'Private_Dirty': 'private_dirty_mb'
+}
+
+
+def memory_usage(pid='self'):
+    """
+    Report resident, proportional, shared and private memory of a process
+
+    On Linux this reads /proc/<pid>/smaps_rollup. Elsewhere only the peak
+    RSS from getrusage is available.
+
+    Args:
+        pid (int or str): Process id, or 'self'
+
+    Returns:
+        dict: Memory figures in MB
+    """
+    report = {'pid': os.getpid() if pid == 'self' else pid}
+
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                key = parts[0].rstrip(':')
+                if key in _SMAPS_FIELDS:
+                    report[_SMAPS_FIELDS[key]] = int(parts[1]) / 1024.0
+    except OSError:
+        try:
+            import resource
+        except ImportError:
+            return report
+        # ru_maxrss is in kB on Linux and bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report['max_rss_mb'] = max_rss / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0)
+        return report
+
+    report['shared_mb'] = report.get('shared_clean_mb', 0.0) + report.get('shared_dirty_mb', 0.0)
+    report['private_mb'] = report.get('private_clean_mb', 0.0) + report.get('private_dirty_mb', 0.0)
+    return report
+
+
+def format_memory(report):
+    """
+    Format a memory report as a one-line summary
+
+    Args:
+        report (dict): Output of memory_usage
+
+    Returns:
+        str: Human readable summary
+    """
+    if 'rss_mb' not in report:
+        return f"pid {report['pid']}: peak RSS {report.get('max_rss_mb', 0.0):.1f} MB"
+    return (f"pid {report['pid']}: RSS {report['rss_mb']:.1f} MB "
+            f"(shared {report['shared_mb']:.1f} MB, private {report['private_mb']:.1f} MB, "
+            f"PSS {report['pss_mb']:.1f} MB)")
@@ -0,0 +1,116 @@
+"""
+🫀 RhythmIQ Raw Tensor Input
+===========================
+Parsing and encoding for /analyze_raw, which takes images that capture
+devices have already resized to the model input, as a raw little-endian
+buffer, and skips image encode/decode and resize entirely.
+"""
+
+import numpy as np
+
+# Accepted element types: uint8 pixels (0-255) or float32 already scaled to [0, 1]
+TENSOR_DTYPES = {
+    'uint8': np.dtype('u1'),
+    'float32': np.dtype('<f4')
+}
+
+BINARY_MIMETYPE = 'application/octet-stream'
+
+
+def parse_shape(header):
+    """
+    Parse a shape header such as "224,224,3" or "4x224x224x3"
+
+    Args:
+        header (str): Comma- or x-separated dimensions
+
+    Returns:
+        tuple: Dimensions
+
+    Raises:
+        ValueError: If the header is missing or malformed
+    """
+    if not header:
+        raise ValueError("Missing X-Tensor-Shape header (e.g. 224,224,3)")
+    try:
+        shape = tuple(int(dim) for dim in header.replace('x', ',').split(','))
+    except ValueError:
+        raise ValueError(f"Malformed X-Tensor-Shape header: {header!r}")
+    if not shape or any(dim <= 0 for dim in shape):
+        raise ValueError(f"Malformed X-Tensor-Shape header: {header!r}")
+    return shape
+
+
+def parse_tensor(data, shape_header, dtype_name, image_shape, max_images):
+    """
+    Validate a raw buffer and view it as a batch of images
+
+    Args:
+        data (bytes): Request body
+        shape_header (str): X-Tensor-Shape, either (H, W, 3) or (N, H, W, 3)
+        dtype_name (str): 'uint8' or 'float32'
+        image_shape (tuple): (H, W, 3) the model expects
+        max_images (int): Largest batch accepted
+
+    Returns:
+        numpy.ndarray: Read-only view of shape (N, H*W*3) over the buffer
+
+    Raises:
+        ValueError: If dtype, shape or buffer length do not match
+    """
+    dtype = TENSOR_DTYPES.get((dtype_name or 'uint8').lower())
+    if dtype is None:
+        raise ValueError(f"Unsupported X-Tensor-Dtype {dtype_name!r} (use {', '.join(TENSOR_DTYPES)})")
+
+    shape = parse_shape(shape_header)
+    if len(shape) == len(image_shape):
+        shape = (1,) + shape
+    if len(shape) != len(image_shape) + 1 or shape[1:] != tuple(image_shape):
+        expected = ','.join(str(dim) for dim in image_shape)
+        raise ValueError(f"Tensor shape {shape[1:] if len(shape) > 1 else shape} does not match the "
+                         f"model input ({expected}, RGB)")
+    if shape[0] > max_images:
+        raise ValueError(f"Too many images: {shape[0]} (maximum {max_images})")
+
+    expected_bytes = int(np.prod(shape)) * dtype.itemsize
+    if len(data) != expected_bytes:
+        raise ValueError(f"Body is {len(data)} bytes, shape {shape} of {dtype.name} needs {expected_bytes}")
+
+    tensor = np.frombuffer(data, dtype=dtype).reshape(shape[0], -1)
+    if dtype.kind == 'f' and not np.isfinite(tensor).all():
+        raise ValueError("Tensor contains NaN or infinite values")
+    return tensor
+
+
+def to_features(tensor, out):
+    """
+    Scale a parsed tensor into a float32 feature matrix
+
+    uint8 pixels are divided by 255 exactly as ECGPreprocessor does, so the
+    model sees the same values as for an uploaded image.
+
+    Args:
+        tensor (numpy.ndarray): Output of parse_tensor
+        out (numpy.ndarray): float32 matrix of the same shape to fill
+
+    Returns:
+        numpy.ndarray: out
+    """
+    if tensor.dtype == np.uint8:
+        np.divide(tensor, np.float32(255.0), out=out)
+    else:
+        out[...] = tensor
+    return out
+
+
+def encode_probabilities(probabilities):
+    """
+    Compact binary answer: the probability matrix as little-endian float32
+
+    Args:
+        probabilities (numpy.ndarray): Shape (N, n_classes)
+
+    Returns:
+        bytes: N * n_classes * 4 bytes, row-major
+    """
+    return np.ascontiguousarray(probabilities, dtype='<f4').tobytes()
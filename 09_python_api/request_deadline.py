@@ -0,0 +1,236 @@
+"""
+🫀 RhythmIQ Request Deadlines
+============================
+A caller can give a request a time budget (`X-Deadline-Ms`, counted from
+when the API starts handling it). The budget is checked between stages:
+work that can no longer finish in time is dropped, and when there is time
+for preprocessing but not for the whole forest, the answer comes from as
+many trees as fit in what is left and is marked as degraded.
+
+Trees of a random forest are fitted independently on bootstrap samples,
+so the first k of them are a smaller forest of the same kind; its vote is
+noisier, but still a valid answer.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from forest_partition import partial_probability_sum
+
+DEADLINE_HEADER = 'X-Deadline-Ms'
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline has passed before a stage could start"""
+
+    def __init__(self, stage):
+        """
+        Initialize the exception
+
+        Args:
+            stage (str): Stage that was not started ('queue', 'decode', 'model', ...)
+        """
+        super().__init__(f"Deadline exceeded before {stage}")
+        self.stage = stage
+
+    def __reduce__(self):
+        """Keep the stage when raised in a worker process and pickled back"""
+        return DeadlineExceeded, (self.stage,)
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered
+    """
+
+    def __init__(self, budget_seconds, started=None):
+        """
+        Initialize the deadline
+
+        Args:
+            budget_seconds (float): Time allowed for the request
+            started (float): perf_counter() when the request started (default: now)
+        """
+        self.budget_seconds = budget_seconds
+        self.started = started if started is not None else time.perf_counter()
+        self.expires_at = self.started + budget_seconds
+
+    @classmethod
+    def from_header(cls, value, started=None, default_ms=0):
+        """
+        Build a deadline from an X-Deadline-Ms header value
+
+        Args:
+            value (str): Milliseconds allowed, or None when the header is absent
+            started (float): perf_counter() when the request started
+            default_ms (float): Budget used without a header (0 = no deadline)
+
+        Returns:
+            Deadline: None if the request has no deadline
+
+        Raises:
+            ValueError: If the header is not a positive number
+        """
+        if value is None or value.strip() == '':
+            return cls(default_ms / 1000.0, started) if default_ms > 0 else None
+        try:
+            budget_ms = float(value)
+        except ValueError:
+            raise ValueError(f"Malformed {DEADLINE_HEADER} header: {value!r}")
+        if not budget_ms > 0 or budget_ms == float('inf'):
+            raise ValueError(f"{DEADLINE_HEADER} must be a positive number of milliseconds")
+        return cls(budget_ms / 1000.0, started)
+
+    def remaining(self):
+        """Seconds left (negative once the deadline has passed)"""
+        return self.expires_at - time.perf_counter()
+
+    def expired(self):
+        """Whether the deadline has passed"""
+        return self.remaining() <= 0
+
+    def check(self, stage):
+        """
+        Refuse to start a stage once the deadline has passed
+
+        Args:
+            stage (str): Stage about to start
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+
+class ForestCostEstimator:
+    """
+    Moving average of what evaluating one image costs per tree, for each way the forest is run
+
+    The paths differ a lot (forest partitions run trees in parallel, a
+    micro-batch adds its wait, worker processes run single-threaded), so
+    each keeps its own estimate; a partial forest always runs in the
+    request thread and is sized with the 'direct' one.
+    """
+
+    def __init__(self, ewma_alpha=0.2, max_versions=16):
+        """
+        Initialize the estimator
+
+        Args:
+            ewma_alpha (float): Weight of the newest observation
+            max_versions (int): Model versions remembered (oldest are forgotten)
+        """
+        self.ewma_alpha = ewma_alpha
+        self.max_versions = max_versions
+        self._lock = threading.Lock()
+        self._per_tree = {}
+
+    def observe(self, model_version, seconds, trees, path='direct'):
+        """
+        Record one evaluation
+
+        Args:
+            model_version (str): Model that was evaluated
+            seconds (float): Time the model stage took
+            trees (int): Trees evaluated
+            path (str): How they were run ('direct', 'batch', 'partitions', 'process')
+        """
+        per_tree = seconds / trees
+        with self._lock:
+            paths = self._per_tree.pop(model_version, {})
+            self._per_tree[model_version] = paths
+            previous = paths.get(path)
+            paths[path] = per_tree if previous is None else previous + self.ewma_alpha * (per_tree - previous)
+            while len(self._per_tree) > self.max_versions:
+                self._per_tree.pop(next(iter(self._per_tree)))
+
+    def seconds_per_tree(self, model_version, path='direct'):
+        """
+        Estimated cost of one tree
+
+        Args:
+            model_version (str): Model version
+            path (str): How the trees are run
+
+        Returns:
+            float: Seconds, or None before the first observation
+        """
+        with self._lock:
+            return self._per_tree.get(model_version, {}).get(path)
+
+    def trees_within(self, model_version, seconds, n_trees, path='direct'):
+        """
+        How many trees fit in a time budget
+
+        Args:
+            model_version (str): Model version
+            seconds (float): Time available for the model stage
+            n_trees (int): Trees in the forest
+            path (str): How the trees would be run
+
+        Returns:
+            int: Between 1 and n_trees (n_trees while the cost is still unknown)
+        """
+        per_tree = self.seconds_per_tree(model_version, path)
+        if per_tree is None or per_tree <= 0:
+            return n_trees
+        return max(1, min(n_trees, int(seconds / per_tree)))
+
+    def partial_trees(self, model_version, seconds, n_trees):
+        """
+        How many trees of a partial forest run in the request thread fit in a time budget
+
+        Uses the 'direct' estimate, or the slowest path measured so far when
+        the forest has not been run directly yet, and a single tree when
+        nothing has been measured.
+
+        Args:
+            model_version (str): Model version
+            seconds (float): Time available for the model stage
+            n_trees (int): Trees in the forest
+
+        Returns:
+            int: Between 1 and n_trees
+        """
+        with self._lock:
+            paths = self._per_tree.get(model_version, {})
+            per_tree = paths.get('direct') or max(paths.values(), default=None)
+        if not per_tree or per_tree <= 0:
+            return 1
+        return max(1, min(n_trees, int(seconds / per_tree)))
+
+
+def forest_size(model):
+    """
+    Number of trees in a forest model
+
+    Args:
+        model: Fitted classifier
+
+    Returns:
+        int: Trees, or None if the model is not a forest that can be evaluated in part
+    """
+    if hasattr(model, 'roots'):
+        return len(model.roots)
+    if hasattr(model, 'estimators_'):
+        return len(model.estimators_)
+    return None
+
+
+def partial_forest_proba(model, features, trees):
+    """
+    Class probabilities from the first trees of a forest
+
+    Args:
+        model: Forest (sklearn estimators_ or MappedForestClassifier)
+        features (numpy.ndarray): float32 matrix, shape (n_samples, n_features)
+        trees (int): Trees to evaluate
+
+    Returns:
+        numpy.ndarray: Class probabilities, shape (n_samples, n_classes)
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    return partial_probability_sum(model, slice(0, trees), features) / trees
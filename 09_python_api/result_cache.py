@@ -0,0 +1,155 @@
+"""
+🫀 RhythmIQ Result Cache
+=======================
+LRU cache of analysis results keyed by the SHA-256 of the uploaded bytes and
+the serving model's version, with TTL expiry and single-flight
+deduplication: concurrent identical requests wait for one computation
+instead of each running it.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class ResultCache:
+    """
+    Size- and TTL-bounded LRU cache with single-flight computation
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600):
+        """
+        Initialize the result cache
+
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted
+            ttl_seconds (float): Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def key_for(data, model_version):
+        """
+        Build the cache key for an upload
+
+        Args:
+            data (bytes): Uploaded image bytes
+            model_version (str): Version of the model producing the result
+
+        Returns:
+            str: Cache key
+        """
+        return f'{model_version}:{hashlib.sha256(data).hexdigest()}'
+
+    def get_or_compute(self, key, compute, cacheable=None, lead=True, wait_timeout=None):
+        """
+        Return the cached result for a key, computing it at most once
+
+        Args:
+            key (str): Cache key from key_for
+            compute (callable): Produces the result; None results are not cached
+            cacheable (callable): Decides whether a computed result may be stored
+                (requests already waiting for it still receive it)
+            lead (bool): Whether others may wait for this computation; a call whose
+                outcome depends on more than the key (e.g. its deadline) must not lead
+            wait_timeout (float): Longest wait for an identical computation already
+                running; after it the result is computed by this call
+
+        Returns:
+            tuple: (result, status) where status is 'hit', 'miss' or 'coalesced'
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[0], 'hit'
+                del self._entries[key]
+                self._expirations += 1
+
+            running = self._in_flight.get(key)
+            future = None
+            if running is not None:
+                self._coalesced += 1
+            else:
+                self._misses += 1
+                if lead:
+                    future = Future()
+                    self._in_flight[key] = future
+
+        # Identical request already running: wait for its result
+        if running is not None:
+            try:
+                return running.result(wait_timeout), 'coalesced'
+            except FutureTimeoutError:
+                with self._lock:
+                    self._coalesced -= 1
+                    self._misses += 1
+
+        try:
+            result = compute()
+        except BaseException as e:
+            if future is not None:
+                with self._lock:
+                    del self._in_flight[key]
+                future.set_exception(e)
+            raise
+
+        with self._lock:
+            if future is not None:
+                del self._in_flight[key]
+            if result is not None and (cacheable is None or cacheable(result)):
+                self._entries[key] = (result, time.monotonic() + self.ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+
+        if future is not None:
+            future.set_result(result)
+        return result, 'miss'
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Report cache counters
+
+        Returns:
+            dict: Settings, size and hit/miss counters
+        """
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                'enabled': True,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'entries': len(self._entries),
+                'in_flight': len(self._in_flight),
+                'hits': self._hits,
+                'misses': self._misses,
+                'coalesced': self._coalesced,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'hit_ratio': (self._hits + self._coalesced) / lookups if lookups else 0.0
+            }
@@ -7,9 +7,18 @@ Lightweight Flask API serving the trained ECG classification model.
 
 import os
 import sys
-import joblib
+import time
+import hmac
+import shutil
+import threading
+import uuid
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import numpy as np
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, g, stream_with_context, has_request_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from PIL import Image
 import io
 from dotenv import load_dotenv
@@ -24,8 +33,23 @@ sys.path.append(os.path.join(project_root, '02_preprocessing'))
 sys.path.append(os.path.join(project_root, '03_model_training'))
 
 try:
-    from ecg_preprocessor import ECGPreprocessor
-    from severity_predictor import SeverityPredictor
+    from inference_session import InferenceSession
+    from thread_budget import apply_thread_budget, budget_from_env, describe_thread_budget
+    from model_bundle import preferred_bundle_path
+    from micro_batcher import MicroBatcher
+    from result_cache import ResultCache
+    from process_memory import memory_usage
+    from metrics import MetricsRegistry
+    from model_watcher import ModelWatcher
+    from model_registry import ModelRegistry, parse_mapping
+    from shadow_evaluator import ShadowEvaluator
+    from admission_control import DEFAULT_PRIORITY_WEIGHTS, AdmissionController, AdmissionRejected
+    from process_executor import ProcessInferenceExecutor
+    from forest_partition import PartitionedForest
+    from request_deadline import (DEADLINE_HEADER, Deadline, DeadlineExceeded, ForestCostEstimator, forest_size,
+                                  partial_forest_proba)
+    from bulk_jobs import JobInputError, JobRunner, JobStore, extract_archive, resolve_server_paths
+    from raw_tensor import BINARY_MIMETYPE, encode_probabilities, parse_tensor, to_features
 except ImportError as e:
     print(f"❌ Import error: {e}")
     print("Make sure you're running from the project root directory")
@@ -33,78 +57,1369 @@ except ImportError as e:
 
 app = Flask(__name__)
 
+# Upload limits: per image, and for a whole request (bodies declaring more
+# get 413 before they are parsed). Image parts are buffered in memory by
+# UploadLimitedRequest, never spooled to disk, and parsing stops with 413 as
+# soon as one passes the per-image limit; in a batch that image is dropped
+# and reported on its own. Job archives (/jobs) are spooled to a temporary
+# file as usual, bounded by the request limit only.
+MAX_UPLOAD_MB = float(os.environ.get('RHYTHMIQ_MAX_UPLOAD_MB', 10))
+MAX_REQUEST_MB = float(os.environ.get('RHYTHMIQ_MAX_REQUEST_MB', 64))
+app.config['MAX_CONTENT_LENGTH'] = int(MAX_REQUEST_MB * 1024 * 1024)
+# Endpoints whose oversized images are reported per image instead of failing the request
+PER_IMAGE_LIMIT_ENDPOINTS = {'analyze_ecg_batch'}
+ARCHIVE_ENDPOINTS = {'create_job'}
+
+class UploadBuffer(io.BytesIO):
+    """
+    In-memory stream for one multipart file part, capped at the per-image limit
+    """
+    
+    def __init__(self, limit, refuse):
+        """
+        Args:
+            limit (int): Largest part in bytes
+            refuse (bool): Raise RequestEntityTooLarge when the part passes the
+                limit; otherwise drop what was buffered, discard the rest and
+                set oversized
+        """
+        super().__init__()
+        self.limit = limit
+        self.refuse = refuse
+        self.oversized = False
+    
+    def write(self, data):
+        if self.oversized:
+            return len(data)
+        if self.tell() + len(data) > self.limit:
+            UPLOADS_TOO_LARGE.inc()
+            if self.refuse:
+                raise RequestEntityTooLarge(f'Image larger than {MAX_UPLOAD_MB:g} MB')
+            self.oversized = True
+            self.seek(0)
+            self.truncate()
+            return len(data)
+        return super().write(data)
+
+class UploadLimitedRequest(Request):
+    """Request whose uploaded images stay in memory and stop at the per-image limit"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint in ARCHIVE_ENDPOINTS:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return UploadBuffer(int(MAX_UPLOAD_MB * 1024 * 1024), self.endpoint not in PER_IMAGE_LIMIT_ENDPOINTS)
+
+app.request_class = UploadLimitedRequest
+
+# Decode images several times larger than the model input at 1/2, 1/4 or 1/8
+# resolution instead of full size
+REDUCED_DECODE = os.environ.get('RHYTHMIQ_REDUCED_DECODE', 'true').lower() in ('1', 'true', 'yes')
+
+# Maximum number of images accepted by a single /analyze_batch request
+MAX_BATCH_IMAGES = int(os.environ.get('RHYTHMIQ_MAX_BATCH_IMAGES', 64))
+
+# Streamed batches (NDJSON) classify each image as its own task, so results
+# come back as soon as they are ready; this many images are in flight at once
+STREAM_THREADS = int(os.environ.get('RHYTHMIQ_STREAM_THREADS', 4))
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Preprocess and classify single images in this many worker processes instead
+# of the request threads, so decoding scales past the GIL (0 keeps it all in
+# the API process). Images larger than a shared-memory slot stay in-process.
+INFERENCE_PROCESSES = int(os.environ.get('RHYTHMIQ_INFERENCE_PROCESSES', 0))
+PROCESS_SLOT_MB = float(os.environ.get('RHYTHMIQ_PROCESS_SLOT_MB', 2))
+PROCESS_SLOTS = int(os.environ.get('RHYTHMIQ_PROCESS_SLOTS', 0))
+# Requests without a deadline that find every slot taken this long classify in-process
+PROCESS_SLOT_TIMEOUT_SECONDS = float(os.environ.get('RHYTHMIQ_PROCESS_SLOT_TIMEOUT_SECONDS', 10))
+
+# Split the primary forest's trees across this many worker processes so a
+# single image is evaluated on several cores at once (0 disables). Only one
+# image uses the partitions at a time; others take the normal path meanwhile.
+FOREST_PARTITIONS = int(os.environ.get('RHYTHMIQ_FOREST_PARTITIONS', 0))
+
+# Broken inference processes and forest partitions are replaced in the
+# background after this delay, doubled (up to the cap) for every replacement
+# that breaks again before serving an image
+WORKER_RESTART_SECONDS = float(os.environ.get('RHYTHMIQ_WORKER_RESTART_SECONDS', 5))
+WORKER_RESTART_MAX_SECONDS = 300.0
+
+# Per-request time budget (X-Deadline-Ms header, or this default when >0):
+# stages that cannot start in time are dropped (504), and when the whole
+# forest no longer fits /analyze answers from part of it, marked degraded.
+# The margin is kept back for severity and sending the response.
+DEFAULT_DEADLINE_MS = float(os.environ.get('RHYTHMIQ_DEFAULT_DEADLINE_MS', 0))
+DEADLINE_MARGIN_MS = float(os.environ.get('RHYTHMIQ_DEADLINE_MARGIN_MS', 20))
+
+# Micro-batching of concurrent /analyze requests (disabled when max size is 1)
+BATCH_MAX_SIZE = int(os.environ.get('RHYTHMIQ_BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('RHYTHMIQ_BATCH_MAX_WAIT_MS', 5))
+
+# Result cache for repeated uploads (disabled when max entries is 0)
+CACHE_MAX_ENTRIES = int(os.environ.get('RHYTHMIQ_CACHE_MAX_ENTRIES', 1024))
+CACHE_TTL_SECONDS = float(os.environ.get('RHYTHMIQ_CACHE_TTL_SECONDS', 3600))
+
+# Threads one inference may use in this process: the forest's n_jobs (pickled
+# as -1 by training), OpenCV and the BLAS/OpenMP pools are all capped to it
+# (0 keeps the libraries' defaults, -1 allows one per core)
+INFERENCE_THREADS = budget_from_env()
+
+# Synthetic inferences run after loading a model, before it serves traffic
+# (comma-separated batch sizes, empty disables warm-up)
+WARMUP_BATCH_SIZES = [int(size) for size in os.environ.get('RHYTHMIQ_WARMUP_BATCH_SIZES', '1,8').split(',')
+                      if size.strip()]
+
+# Shadow evaluation: registry model run in the background on a sample of
+# requests and compared with the served answer (unset disables it)
+SHADOW_MODEL = os.environ.get('RHYTHMIQ_SHADOW_MODEL')
+SHADOW_SAMPLE_RATE = float(os.environ.get('RHYTHMIQ_SHADOW_SAMPLE_RATE', 0.1))
+SHADOW_QUEUE_SIZE = int(os.environ.get('RHYTHMIQ_SHADOW_QUEUE_SIZE', 256))
+SHADOW_DB_PATH = os.environ.get('RHYTHMIQ_SHADOW_DB',
+                                os.path.join(project_root, 'rythmguard_output', 'shadow_evaluation.sqlite'))
+
+# Bulk jobs: processes classifying queued jobs (opt in; 0 disables /jobs and
+# the dispatcher polling the job database), where job state and extracted
+# archives live, and which server directories jobs may read
+JOB_WORKERS = int(os.environ.get('RHYTHMIQ_JOB_WORKERS', 0))
+JOB_CHUNK_SIZE = int(os.environ.get('RHYTHMIQ_JOB_CHUNK_SIZE', 32))
+JOB_DB_PATH = os.environ.get('RHYTHMIQ_JOB_DB', os.path.join(project_root, 'rythmguard_output', 'jobs.sqlite'))
+JOB_DIR = os.environ.get('RHYTHMIQ_JOB_DIR', os.path.join(project_root, 'rythmguard_output', 'jobs'))
+JOB_INPUT_ROOTS = [root for root in os.environ.get('RHYTHMIQ_JOB_INPUT_ROOTS', '').split(os.pathsep) if root]
+MAX_JOB_IMAGES = int(os.environ.get('RHYTHMIQ_MAX_JOB_IMAGES', 100000))
+MAX_JOB_EXTRACT_MB = float(os.environ.get('RHYTHMIQ_MAX_JOB_EXTRACT_MB', 4096))
+
+# Request tracing: a client-supplied X-Request-ID is kept if it looks sane,
+# otherwise one is generated; one JSON log line is printed per request
+# (health, readiness and metrics scrapes excluded)
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+ACCESS_LOG = os.environ.get('RHYTHMIQ_ACCESS_LOG', 'true').lower() in ('1', 'true', 'yes')
+QUIET_ENDPOINTS = {'health_check', 'readiness_check', 'prometheus_metrics'}
+
+# Hot reload: token for POST /admin/reload (unset disables the endpoint) and
+# how often the served bundle is checked for changes (0 disables the watcher)
+ADMIN_TOKEN = os.environ.get('RHYTHMIQ_ADMIN_TOKEN')
+MODEL_WATCH_SECONDS = float(os.environ.get('RHYTHMIQ_MODEL_WATCH_SECONDS', 0))
+
+# Model registry for A/B comparisons: extra named bundles ("name=path,...")
+# served next to the primary model, and the traffic split ("name=weight,...")
+PRIMARY_MODEL_NAME = os.environ.get('RHYTHMIQ_PRIMARY_MODEL_NAME', 'primary')
+MODEL_PATHS = parse_mapping(os.environ.get('RHYTHMIQ_MODELS', ''))
+MODEL_WEIGHTS = {name: float(weight) for name, weight in
+                 parse_mapping(os.environ.get('RHYTHMIQ_MODEL_WEIGHTS', '')).items()}
+
+# Registry models are loaded on demand and the least recently used ones are
+# evicted once loaded models exceed the budget (0 = keep everything loaded);
+# pinned models are never evicted
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get('RHYTHMIQ_MODEL_MEMORY_BUDGET_MB', 0))
+PINNED_MODELS = [name.strip() for name in os.environ.get('RHYTHMIQ_PINNED_MODELS', '').split(',') if name.strip()]
+
+# Admission control for the inference endpoints: requests running at once,
+# requests allowed to wait for a slot (0 concurrency disables it), and how
+# long they may wait; anything beyond is rejected with 429 and Retry-After
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('RHYTHMIQ_MAX_CONCURRENT_REQUESTS', 8))
+MAX_QUEUED_REQUESTS = int(os.environ.get('RHYTHMIQ_MAX_QUEUED_REQUESTS', 16))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('RHYTHMIQ_QUEUE_TIMEOUT_SECONDS', 5))
+ADMISSION_ENDPOINTS = {'analyze_ecg', 'analyze_ecg_batch', 'analyze_raw'}
+
+# Request priorities (X-Priority header or `priority` query parameter), highest
+# first, with their share of freed slots; the last one is the default. The
+# reserved slots are only ever given to the highest priority.
+PRIORITY_HEADER = 'X-Priority'
+PRIORITY_WEIGHTS = {name.lower(): float(weight) for name, weight in
+                    parse_mapping(os.environ.get('RHYTHMIQ_PRIORITY_WEIGHTS', '')).items()} \
+    or DEFAULT_PRIORITY_WEIGHTS
+RESERVED_PRIORITY_SLOTS = int(os.environ.get('RHYTHMIQ_RESERVED_PRIORITY_SLOTS', 1))
+
 # Global variables
-model = None
-class_names = None
-preprocessor = None
-severity_predictor = None
+session = None
+warmup_report = None
+model_info = {}
+reload_lock = threading.Lock()
+reload_status = {'in_progress': False, 'reloads': 0, 'failures': 0, 'last_error': None}
+batcher = MicroBatcher(BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS) if BATCH_MAX_SIZE > 1 else None
+result_cache = ResultCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS) if CACHE_MAX_ENTRIES > 0 else None
+stream_executor = None
+stream_executor_lock = threading.Lock()
+process_executor = None
+process_executor_lock = threading.Lock()
+partitioned_forest = None
+worker_restarts = {kind: {'broken': None, 'failures': 0} for kind in ('processes', 'partitions')}
+forest_costs = ForestCostEstimator()
+admission = AdmissionController(MAX_CONCURRENT_REQUESTS, MAX_QUEUED_REQUESTS, QUEUE_TIMEOUT_SECONDS,
+                                priority_weights=PRIORITY_WEIGHTS, reserved_slots=RESERVED_PRIORITY_SLOTS) \
+    if MAX_CONCURRENT_REQUESTS > 0 else None
 
-def load_model():
-    """Load the trained ECG model"""
-    global model, class_names, preprocessor, severity_predictor
+# Prometheus metrics served by /metrics
+metrics = MetricsRegistry()
+REQUESTS = metrics.counter('rhythmiq_requests_total', 'HTTP requests by endpoint and outcome',
+                           ('endpoint', 'outcome'))
+REQUEST_LATENCY = metrics.histogram('rhythmiq_request_duration_seconds', 'HTTP request latency',
+                                    ('endpoint',))
+IN_FLIGHT = metrics.gauge('rhythmiq_requests_in_flight', 'HTTP requests currently being served')
+STAGE_LATENCY = metrics.histogram(
+    'rhythmiq_stage_duration_seconds',
+    'Latency of each analysis stage (decode, color, resize, normalize, model, severity)',
+    ('stage',))
+MODEL_LOAD_SECONDS = metrics.gauge('rhythmiq_model_load_duration_seconds',
+                                   'Seconds taken by the last successful model load')
+MODEL_LOADED = metrics.gauge('rhythmiq_model_loaded', '1 when a model is loaded and serving')
+READY = metrics.gauge('rhythmiq_ready', '1 when the loaded model has been warmed up')
+WARMUP_SECONDS = metrics.gauge('rhythmiq_warmup_duration_seconds', 'Seconds taken by the last warm-up')
+PROCESS_MEMORY = metrics.gauge('rhythmiq_process_memory_bytes',
+                               'Memory of this worker process (rss, pss, shared, private)', ('kind',))
+CACHE_EVENTS = metrics.counter('rhythmiq_result_cache_events_total',
+                               'Result cache lookups and evictions by kind', ('event',))
+CACHE_ENTRIES = metrics.gauge('rhythmiq_result_cache_entries', 'Results currently cached')
+MODEL_RELOADS = metrics.counter('rhythmiq_model_reloads_total', 'Hot model reloads by outcome', ('outcome',))
+MODEL_LATENCY = metrics.histogram('rhythmiq_model_request_duration_seconds',
+                                  'Analysis latency by serving model', ('model',))
+MODEL_PREDICTIONS = metrics.counter('rhythmiq_model_predictions_total',
+                                    'Predicted classes by serving model', ('model', 'predicted_class'))
+MODEL_CACHE_EVENTS = metrics.counter('rhythmiq_model_cache_events_total',
+                                     'Registry model loads, load failures and evictions', ('model', 'event'))
+MODEL_RESIDENT_BYTES = metrics.gauge('rhythmiq_model_resident_bytes',
+                                     'Estimated resident size of each loaded model', ('model',))
+SHADOW_EVENTS = metrics.counter('rhythmiq_shadow_events_total',
+                                'Shadow evaluation samples by outcome (sampled, dropped, evaluated, failed)',
+                                ('event',))
+SHADOW_AGREEMENT = metrics.gauge('rhythmiq_shadow_agreement_ratio',
+                                 'Fraction of shadowed requests where the candidate agreed')
+DECODE_SCALES = metrics.counter('rhythmiq_decode_scale_total',
+                                'Decoded images by reduced-resolution decode scale', ('scale',))
+UPLOADS_TOO_LARGE = metrics.counter('rhythmiq_uploads_too_large_total', 'Uploads refused for exceeding the size limit')
+ADMISSION_ACTIVE = metrics.gauge('rhythmiq_admission_active_requests', 'Inference requests holding a slot')
+ADMISSION_QUEUE_DEPTH = metrics.gauge('rhythmiq_admission_queue_depth', 'Inference requests waiting for a slot')
+ADMISSION_PRIORITY_QUEUE_DEPTH = metrics.gauge('rhythmiq_admission_priority_queue_depth',
+                                               'Inference requests waiting for a slot by priority', ('priority',))
+ADMISSION_REJECTIONS = metrics.counter('rhythmiq_admission_rejections_total',
+                                       'Inference requests rejected with 429', ('reason',))
+ADMISSION_WAIT = metrics.histogram('rhythmiq_admission_wait_seconds', 'Time admitted requests waited for a slot',
+                                   ('priority',))
+ADMISSION_SERVICE_EWMA = metrics.gauge('rhythmiq_admission_service_time_seconds',
+                                       'Moving average of the time requests hold a slot')
+DEADLINE_OUTCOMES = metrics.counter('rhythmiq_deadline_outcomes_total',
+                                    'Requests with a deadline by outcome (met, degraded, exceeded)', ('outcome',))
+BATCHES = metrics.counter('rhythmiq_micro_batches_total', 'Forest passes run by the micro-batcher')
+BATCHED_REQUESTS = metrics.counter('rhythmiq_micro_batched_requests_total',
+                                   'Requests evaluated by the micro-batcher')
+
+def record_stage(stage, seconds):
+    """
+    Record one stage duration in the latency histogram and, inside a request,
+    in the request's Server-Timing breakdown
+    
+    Args:
+        stage (str): Stage name
+        seconds (float): Duration
+    """
+    STAGE_LATENCY.observe(seconds, stage=stage)
+    if has_request_context():
+        stage_timings = g.setdefault('stage_timings', {})
+        stage_timings[stage] = stage_timings.get(stage, 0.0) + seconds
+
+def observe_stages(timings):
+    """
+    Record per-stage durations in the stage latency histogram
+    
+    Args:
+        timings (dict): Seconds per stage name
+    """
+    for stage, seconds in timings.items():
+        record_stage(stage, seconds)
+
+def collect_runtime_metrics():
+    """Refresh the gauges mirrored from other components before a scrape"""
+    MODEL_LOADED.set(1 if session is not None else 0)
+    READY.set(1 if is_ready() else 0)
+    
+    memory = memory_usage()
+    for kind in ('rss', 'pss', 'shared', 'private'):
+        value = memory.get(f'{kind}_mb')
+        if value is not None:
+            PROCESS_MEMORY.set(value * 1024 * 1024, kind=kind)
+    
+    if result_cache is not None:
+        cache_stats = result_cache.stats()
+        for event in ('hits', 'misses', 'coalesced', 'evictions', 'expirations'):
+            CACHE_EVENTS.set_total(cache_stats[event], event=event)
+        CACHE_ENTRIES.set(cache_stats['entries'])
+    
+    for name, model_stats in model_registry.stats().items():
+        for event in ('loads', 'load_failures', 'evictions'):
+            if event in model_stats:
+                MODEL_CACHE_EVENTS.set_total(model_stats[event], model=name, event=event)
+        MODEL_RESIDENT_BYTES.set(model_stats['resident_mb'] * 1024 * 1024, model=name)
+    
+    if shadow is not None:
+        shadow_stats = shadow.stats()
+        for event in ('sampled', 'dropped', 'evaluated', 'failed'):
+            SHADOW_EVENTS.set_total(shadow_stats[event], event=event)
+        SHADOW_AGREEMENT.set(shadow_stats['agreement_rate'])
+    
+    if admission is not None:
+        admission_stats = admission.stats()
+        ADMISSION_ACTIVE.set(admission_stats['active'])
+        ADMISSION_QUEUE_DEPTH.set(admission_stats['waiting'])
+        for priority, priority_stats in admission_stats['priorities'].items():
+            ADMISSION_PRIORITY_QUEUE_DEPTH.set(priority_stats['waiting'], priority=priority)
+        if admission_stats['service_time_ewma_ms'] is not None:
+            ADMISSION_SERVICE_EWMA.set(admission_stats['service_time_ewma_ms'] / 1000.0)
+    
+    if batcher is not None:
+        batcher_stats = batcher.stats()
+        BATCHES.set_total(batcher_stats['batches'])
+        BATCHED_REQUESTS.set_total(batcher_stats['requests'])
+
+metrics.add_collector(collect_runtime_metrics)
+
+model_registry = ModelRegistry(PRIMARY_MODEL_NAME, lambda: session, MODEL_WEIGHTS,
+                               loader=lambda model_path: load_session(model_path)[0],
+                               memory_budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024))
+
+shadow = ShadowEvaluator(SHADOW_MODEL, lambda: model_registry.get(SHADOW_MODEL), SHADOW_DB_PATH,
+                         SHADOW_SAMPLE_RATE, SHADOW_QUEUE_SIZE) if SHADOW_MODEL else None
+
+job_runner = JobRunner(JobStore(JOB_DB_PATH), JOB_WORKERS, JOB_CHUNK_SIZE) if JOB_WORKERS > 0 else None
+
+model_watcher = ModelWatcher(MODEL_WATCH_SECONDS, lambda: session, lambda path: reload_model(path)) \
+    if MODEL_WATCH_SECONDS > 0 else None
+
+def resolve_model_path():
+    """
+    Find the trained model bundle
+    
+    Returns:
+        str: Path to the first model bundle that exists (a memory-mappable
+            bundle directory when one at least as new was saved next to the joblib file)
+    """
+    # An explicitly configured model wins
+    configured_path = os.environ.get('RHYTHMIQ_MODEL_PATH')
+    if configured_path:
+        if not os.path.exists(configured_path):
+            raise FileNotFoundError(f"RHYTHMIQ_MODEL_PATH does not exist: {configured_path}")
+        return configured_path
+    
+    # Try multiple possible model locations
+    possible_paths = [
+        os.path.join(project_root, '01_data', 'rythmguard_model.joblib'),
+        os.path.join(project_root, '05_trained_models', 'rythmguard_model.joblib'),
+        os.path.join(project_root, 'data', 'rythmguard_model.joblib')
+    ]
+    
+    for path in possible_paths:
+        # Prefer the memory-mappable layout saved next to the joblib bundle, unless it is stale
+        preferred_path = preferred_bundle_path(path)
+        if preferred_path is not None:
+            return preferred_path
+    
+    raise FileNotFoundError(f"Model not found in any of: {possible_paths}")
+
+def is_ready():
+    """Whether a model is loaded and has finished warming up"""
+    return session is not None and warmup_report is not None
+
+def warm_up_session(active_session):
+    """
+    Run the configured synthetic warm-up inferences on a session
+    
+    Args:
+        active_session (InferenceSession): Freshly loaded session
+        
+    Returns:
+        dict: Warm-up timings from InferenceSession.warm_up
+    """
+    report = active_session.warm_up(WARMUP_BATCH_SIZES)
+    WARMUP_SECONDS.set(report['seconds'])
+    
+    batches = ', '.join(f"{batch['batch_size']}: {batch['seconds']*1000:.1f} ms" for batch in report['batches'])
+    print(f"🔥 Warm-up finished in {report['seconds']:.2f}s ({batches or 'no batches'})")
+    return report
+
+def load_session(model_path):
+    """
+    Load and warm up a model bundle without publishing it
+    
+    Args:
+        model_path (str): Bundle to load
+        
+    Returns:
+        tuple: (InferenceSession, warm-up report, load seconds)
+    """
+    # Preprocessor data path (use 01_data as primary)
+    data_path = os.path.join(project_root, '01_data')
+    if not os.path.exists(data_path):
+        data_path = os.path.join(project_root, 'data')
+    
+    print(f"📁 Loading trained model from: {model_path}")
+    started = time.perf_counter()
+    loaded_session = InferenceSession.from_bundle(model_path, data_path=data_path, target_size=(224, 224),
+                                                  threads=INFERENCE_THREADS)
+    load_seconds = time.perf_counter() - started
     
+    print(f"✅ Model loaded successfully!")
+    print(f"🎯 Classes: {loaded_session.class_names}")
+    
+    return loaded_session, warm_up_session(loaded_session), load_seconds
+
+def publish_session(loaded_session, report, load_seconds):
+    """
+    Make a loaded, warmed-up session the one serving new requests
+    
+    Requests already running keep the session they started with.
+    
+    Args:
+        loaded_session (InferenceSession): Session to serve
+        report (dict): Its warm-up report
+        load_seconds (float): Time taken to load it
+    """
+    global session, warmup_report, model_info
+    
+    model_info = {
+        'model_version': loaded_session.model_version,
+        'model_path': loaded_session.model_path,
+        'load_seconds': load_seconds,
+        'warmup_seconds': report['seconds'],
+        'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+    MODEL_LOAD_SECONDS.set(load_seconds)
+    
+    # Serve only once warm, so /ready flips together with the model
+    session, warmup_report = loaded_session, report
+
+def swap_model(model_path=None):
+    """
+    Load, warm up and publish a model while the current one keeps serving;
+    the caller must hold reload_lock
+    
+    Args:
+        model_path (str): Bundle to load (default: resolve_model_path())
+        
+    Returns:
+        tuple: (success, error message or None)
+    """
+    global process_executor, partitioned_forest
+    
+    reload_status['in_progress'] = True
     try:
-        # Get the project root directory (works both locally and on Render)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(current_dir)
+        previous_version = session.model_version if session is not None else None
+        loaded_session, report, load_seconds = load_session(model_path or resolve_model_path())
         
-        # Try multiple possible model locations
-        possible_paths = [
-            os.path.join(project_root, '01_data', 'rythmguard_model.joblib'),
-            os.path.join(project_root, '05_trained_models', 'rythmguard_model.joblib'),
-            os.path.join(project_root, 'data', 'rythmguard_model.joblib')
-        ]
+        # The new version's worker processes load the model before it serves, not in its first request
+        executor = new_process_executor(loaded_session)
+        if executor is not None:
+            try:
+                seconds = executor.warm_up()
+            except BaseException:
+                executor.shutdown()
+                raise
+            print(f"⚙️ {executor.workers} inference processes ready for {loaded_session.model_version} in {seconds:.2f}s")
+        forest = new_partitioned_forest(loaded_session)
+        if forest is not None:
+            started = time.perf_counter()
+            try:
+                forest.start()
+            except BaseException:
+                forest.shutdown()
+                if executor is not None:
+                    executor.shutdown()
+                raise
+            print(f"🌲 {forest.partitions} forest partitions ready for {loaded_session.model_version} "
+                  f"in {time.perf_counter() - started:.2f}s")
         
-        model_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                model_path = path
-                break
+        with process_executor_lock:
+            publish_session(loaded_session, report, load_seconds)
+            previous_executor, process_executor = process_executor, executor
+            previous_forest, partitioned_forest = partitioned_forest, forest
+        # The old pool finishes the requests it has and then shuts down
+        if previous_executor is not None:
+            previous_executor.retire()
+        if previous_forest is not None:
+            threading.Thread(target=previous_forest.shutdown, daemon=True).start()
         
-        if not model_path:
-            raise FileNotFoundError(f"Model not found in any of: {possible_paths}")
+        reload_status['reloads'] += 1
+        reload_status['last_error'] = None
+        MODEL_RELOADS.inc(outcome='success')
+        print(f"🔄 Now serving model {loaded_session.model_version} (was {previous_version})")
+        return True, None
         
-        print(f"📁 Loading trained model from: {model_path}")
-        model_data = joblib.load(model_path)
+    except Exception as e:
+        reload_status['failures'] += 1
+        reload_status['last_error'] = str(e)
+        MODEL_RELOADS.inc(outcome='failure')
+        print(f"❌ Model reload failed, still serving the previous model: {e}")
+        return False, str(e)
         
-        if isinstance(model_data, dict):
-            model = model_data['model']
-            class_names = model_data['class_names']
-        else:
-            model = model_data
-            class_names = ['F', 'M', 'N', 'Q', 'S', 'V']
+    finally:
+        reload_status['in_progress'] = False
+
+def reload_model(model_path=None):
+    """
+    Hot-reload the model unless a reload is already running
+    
+    Args:
+        model_path (str): Bundle to load (default: resolve_model_path())
         
-        # Initialize preprocessor and severity predictor (use 01_data as primary)
-        data_path = os.path.join(project_root, '01_data')
-        if not os.path.exists(data_path):
-            data_path = os.path.join(project_root, 'data')
-        preprocessor = ECGPreprocessor(data_path, target_size=(224, 224))
-        severity_predictor = SeverityPredictor()
+    Returns:
+        bool: True if the new model is now serving
+    """
+    if not reload_lock.acquire(blocking=False):
+        return False
+    try:
+        return swap_model(model_path)[0]
+    finally:
+        reload_lock.release()
+
+def start_model_watcher():
+    """Start watching the served bundle for changes, if configured"""
+    if model_watcher is not None:
+        model_watcher.start()
+
+def new_process_executor(active_session):
+    """
+    Inference worker processes (not yet started) for a session's bundle
+    
+    Args:
+        active_session (InferenceSession): Session the workers serve
+        
+    Returns:
+        ProcessInferenceExecutor: None when disabled or the session was not loaded from a bundle
+    """
+    if INFERENCE_PROCESSES <= 0 or not active_session.model_path:
+        return None
+    return ProcessInferenceExecutor(
+        active_session.model_path, active_session.model_version, active_session.target_size,
+        workers=INFERENCE_PROCESSES, slot_bytes=int(PROCESS_SLOT_MB * 1024 * 1024),
+        slots=PROCESS_SLOTS or None, slot_timeout=PROCESS_SLOT_TIMEOUT_SECONDS)
+
+def get_process_executor(active_session):
+    """
+    Inference worker processes for the primary model
+    
+    The pool is created in the process that serves requests (after any fork).
+    A reload starts and warms up the new version's pool in swap_model before
+    publishing it; the old one finishes the requests it has and then shuts down.
+    A broken pool is replaced in the background, see restart_workers_later.
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        
+    Returns:
+        ProcessInferenceExecutor: None when disabled, broken, or for any session but the primary one
+    """
+    global process_executor
+    
+    if INFERENCE_PROCESSES <= 0 or active_session is None or active_session is not session \
+            or not active_session.model_path:
+        return None
+    with process_executor_lock:
+        if process_executor is not None and process_executor.model_version != active_session.model_version:
+            process_executor.retire()
+            process_executor = None
+        if process_executor is None:
+            process_executor = new_process_executor(active_session)
+        if process_executor.broken:
+            restart_workers_later('processes', active_session, process_executor,
+                                  process_executor.stats()['completed'], restart_process_executor)
+            return None
+        return process_executor
+
+def restart_process_executor(active_session, broken_executor, delay):
+    """
+    Wait, warm up a fresh pool and publish it in place of the broken one
+    
+    A fresh pool that fails to warm up is published broken too, which
+    schedules the next attempt with a longer delay.
+    
+    Args:
+        active_session (InferenceSession): Session the pool serves
+        broken_executor (ProcessInferenceExecutor): Pool to replace
+        delay (float): Seconds to wait first
+    """
+    global process_executor
+    
+    time.sleep(delay)
+    broken_executor.retire()
+    executor = new_process_executor(active_session)
+    try:
+        seconds = executor.warm_up()
+        print(f"⚙️ {executor.workers} inference processes restarted in {seconds:.2f}s")
+    except Exception as e:
+        print(f"❌ Inference processes failed to restart: {e}")
+    
+    with process_executor_lock:
+        if process_executor is broken_executor and active_session is session:
+            process_executor = executor
+            return
+    # A reload replaced the pool meanwhile
+    executor.shutdown()
+
+def start_process_executor():
+    """Start the inference worker processes and load the model in each, if enabled"""
+    executor = get_process_executor(session)
+    if executor is not None:
+        seconds = executor.warm_up()
+        print(f"⚙️ {executor.workers} inference processes ready in {seconds:.2f}s")
+
+def new_partitioned_forest(active_session):
+    """
+    Forest partitions (not yet started) for a session's bundle
+    
+    Args:
+        active_session (InferenceSession): Session the partitions serve
+        
+    Returns:
+        PartitionedForest: None when disabled, the model is not a forest, or
+            the session was not loaded from a bundle
+    """
+    model = active_session.model
+    if FOREST_PARTITIONS <= 0 or not active_session.model_path \
+            or not (hasattr(model, 'estimators_') or hasattr(model, 'roots')):
+        return None
+    return PartitionedForest(
+        active_session.model_path, active_session.model_version, model.n_estimators,
+        active_session.feature_count, len(model.classes_), partitions=FOREST_PARTITIONS)
+
+def get_partitioned_forest(active_session):
+    """
+    Forest partitions for the primary model
+    
+    A reload starts the new version's partitions in swap_model before
+    publishing them (the old workers stop in the background once their
+    current image is done). Broken partitions are restarted in the background,
+    see restart_workers_later.
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
         
-        print(f"✅ Model loaded successfully!")
-        print(f"🎯 Classes: {class_names}")
+    Returns:
+        PartitionedForest: None when disabled, broken, or for any session but the primary one
+    """
+    global partitioned_forest
+    
+    if FOREST_PARTITIONS <= 0 or active_session is None or active_session is not session:
+        return None
+    with process_executor_lock:
+        if partitioned_forest is not None and partitioned_forest.model_version != active_session.model_version:
+            threading.Thread(target=partitioned_forest.shutdown, daemon=True).start()
+            partitioned_forest = None
+        if partitioned_forest is None:
+            partitioned_forest = new_partitioned_forest(active_session)
+        if partitioned_forest is None:
+            return None
+        if partitioned_forest.broken:
+            restart_workers_later('partitions', active_session, partitioned_forest,
+                                  partitioned_forest.stats()['served'], restart_partitions)
+            return None
+        return partitioned_forest
+
+def restart_workers_later(kind, active_session, broken, served, restart):
+    """
+    Replace broken worker processes from a background thread, with backoff;
+    the caller must hold process_executor_lock
+    
+    The delay doubles for every replacement that breaks before serving an
+    image, so a bundle the workers cannot load is not respawned in a tight loop.
+    
+    Args:
+        kind (str): 'processes' or 'partitions'
+        active_session (InferenceSession): Session the workers serve
+        broken (object): Broken ProcessInferenceExecutor or PartitionedForest
+        served (int): Images it answered before breaking
+        restart (callable): restart(active_session, broken, delay), run in the background
+    """
+    state = worker_restarts[kind]
+    if state['broken'] is broken:
+        return
+    state['broken'] = broken
+    if served:
+        state['failures'] = 0
+    delay = min(WORKER_RESTART_MAX_SECONDS, WORKER_RESTART_SECONDS * 2 ** state['failures'])
+    state['failures'] += 1
+    print(f"⚠️ Inference {kind} broken ({broken.broken}), restarting in {delay:.0f}s")
+    threading.Thread(target=restart, args=(active_session, broken, delay),
+                     name=f'rhythmiq-{kind}-restart', daemon=True).start()
+
+def restart_partitions(active_session, broken_forest, delay):
+    """
+    Wait, start fresh partitions and publish them in place of the broken ones
+    
+    Fresh partitions that fail to start are published broken too, which
+    schedules the next attempt with a longer delay.
+    
+    Args:
+        active_session (InferenceSession): Session the partitions serve
+        broken_forest (PartitionedForest): Partitions to replace
+        delay (float): Seconds to wait first
+    """
+    global partitioned_forest
+    
+    time.sleep(delay)
+    broken_forest.shutdown()
+    forest = new_partitioned_forest(active_session)
+    started = time.perf_counter()
+    try:
+        forest.start()
+        print(f"🌲 {forest.partitions} forest partitions restarted in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"❌ Forest partitions failed to restart: {e}")
+    
+    with process_executor_lock:
+        if partitioned_forest is broken_forest and active_session is session:
+            partitioned_forest = forest
+            return
+    # A reload replaced the partitions meanwhile
+    forest.shutdown()
+
+def start_forest_partitions():
+    """Start the forest partition workers and load each slice of trees, if enabled"""
+    forest = get_partitioned_forest(session)
+    if forest is not None:
+        started = time.perf_counter()
+        forest.start()
+        print(f"🌲 {forest.partitions} forest partitions ready in {time.perf_counter() - started:.2f}s")
+
+def predict_partitioned(active_session, features, timeout=None):
+    """
+    Classify one flattened image on the forest partitions
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        features (numpy.ndarray): Flattened preprocessed image
+        timeout (float): Longest wait for the partitions' answer
+        
+    Returns:
+        numpy.ndarray: Probability row, or None if the partitions are disabled,
+            busy with another image, or failed
         
+    Raises:
+        concurrent.futures.TimeoutError: If the partitions did not answer within timeout
+    """
+    forest = get_partitioned_forest(active_session)
+    if forest is None:
+        return None
+    try:
+        probabilities = forest.try_predict_proba(features.reshape(1, -1), timeout)
+    except RuntimeError as e:
+        print(f"⚠️ Forest partitions unavailable, classifying in-process: {e}")
+        return None
+    return probabilities[0] if probabilities is not None else None
+
+def start_job_runner():
+    """Start working through queued and unfinished bulk jobs, if enabled"""
+    if job_runner is not None:
+        job_runner.start()
+
+def load_registry_models():
+    """
+    Register the extra named models configured in RHYTHMIQ_MODELS
+    
+    Without a memory budget every model is loaded and warmed up now; with
+    one, only pinned models are, and the rest load on their first request.
+    """
+    for name, model_path in MODEL_PATHS.items():
+        model_registry.register(name, model_path, pinned=name in PINNED_MODELS)
+    
+    for name in MODEL_PATHS:
+        if MODEL_MEMORY_BUDGET_MB and name not in PINNED_MODELS:
+            continue
+        # A broken candidate must not take the primary model down (get logs and returns None)
+        loaded_session = model_registry.get(name)
+        if loaded_session is not None:
+            print(f"🧪 Serving model '{name}' ({loaded_session.model_version}) next to '{PRIMARY_MODEL_NAME}'")
+
+def select_session():
+    """
+    Pick the model serving the current request
+    
+    The `X-Model-Version` header selects a model by name or version;
+    otherwise the request is routed by RHYTHMIQ_MODEL_WEIGHTS.
+    
+    Returns:
+        tuple: (model name, InferenceSession or None)
+        
+    Raises:
+        KeyError: If the requested model is unknown
+    """
+    return model_registry.select(request.headers.get('X-Model-Version'))
+
+def unknown_model_response(requested):
+    """400 response for a request naming a model that is not served"""
+    return jsonify({
+        'success': False,
+        'error': f'Unknown model: {requested}',
+        'models': model_registry.names()
+    }), 400
+
+def record_model_request(model_name, started, predicted_classes):
+    """
+    Update the per-model latency and class distribution counters
+    
+    Args:
+        model_name (str): Model that served the request
+        started (float): perf_counter() when the request started
+        predicted_classes (list): Class of every image classified (empty on failure)
+    """
+    seconds = time.perf_counter() - started
+    model_registry.record(model_name, seconds, predicted_classes)
+    MODEL_LATENCY.observe(seconds, model=model_name)
+    for predicted_class in predicted_classes:
+        MODEL_PREDICTIONS.inc(model=model_name, predicted_class=predicted_class)
+
+def tag_model(response, model_name, active_session):
+    """Add the serving model's name and version to a response"""
+    response.headers['X-Model-Name'] = model_name
+    response.headers['X-Model-Version'] = active_session.model_version
+    return response
+
+def load_model():
+    """Load the trained ECG model (and any extra registry models) and warm it up"""
+    try:
+        budget = apply_thread_budget(INFERENCE_THREADS)
+        print(f"🧵 Inference thread budget: {INFERENCE_THREADS or 'library defaults'} "
+              f"(OpenCV {budget['opencv_threads']}, {len(budget['native_pools'])} native pools)")
+        loaded_session, report, load_seconds = load_session(resolve_model_path())
+        publish_session(loaded_session, report, load_seconds)
+        load_registry_models()
         return True
         
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
         return False
 
+@app.before_request
+def start_request_metrics():
+    """Count the request as in flight, start its latency clock and assign its request ID"""
+    g.request_started = time.perf_counter()
+    IN_FLIGHT.inc()
+    
+    request_id = request.headers.get('X-Request-ID', '')
+    g.request_id = request_id if REQUEST_ID_PATTERN.match(request_id) else uuid.uuid4().hex
+
+@app.before_request
+def read_deadline():
+    """Start the request's deadline clock from X-Deadline-Ms (or the configured default)"""
+    try:
+        g.deadline = Deadline.from_header(request.headers.get(DEADLINE_HEADER), g.request_started,
+                                          DEFAULT_DEADLINE_MS)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return None
+
+def deadline_response(error):
+    """504 JSON response for work dropped because its deadline passed"""
+    DEADLINE_OUTCOMES.inc(outcome='exceeded')
+    return jsonify({'success': False, 'error': str(error), 'stage': error.stage}), 504
+
+@app.before_request
+def admit_request():
+    """Hold an inference slot for the request, or reject it with 429 when overloaded"""
+    if admission is None or request.endpoint not in ADMISSION_ENDPOINTS:
+        return None
+    
+    # Urgent studies are flagged in a header or the query string; a form field
+    # would mean reading the whole upload before it is admitted
+    priority = request.headers.get(PRIORITY_HEADER) or request.args.get('priority')
+    priority = (priority or admission.default_priority).strip().lower()
+    if priority not in admission.priorities:
+        return jsonify({'success': False, 'error': f"Unknown priority {priority!r}",
+                        'priorities': admission.priorities}), 400
+    g.priority = priority
+    
+    # A request never waits for a slot longer than its deadline allows
+    deadline = g.get('deadline')
+    try:
+        waited = admission.acquire(deadline.remaining() if deadline is not None else None, priority)
+    except AdmissionRejected as e:
+        if deadline is not None and deadline.expired():
+            return deadline_response(DeadlineExceeded('queue'))
+        ADMISSION_REJECTIONS.inc(reason=e.reason)
+        response = jsonify({'success': False, 'error': str(e), 'retry_after': e.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    
+    ADMISSION_WAIT.observe(waited, priority=priority)
+    g.queue_seconds = waited
+    g.admitted_at = time.perf_counter()
+    return None
+
+@app.after_request
+def record_request_metrics(response):
+    """Record the request's latency and outcome"""
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    if response.status_code < 400:
+        outcome = 'success'
+    elif response.status_code < 500:
+        outcome = 'client_error'
+    else:
+        outcome = 'server_error'
+    
+    REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+    return response
+
+def server_timing(stage_timings, total_seconds, cache_status=None):
+    """
+    Format a Server-Timing header
+    
+    Args:
+        stage_timings (dict): Seconds per stage
+        total_seconds (float): Time from request start to response
+        cache_status (str): X-Cache value, if the result cache was consulted
+        
+    Returns:
+        str: e.g. "decode;dur=3.1, resize;dur=0.4, model;dur=12.0, total;dur=16.2"
+    """
+    entries = [f"{stage};dur={seconds * 1000.0:.2f}" for stage, seconds in stage_timings.items()]
+    if cache_status:
+        entries.append(f'cache;desc="{cache_status}"')
+    entries.append(f"total;dur={total_seconds * 1000.0:.2f}")
+    return ', '.join(entries)
+
+@app.after_request
+def trace_request(response):
+    """Tag the response with its request ID and Server-Timing, and log it as one JSON line"""
+    request_id = g.get('request_id')
+    if request_id is None:
+        return response
+    
+    stage_timings = dict(g.get('stage_timings', {}))
+    if g.get('queue_seconds'):
+        stage_timings = {'queue': g.queue_seconds, **stage_timings}
+    started = g.get('request_started')
+    total_seconds = time.perf_counter() - started if started is not None else 0.0
+    
+    response.headers['X-Request-ID'] = request_id
+    response.headers['Server-Timing'] = server_timing(stage_timings, total_seconds, response.headers.get('X-Cache'))
+    
+    if ACCESS_LOG and request.endpoint not in QUIET_ENDPOINTS:
+        print(json.dumps({
+            'event': 'request',
+            'request_id': request_id,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total_seconds * 1000.0, 2),
+            'stages_ms': {stage: round(seconds * 1000.0, 2) for stage, seconds in stage_timings.items()},
+            'model_name': response.headers.get('X-Model-Name'),
+            'model_version': response.headers.get('X-Model-Version'),
+            'cache': response.headers.get('X-Cache'),
+            'priority': g.get('priority'),
+            'degraded': 'X-Degraded' in response.headers
+        }), flush=True)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Release the in-flight and admission slots, even when the request failed"""
+    admitted_at = g.pop('admitted_at', None)
+    if admitted_at is not None:
+        admission.release(time.perf_counter() - admitted_at)
+    
+    if g.pop('request_started', None) is not None:
+        IN_FLIGHT.dec()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'service': 'RhythmIQ ML API',
-        'model_loaded': model is not None
+        'model_loaded': session is not None,
+        'model': model_info,
+        'reload': dict(reload_status)
     })
 
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """
+    Hot-reload the model from disk
+    
+    Loads and warms the bundle in the background and swaps it in when ready;
+    requests keep being served by the current model meanwhile. Pass
+    `?wait=true` to block until the new model is serving.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'success': False, 'error': 'Admin endpoints are disabled (set RHYTHMIQ_ADMIN_TOKEN)'}), 403
+    
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({'success': False, 'error': 'Invalid admin token'}), 401
+    
+    if not reload_lock.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'A model reload is already in progress'}), 409
+    
+    if request.args.get('wait', '').lower() in ('1', 'true', 'yes'):
+        try:
+            ok, error = swap_model()
+        finally:
+            reload_lock.release()
+        if not ok:
+            return jsonify({'success': False, 'error': error, 'model': model_info}), 500
+        return jsonify({'success': True, 'status': 'reloaded', 'model': model_info})
+    
+    def run_reload():
+        try:
+            swap_model()
+        finally:
+            reload_lock.release()
+    
+    threading.Thread(target=run_reload, name='rhythmiq-model-reload', daemon=True).start()
+    return jsonify({'success': True, 'status': 'reloading', 'model': model_info}), 202
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 503 until the model is loaded and warmed up"""
+    if not is_ready():
+        return jsonify({
+            'ready': False,
+            'model_loaded': session is not None
+        }), 503
+    
+    return jsonify({
+        'ready': True,
+        'warmup': warmup_report
+    })
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Runtime statistics for tuning throughput against latency"""
+    return jsonify({
+        'micro_batching': batcher.stats() if batcher is not None else {'enabled': False},
+        'result_cache': result_cache.stats() if result_cache is not None else {'enabled': False},
+        'models': model_registry.stats(),
+        'shadow': shadow.stats() if shadow is not None else {'enabled': False},
+        'admission': admission.stats() if admission is not None else {'enabled': False},
+        'jobs': job_runner.stats() if job_runner is not None else {'enabled': False},
+        'inference_processes': process_executor.stats() if process_executor is not None else {'enabled': False},
+        'forest_partitions': partitioned_forest.stats() if partitioned_forest is not None else {'enabled': False},
+        'threads': dict(describe_thread_budget(INFERENCE_THREADS),
+                        model_n_jobs=getattr(session.model, 'n_jobs', None) if session is not None else None),
+        'memory': memory_usage()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def read_upload(file):
+    """
+    Bytes of an uploaded image, as buffered in memory by UploadLimitedRequest
+    
+    Args:
+        file (werkzeug.datastructures.FileStorage): Uploaded image
+        
+    Returns:
+        bytes: Encoded image data
+        
+    Raises:
+        RequestEntityTooLarge: If the image was larger than RHYTHMIQ_MAX_UPLOAD_MB
+    """
+    if getattr(file.stream, 'oversized', False):
+        raise RequestEntityTooLarge(f'Image larger than {MAX_UPLOAD_MB:g} MB')
+    return file.stream.getvalue() if isinstance(file.stream, io.BytesIO) else file.stream.read()
+
+def too_large_response(error):
+    """413 JSON response for an oversized upload"""
+    description = error.description if isinstance(error, RequestEntityTooLarge) else str(error)
+    return jsonify({'success': False, 'error': description}), 413
+
+@app.errorhandler(RequestEntityTooLarge)
+def handle_too_large(error):
+    """Answer requests over MAX_CONTENT_LENGTH with JSON like the other errors"""
+    return too_large_response(error)
+
+def decode_upload(active_session, image_bytes):
+    """
+    Decode and preprocess uploaded image bytes, recording stage timings
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        image_bytes (bytes): Encoded image data
+        
+    Returns:
+        tuple: (preprocessed image or None, decode scale used)
+    """
+    timings = {}
+    decode_info = {}
+    processed_img = active_session.preprocessor.load_and_preprocess_bytes(
+        image_bytes, apply_augmentation=False, timings=timings,
+        reduced_decode=REDUCED_DECODE, decode_info=decode_info)
+    observe_stages(timings)
+    
+    decode_scale = decode_info.get('decode_scale', 1)
+    if processed_img is not None:
+        DECODE_SCALES.inc(scale=decode_scale)
+    return processed_img, decode_scale
+
+def preprocess_upload(active_session, file):
+    """
+    Preprocess an uploaded image file into a normalized image array
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        file (werkzeug.datastructures.FileStorage): Uploaded image
+        
+    Returns:
+        tuple: (preprocessed image or None if it could not be processed, decode scale)
+        
+    Raises:
+        RequestEntityTooLarge: If the image is larger than the per-image limit
+    """
+    return decode_upload(active_session, read_upload(file))
+
+def build_prediction(active_session, probabilities):
+    """
+    Turn one row of class probabilities into an API prediction result
+    
+    Args:
+        active_session (InferenceSession): Session that produced the probabilities
+        probabilities (numpy.ndarray): Class probabilities from predict_proba
+        
+    Returns:
+        dict: Prediction fields shared by /analyze and /analyze_batch
+    """
+    started = time.perf_counter()
+    prediction = active_session.describe(probabilities)
+    record_stage('severity', time.perf_counter() - started)
+    confidence = prediction['confidence']
+    
+    return {
+        'predicted_class': prediction['predicted_class'],
+        'confidence': confidence,
+        'confidence_percentage': f"{confidence*100:.1f}%",
+        'severity': prediction['severity'],
+        'severity_confidence': prediction['severity_confidence']
+    }
+
+def predict_full_forest(active_session, processed_img, deadline=None):
+    """
+    Classify one preprocessed image with the whole model
+    
+    The image goes to the forest partitions when they are idle, otherwise it
+    is batched together with other requests arriving at the same time, or
+    classified in the request thread. With a deadline, a path is only tried
+    when its measured cost says the whole forest finishes in time there.
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        processed_img (numpy.ndarray): Preprocessed image
+        deadline (Deadline): Request deadline, or None
+        
+    Returns:
+        tuple: (class probabilities, path that answered, seconds it took), or None
+            if no path can run the whole forest before the deadline
+        
+    Raises:
+        concurrent.futures.TimeoutError: If the partitions or the micro-batch did not answer in time
+        DeadlineExceeded: If the image expired in the micro-batch queue
+    """
+    n_trees = forest_size(active_session.model)
+    expires_at = deadline.expires_at - DEADLINE_MARGIN_MS / 1000.0 if deadline is not None else None
+    
+    def fits(path):
+        if expires_at is None or n_trees is None:
+            return True
+        seconds = expires_at - time.perf_counter()
+        return forest_costs.trees_within(active_session.model_version, seconds, n_trees, path) >= n_trees
+    
+    started = time.perf_counter()
+    if fits('partitions'):
+        timeout = None if expires_at is None else max(0.0, expires_at - started)
+        probabilities = predict_partitioned(active_session, processed_img, timeout)
+        if probabilities is not None:
+            return probabilities, 'partitions', time.perf_counter() - started
+    if batcher is not None and fits('batch'):
+        timeout = None if expires_at is None else max(0.0, expires_at - time.perf_counter())
+        probabilities = batcher.predict_proba(active_session, processed_img.reshape(-1), timeout, expires_at)
+        return probabilities, 'batch', time.perf_counter() - started
+    if fits('direct'):
+        started = time.perf_counter()
+        probabilities = active_session.predict_proba(processed_img.reshape(1, -1))[0]
+        return probabilities, 'direct', time.perf_counter() - started
+    return None
+
+def classify_within_deadline(active_session, processed_img, deadline=None):
+    """
+    Classify one preprocessed image with as much of the forest as its deadline allows
+    
+    The whole forest is used unless the measured cost per tree says it cannot
+    finish before the deadline (less DEADLINE_MARGIN_MS), or it does not
+    answer in time; the image is then classified in the request thread by
+    the first trees that fit in what is left. Models that are not forests
+    always run whole.
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        processed_img (numpy.ndarray): Preprocessed image
+        deadline (Deadline): Request deadline, or None
+        
+    Returns:
+        tuple: (class probabilities, trees used when only part of the forest voted, else None)
+        
+    Raises:
+        DeadlineExceeded: If a model that is not a forest cannot answer in time
+    """
+    n_trees = forest_size(active_session.model)
+    version = active_session.model_version
+    try:
+        answer = predict_full_forest(active_session, processed_img, deadline)
+    except (FutureTimeoutError, DeadlineExceeded):
+        answer = None
+    if answer is not None:
+        probabilities, path, seconds = answer
+        if n_trees is not None:
+            forest_costs.observe(version, seconds, n_trees, path)
+        return probabilities, None
+    if n_trees is None:
+        raise DeadlineExceeded('model')
+    
+    # Part of the forest, sized for what is left (eating into the margin if the whole forest was tried)
+    trees = min(n_trees - 1, forest_costs.partial_trees(
+        version, deadline.remaining() - DEADLINE_MARGIN_MS / 1000.0, n_trees))
+    trees = max(1, trees)
+    started = time.perf_counter()
+    probabilities = partial_forest_proba(active_session.model, processed_img.reshape(1, -1), trees)[0]
+    forest_costs.observe(version, time.perf_counter() - started, trees, 'direct')
+    return probabilities, trees
+
+def analyze_image_bytes(active_session, image_bytes, model_name=PRIMARY_MODEL_NAME, deadline=None):
+    """
+    Preprocess and classify one uploaded image
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        image_bytes (bytes): Encoded image data
+        model_name (str): Registry name of the session (for shadow evaluation)
+        deadline (Deadline): Request deadline; part of the forest votes when the whole one does not fit
+        
+    Returns:
+        dict: Prediction fields, or None if the image could not be processed
+        
+    Raises:
+        DeadlineExceeded: If the deadline passed before decoding or the model stage
+    """
+    if deadline is not None:
+        deadline.check('decode')
+    
+    executor = get_process_executor(active_session)
+    if executor is not None and executor.fits(image_bytes):
+        try:
+            return analyze_in_process(executor, active_session, image_bytes, model_name, deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # No slot came free, the pool was retired or broke, or the worker failed on this image
+            print(f"⚠️ Inference process unavailable, classifying in-process: {e}")
+    
+    processed_img, decode_scale = decode_upload(active_session, image_bytes)
+    if processed_img is None:
+        return None
+    
+    # Make prediction (single forest pass, label is the most probable class);
+    # the model stage includes any micro-batch wait
+    if deadline is not None:
+        deadline.check('model')
+    started = time.perf_counter()
+    probabilities, trees_used = classify_within_deadline(active_session, processed_img, deadline)
+    model_seconds = time.perf_counter() - started
+    record_stage('model', model_seconds)
+    
+    prediction = build_prediction(active_session, probabilities)
+    prediction['decode_scale'] = decode_scale
+    if trees_used is not None:
+        return mark_degraded(prediction, active_session, trees_used)
+    
+    # Hand the preprocessed input to the shadow model without waiting for it
+    if shadow is not None:
+        shadow.offer(model_name, active_session, processed_img.reshape(-1), prediction, model_seconds)
+    
+    return prediction
+
+def mark_degraded(prediction, active_session, trees_used):
+    """Flag a prediction made by part of the forest to meet the request's deadline"""
+    prediction['degraded'] = True
+    prediction['degraded_reason'] = 'deadline'
+    prediction['trees_used'] = trees_used
+    prediction['trees_total'] = forest_size(active_session.model)
+    return prediction
+
+def analyze_in_process(executor, active_session, image_bytes, model_name=PRIMARY_MODEL_NAME, deadline=None):
+    """
+    Preprocess and classify one uploaded image in an inference worker process
+    
+    With a deadline, the worker runs as many trees as fit in what is left
+    once the image is decoded, and the request stops waiting at the deadline.
+    
+    Args:
+        executor (ProcessInferenceExecutor): Worker processes for the session's model
+        active_session (InferenceSession): Session serving the request
+        image_bytes (bytes): Encoded image data
+        model_name (str): Registry name of the session (for shadow evaluation)
+        deadline (Deadline): Request deadline, or None
+        
+    Returns:
+        dict: Prediction fields, or None if the image could not be processed
+        
+    Raises:
+        RuntimeError: If the workers cannot serve the session's model version
+        concurrent.futures.TimeoutError: If there is no deadline and no slot came free in time
+        DeadlineExceeded: If the deadline passed before the worker could answer
+        Exception: Whatever the worker raised for this image
+    """
+    version = active_session.model_version
+    timeout = budget = None
+    if deadline is not None:
+        timeout = max(0.0, deadline.remaining())
+        budget = (time.time() + deadline.remaining() - DEADLINE_MARGIN_MS / 1000.0,
+                  forest_costs.seconds_per_tree(version, 'process'))
+    
+    started = time.perf_counter()
+    try:
+        result = executor.predict_bytes(image_bytes, reduced_decode=REDUCED_DECODE,
+                                        want_features=shadow is not None, timeout=timeout, budget=budget)
+    except FutureTimeoutError:
+        if deadline is None:
+            raise
+        raise DeadlineExceeded('model')
+    elapsed = time.perf_counter() - started
+    
+    # Stages measured in the worker, plus the slot wait and hand-off around them
+    observe_stages(result.timings)
+    record_stage('ipc', max(0.0, elapsed - sum(result.timings.values())))
+    if result.probabilities is None:
+        return None
+    DECODE_SCALES.inc(scale=result.decode_scale)
+    
+    n_trees = forest_size(active_session.model)
+    if n_trees is not None and 'model' in result.timings:
+        forest_costs.observe(version, result.timings['model'], result.trees_used or n_trees, 'process')
+    
+    prediction = build_prediction(active_session, result.probabilities)
+    prediction['decode_scale'] = result.decode_scale
+    if result.trees_used is not None:
+        return mark_degraded(prediction, active_session, result.trees_used)
+    
+    if shadow is not None:
+        shadow.offer(model_name, active_session, result.features, prediction, result.timings.get('model', 0.0))
+    
+    return prediction
+
 @app.route('/analyze', methods=['POST'])
 def analyze_ecg():
     """Analyze ECG image"""
     try:
+        started = time.perf_counter()
+        
+        # Pick the model for this request (it keeps it even if a reload swaps models)
+        try:
+            model_name, active_session = select_session()
+        except KeyError as e:
+            return unknown_model_response(e.args[0])
+        
         # Check if model is loaded
-        if model is None:
+        if active_session is None:
             return jsonify({'success': False, 'error': 'Model not loaded'}), 500
         
         # Check if image file is provided
@@ -115,52 +1430,458 @@ def analyze_ecg():
         if file.filename == '':
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
-        # Process image
-        image_bytes = file.read()
+        image_bytes = read_upload(file)
+        deadline = g.get('deadline')
         
-        # Save temporary file for preprocessing
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            tmp_file.write(image_bytes)
-            tmp_path = tmp_file.name
+        # Identical uploads for the same model reuse (or wait for) one result
+        if result_cache is not None:
+            cache_key = ResultCache.key_for(image_bytes, active_session.model_version)
+            # Answers from part of the forest are not kept for later requests. A
+            # request with a deadline may be dropped or degraded, so nobody waits
+            # for its computation, and it waits for an identical one only until
+            # it must start its own to be answered in time
+            prediction, cache_status = result_cache.get_or_compute(
+                cache_key, lambda: analyze_image_bytes(active_session, image_bytes, model_name, deadline),
+                cacheable=lambda cached: not cached.get('degraded'),
+                lead=deadline is None,
+                wait_timeout=max(0.0, deadline.remaining() - DEADLINE_MARGIN_MS / 1000.0) if deadline else None)
+        else:
+            prediction = analyze_image_bytes(active_session, image_bytes, model_name, deadline)
+            cache_status = 'disabled'
+        
+        if prediction is None:
+            record_model_request(model_name, started, [])
+            return jsonify({'success': False, 'error': 'Failed to process image'}), 400
         
-        # Preprocess image using the correct method
-        processed_img = preprocessor.load_and_preprocess_image(tmp_path, apply_augmentation=False)
+        record_model_request(model_name, started, [prediction['predicted_class']])
         
-        # Clean up temp file
-        import os
-        os.unlink(tmp_path)
+        result = {'success': True}
+        result.update(prediction)
+        result['filename'] = file.filename
+        result['model_name'] = model_name
+        result['model_version'] = active_session.model_version
+        result['degraded'] = prediction.get('degraded', False)
+        if deadline is not None:
+            DEADLINE_OUTCOMES.inc(outcome='degraded' if result['degraded'] else 'met')
         
-        if processed_img is None:
-            return jsonify({'success': False, 'error': 'Failed to process image'}), 400
+        response = jsonify(result)
+        response.headers['X-Cache'] = cache_status.upper()
+        if result['degraded']:
+            response.headers['X-Degraded'] = 'partial-forest'
+        return tag_model(response, model_name, active_session)
         
-        # Make prediction
-        flattened = processed_img.flatten().reshape(1, -1)
-        prediction = model.predict(flattened)[0]
-        probabilities = model.predict_proba(flattened)[0]
+    except RequestEntityTooLarge as e:
+        return too_large_response(e)
+    except DeadlineExceeded as e:
+        return deadline_response(e)
+    except Exception as e:
+        print(f"❌ Analysis error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def get_stream_executor():
+    """Threads classifying streamed batch images (created in the worker, after any fork)"""
+    global stream_executor
+    
+    with stream_executor_lock:
+        if stream_executor is None:
+            stream_executor = ThreadPoolExecutor(STREAM_THREADS, thread_name_prefix='rhythmiq-stream')
+        return stream_executor
+
+def wants_stream():
+    """Whether the client asked for an NDJSON stream (Accept header or ?stream=true)"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def read_stream_uploads(files):
+    """
+    Read the encoded bytes of every batch image before a streamed response starts
+    
+    Flask closes the uploaded files once the view returns, before a streamed
+    body is produced, so the (size-limited) encoded bytes are taken now; the
+    decoded images are only built one window at a time while streaming.
+    
+    Args:
+        files (list): Uploaded images
+        
+    Returns:
+        list: Per image, (filename, encoded bytes) or (filename, error result)
+    """
+    uploads = []
+    for file in files:
+        if file.filename == '':
+            uploads.append((file.filename, {'success': False, 'error': 'No file selected'}))
+            continue
+        try:
+            uploads.append((file.filename, read_upload(file)))
+        except RequestEntityTooLarge as e:
+            uploads.append((file.filename, {'success': False, 'error': e.description, 'filename': file.filename}))
+    return uploads
+
+def classify_upload(active_session, model_name, filename, image_bytes):
+    """
+    Preprocess and classify one image of a streamed batch
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        model_name (str): Registry name of the session
+        filename (str): Name of the uploaded file
+        image_bytes (bytes): Encoded image data
+        
+    Returns:
+        dict: Result in the /analyze_batch schema, without its index
+    """
+    try:
+        prediction = analyze_image_bytes(active_session, image_bytes, model_name)
+    except Exception as e:
+        print(f"❌ Batch preprocessing error for {filename}: {e}")
+        prediction = None
+    
+    if prediction is None:
+        return {'success': False, 'error': 'Failed to process image', 'filename': filename}
+    
+    result = {'success': True}
+    result.update(prediction)
+    result['filename'] = filename
+    return result
+
+def stream_batch_results(active_session, model_name, uploads, started):
+    """
+    Classify batch images concurrently and yield one JSON line per image
+    
+    Lines come in completion order, each with the `index` of its image; at
+    most STREAM_THREADS * 2 images are being decoded or classified at once,
+    and single images still share forest passes through the micro-batcher.
+    A final line with `"done": true` carries the totals.
+    
+    Args:
+        active_session (InferenceSession): Session serving the request
+        model_name (str): Registry name of the session
+        uploads (list): Output of read_stream_uploads (consumed as it goes)
+        started (float): perf_counter() when the request started
+        
+    Yields:
+        str: NDJSON lines
+    """
+    executor = get_stream_executor()
+    total = len(uploads)
+    in_flight = {}
+    pending = iter(range(total))
+    predicted_classes = []
+    failed = 0
+    
+    def emit(index, result):
+        result['index'] = index
+        return json.dumps(result) + '\n'
+    
+    try:
+        while True:
+            for index in pending:
+                # Drop the reference so the encoded bytes are freed once classified
+                filename, upload = uploads[index]
+                uploads[index] = None
+                if isinstance(upload, dict):
+                    failed += 1
+                    yield emit(index, upload)
+                    continue
+                in_flight[executor.submit(classify_upload, active_session, model_name, filename, upload)] = index
+                if len(in_flight) >= STREAM_THREADS * 2:
+                    break
+            if not in_flight:
+                break
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result['success']:
+                    predicted_classes.append(result['predicted_class'])
+                else:
+                    failed += 1
+                yield emit(in_flight.pop(future), result)
+    finally:
+        # The client went away: do not classify what has not started
+        for future in in_flight:
+            future.cancel()
+    
+    record_model_request(model_name, started, predicted_classes)
+    yield json.dumps({
+        'done': True,
+        'success': True,
+        'total': total,
+        'succeeded': len(predicted_classes),
+        'failed': failed,
+        'model_name': model_name,
+        'model_version': active_session.model_version
+    }) + '\n'
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_ecg_batch():
+    """
+    Analyze several ECG images with a single vectorized model call
+    
+    With `Accept: application/x-ndjson` (or `?stream=true`) the results are
+    streamed instead, one JSON line per image as soon as it is classified.
+    """
+    try:
+        started = time.perf_counter()
+        
+        try:
+            model_name, active_session = select_session()
+        except KeyError as e:
+            return unknown_model_response(e.args[0])
+        
+        if active_session is None:
+            return jsonify({'success': False, 'error': 'Model not loaded'}), 500
+        
+        files = request.files.getlist('images')
+        if not files:
+            return jsonify({'success': False, 'error': 'No image files provided'}), 400
+        
+        if len(files) > MAX_BATCH_IMAGES:
+            return jsonify({
+                'success': False,
+                'error': f'Too many images: {len(files)} (maximum {MAX_BATCH_IMAGES})'
+            }), 400
+        
+        if wants_stream():
+            uploads = read_stream_uploads(files)
+            response = Response(stream_with_context(stream_batch_results(active_session, model_name, uploads, started)),
+                                mimetype=NDJSON_MIMETYPE)
+            # Ask proxies not to buffer the stream
+            response.headers['X-Accel-Buffering'] = 'no'
+            return tag_model(response, model_name, active_session)
+        
+        # Preprocess every image straight into one preallocated feature matrix
+        features = active_session.allocate(len(files))
+        results = [None] * len(files)
+        rows = []
+        decode_scales = []
         
-        predicted_class = class_names[prediction]
-        confidence = float(max(probabilities))
+        for index, file in enumerate(files):
+            if file.filename == '':
+                results[index] = {'success': False, 'error': 'No file selected'}
+                continue
+            
+            try:
+                processed_img, decode_scale = preprocess_upload(active_session, file)
+            except RequestEntityTooLarge as e:
+                results[index] = {'success': False, 'error': e.description, 'filename': file.filename}
+                continue
+            except Exception as e:
+                processed_img = None
+                print(f"❌ Batch preprocessing error for {file.filename}: {e}")
+            
+            if processed_img is None:
+                results[index] = {'success': False, 'error': 'Failed to process image',
+                                  'filename': file.filename}
+                continue
+            
+            features[len(rows)] = processed_img.reshape(-1)
+            rows.append(index)
+            decode_scales.append(decode_scale)
         
-        # Get severity prediction
-        severity_result = severity_predictor.predict_severity_rule_based(predicted_class)
+        # One forest evaluation for every image that was preprocessed successfully
+        if rows:
+            model_started = time.perf_counter()
+            probabilities = active_session.predict_proba(features[:len(rows)])
+            model_seconds = time.perf_counter() - model_started
+            record_stage('model', model_seconds)
+            for row, index in enumerate(rows):
+                result = {'success': True}
+                result.update(build_prediction(active_session, probabilities[row]))
+                result['filename'] = files[index].filename
+                result['decode_scale'] = decode_scales[row]
+                results[index] = result
+                if shadow is not None:
+                    shadow.offer(model_name, active_session, features[row], result, model_seconds / len(rows))
         
-        result = {
+        for index, result in enumerate(results):
+            result['index'] = index
+        
+        record_model_request(model_name, started,
+                             [result['predicted_class'] for result in results if result['success']])
+        
+        response = jsonify({
             'success': True,
-            'predicted_class': predicted_class,
-            'confidence': confidence,
-            'confidence_percentage': f"{confidence*100:.1f}%",
-            'severity': severity_result['severity'],
-            'severity_confidence': severity_result['confidence'],
-            'filename': file.filename
-        }
+            'total': len(files),
+            'succeeded': len(rows),
+            'failed': len(files) - len(rows),
+            'model_name': model_name,
+            'model_version': active_session.model_version,
+            'results': results
+        })
+        return tag_model(response, model_name, active_session)
+        
+    except RequestEntityTooLarge as e:
+        return too_large_response(e)
+    except Exception as e:
+        print(f"❌ Batch analysis error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/analyze_raw', methods=['POST'])
+def analyze_raw():
+    """
+    Analyze images sent as a raw tensor already resized to the model input
+    
+    The body is a little-endian RGB buffer described by the `X-Tensor-Shape`
+    (H,W,3 or N,H,W,3) and `X-Tensor-Dtype` (uint8, the default, or float32
+    scaled to [0, 1]) headers; image decode and resize are skipped. With
+    `Accept: application/octet-stream` the answer is the N x n_classes
+    probability matrix as little-endian float32, columns named by
+    `X-Class-Names`; otherwise JSON.
+    """
+    try:
+        started = time.perf_counter()
         
-        return jsonify(result)
+        try:
+            model_name, active_session = select_session()
+        except KeyError as e:
+            return unknown_model_response(e.args[0])
+        
+        if active_session is None:
+            return jsonify({'success': False, 'error': 'Model not loaded'}), 500
         
+        # The bundle's feature_shape must match the flattened model input
+        width, height = active_session.target_size
+        image_shape = (height, width, 3)
+        feature_shape = int(np.prod(active_session.metadata.get('feature_shape') or active_session.feature_count))
+        if feature_shape != active_session.feature_count:
+            return jsonify({
+                'success': False,
+                'error': f'Model expects {feature_shape} features, not a {height}x{width}x3 tensor'
+            }), 500
+        
+        try:
+            tensor = parse_tensor(request.get_data(cache=False), request.headers.get('X-Tensor-Shape'),
+                                  request.headers.get('X-Tensor-Dtype'), image_shape, MAX_BATCH_IMAGES)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        normalize_started = time.perf_counter()
+        features = to_features(tensor, active_session.allocate(len(tensor)))
+        record_stage('normalize', time.perf_counter() - normalize_started)
+        
+        # Single images join the micro-batch like /analyze; batches are one forest pass
+        model_started = time.perf_counter()
+        if len(features) == 1 and batcher is not None:
+            probabilities = batcher.predict_proba(active_session, features[0])[np.newaxis, :]
+        else:
+            probabilities = active_session.predict_proba(features)
+        model_seconds = time.perf_counter() - model_started
+        record_stage('model', model_seconds)
+        
+        predictions = [build_prediction(active_session, row) for row in probabilities]
+        if shadow is not None:
+            for row, prediction in enumerate(predictions):
+                shadow.offer(model_name, active_session, features[row], prediction, model_seconds / len(features))
+        record_model_request(model_name, started, [prediction['predicted_class'] for prediction in predictions])
+        
+        if request.accept_mimetypes.best_match(['application/json', BINARY_MIMETYPE]) == BINARY_MIMETYPE:
+            response = Response(encode_probabilities(probabilities), mimetype=BINARY_MIMETYPE)
+            response.headers['X-Class-Names'] = ','.join(
+                active_session.class_name_for(column) for column in range(probabilities.shape[1]))
+            response.headers['X-Tensor-Shape'] = ','.join(str(dim) for dim in probabilities.shape)
+            response.headers['X-Tensor-Dtype'] = 'float32'
+            return tag_model(response, model_name, active_session)
+        
+        for index, prediction in enumerate(predictions):
+            prediction['success'] = True
+            prediction['index'] = index
+        
+        response = jsonify({
+            'success': True,
+            'total': len(predictions),
+            'model_name': model_name,
+            'model_version': active_session.model_version,
+            'results': predictions
+        })
+        return tag_model(response, model_name, active_session)
+        
+    except RequestEntityTooLarge as e:
+        return too_large_response(e)
     except Exception as e:
-        print(f"❌ Analysis error: {e}")
+        print(f"❌ Raw analysis error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    Queue a bulk classification job
+    
+    Send either a zip archive (multipart field `archive`) or JSON
+    `{"paths": [...]}` naming images, directories or zip archives under
+    RHYTHMIQ_JOB_INPUT_ROOTS. The job runs in the background on the model
+    serving the request; poll GET /jobs/<id> for progress and results.
+    """
+    if job_runner is None:
+        return jsonify({'success': False, 'error': 'Bulk jobs are disabled (RHYTHMIQ_JOB_WORKERS=0)'}), 503
+    
+    try:
+        try:
+            model_name, active_session = select_session()
+        except KeyError as e:
+            return unknown_model_response(e.args[0])
+        
+        if active_session is None:
+            return jsonify({'success': False, 'error': 'Model not loaded'}), 500
+        if not active_session.model_path:
+            return jsonify({'success': False, 'error': 'Bulk jobs need a model loaded from a bundle'}), 503
+        
+        job_id = uuid.uuid4().hex
+        input_dir = os.path.join(JOB_DIR, job_id)
+        max_bytes = int(MAX_JOB_EXTRACT_MB * 1024 * 1024)
+        try:
+            if 'archive' in request.files:
+                items = extract_archive(request.files['archive'].stream, input_dir, MAX_JOB_IMAGES, max_bytes)
+            else:
+                paths = (request.get_json(silent=True) or {}).get('paths')
+                if not isinstance(paths, list) or not paths:
+                    return jsonify({'success': False,
+                                    'error': 'Send a zip archive (field "archive") or JSON {"paths": [...]}'}), 400
+                items = resolve_server_paths(paths, JOB_INPUT_ROOTS, input_dir, MAX_JOB_IMAGES, max_bytes)
+        except JobInputError as e:
+            shutil.rmtree(input_dir, ignore_errors=True)
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        job_runner.store.create_job(items, active_session.model_path, active_session.model_version,
+                                    active_session.target_size, input_dir=input_dir, job_id=job_id)
+        job_runner.wake()
+        print(f"📦 Queued job {job_id} with {len(items)} images")
+        
+        response = jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'total': len(items),
+            'model_name': model_name,
+            'model_version': active_session.model_version,
+            'status_url': f'/jobs/{job_id}'
+        })
+        response.status_code = 202
+        response.headers['Location'] = f'/jobs/{job_id}'
+        return tag_model(response, model_name, active_session)
+        
+    except RequestEntityTooLarge as e:
+        return too_large_response(e)
+    except Exception as e:
+        print(f"❌ Job submission error: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress, throughput and a page of results (`offset`, `limit`) of a bulk job"""
+    if job_runner is None:
+        return jsonify({'success': False, 'error': 'Bulk jobs are disabled (RHYTHMIQ_JOB_WORKERS=0)'}), 503
+    
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(max(0, request.args.get('limit', 100, type=int)), 1000)
+    report = job_runner.store.get(job_id, offset, limit)
+    if report is None:
+        return jsonify({'success': False, 'error': f'Unknown job: {job_id}'}), 404
+    
+    report['success'] = True
+    return jsonify(report)
+
 if __name__ == '__main__':
     print("🫀 RhythmIQ Python ML API Starting...")
     print("=" * 50)
@@ -169,6 +1890,10 @@ if __name__ == '__main__':
     if not load_model():
         print("❌ Failed to start API - model loading failed")
         sys.exit(1)
+    start_model_watcher()
+    start_job_runner()
+    start_process_executor()
+    start_forest_partitions()
     
     # Get port from environment variable (for cloud deployment) or use default
     port = int(os.environ.get('PORT', 8083))
@@ -0,0 +1,215 @@
+"""
+🫀 RhythmIQ Shadow Evaluation
+============================
+Runs a candidate model on a sample of live traffic without touching the
+request path: the already-preprocessed input of sampled requests is queued
+for a background thread, which classifies it with the candidate and logs
+how it compares with the primary answer to a SQLite file. A full queue drops
+the sample instead of making the request wait.
+"""
+
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shadow_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    primary_model TEXT,
+    primary_version TEXT,
+    candidate_model TEXT,
+    candidate_version TEXT,
+    primary_class TEXT,
+    candidate_class TEXT,
+    agree INTEGER,
+    primary_confidence REAL,
+    candidate_confidence REAL,
+    confidence_delta REAL,
+    primary_latency_ms REAL,
+    candidate_latency_ms REAL
+)
+"""
+
+
+class ShadowEvaluator:
+    """
+    Background comparison of a candidate model against the primary answers
+    """
+
+    def __init__(self, candidate_name, get_candidate, db_path, sample_rate=0.1, queue_size=256, rng=None):
+        """
+        Initialize the shadow evaluator
+
+        Args:
+            candidate_name (str): Name the candidate is reported under
+            get_candidate (callable): Returns the candidate session (may load it; runs off the request path)
+            db_path (str): SQLite file the comparisons are written to
+            sample_rate (float): Fraction of requests shadowed (0-1)
+            queue_size (int): Samples waiting for the worker before new ones are dropped
+            rng (random.Random): Random source for sampling
+        """
+        self.candidate_name = candidate_name
+        self.get_candidate = get_candidate
+        self.db_path = db_path
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+        # Counters for monitoring
+        self._sampled = 0
+        self._dropped = 0
+        self._evaluated = 0
+        self._failed = 0
+        self._agreements = 0
+        self._confidence_delta_total = 0.0
+        self._candidate_seconds_total = 0.0
+
+    def offer(self, primary_name, primary_session, features, prediction, primary_seconds):
+        """
+        Maybe queue a request for shadow evaluation; never blocks
+
+        Args:
+            primary_name (str): Model that answered the request
+            primary_session (InferenceSession): Session that answered the request
+            features (numpy.ndarray): Flattened preprocessed image (must not be modified afterwards)
+            prediction (dict): Primary answer (predicted_class, confidence)
+            primary_seconds (float): Time the primary model took
+
+        Returns:
+            bool: True if the request was queued
+        """
+        if primary_name == self.candidate_name or self._rng.random() >= self.sample_rate:
+            return False
+
+        item = (time.time(), primary_name, primary_session.model_version, features,
+                prediction['predicted_class'], prediction['confidence'], primary_seconds)
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+
+        with self._lock:
+            self._sampled += 1
+        return True
+
+    def join(self, timeout=5.0):
+        """
+        Wait until every queued sample has been evaluated (for tests and shutdown)
+
+        Args:
+            timeout (float): Seconds to wait at most
+
+        Returns:
+            bool: True if the queue drained in time
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        """
+        Report shadow counters
+
+        Returns:
+            dict: Settings, sample/drop counts, agreement rate and mean deltas
+        """
+        with self._lock:
+            evaluated = self._evaluated
+            return {
+                'enabled': True,
+                'candidate_model': self.candidate_name,
+                'sample_rate': self.sample_rate,
+                'db_path': self.db_path,
+                'sampled': self._sampled,
+                'dropped': self._dropped,
+                'evaluated': evaluated,
+                'failed': self._failed,
+                'queued': self._queue.qsize(),
+                'agreement_rate': self._agreements / evaluated if evaluated else 0.0,
+                'mean_confidence_delta': self._confidence_delta_total / evaluated if evaluated else 0.0,
+                'mean_candidate_latency_ms': self._candidate_seconds_total / evaluated * 1000.0 if evaluated else 0.0
+            }
+
+    def _ensure_worker(self):
+        """Start the worker thread (again after a fork, threads do not survive it)"""
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='rhythmiq-shadow', daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def _connect(self):
+        """Open the results database (the connection belongs to the worker thread)"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.db_path)
+        connection.execute(_SCHEMA)
+        connection.commit()
+        return connection
+
+    def _run(self):
+        """Worker loop: evaluate queued samples with the candidate and log them"""
+        connection = None
+        while True:
+            item = self._queue.get()
+            try:
+                if connection is None:
+                    connection = self._connect()
+                self._evaluate(connection, item)
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                print(f"⚠️ Shadow evaluation failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _evaluate(self, connection, item):
+        """Classify one sample with the candidate and record the comparison"""
+        created_at, primary_name, primary_version, features, primary_class, primary_confidence, primary_seconds = item
+
+        candidate = self.get_candidate()
+        if candidate is None:
+            raise RuntimeError(f"Candidate model '{self.candidate_name}' is not available")
+
+        if candidate.feature_count != features.size:
+            raise ValueError(f"Candidate expects {candidate.feature_count} features, the primary model "
+                             f"was given {features.size}")
+
+        started = time.perf_counter()
+        prediction = candidate.describe(candidate.predict_proba(features.reshape(1, -1))[0], with_severity=False)
+        candidate_seconds = time.perf_counter() - started
+
+        agree = prediction['predicted_class'] == primary_class
+        confidence_delta = prediction['confidence'] - primary_confidence
+
+        connection.execute(
+            'INSERT INTO shadow_results (created_at, primary_model, primary_version, candidate_model, '
+            'candidate_version, primary_class, candidate_class, agree, primary_confidence, '
+            'candidate_confidence, confidence_delta, primary_latency_ms, candidate_latency_ms) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (created_at, primary_name, primary_version, self.candidate_name, candidate.model_version,
+             primary_class, prediction['predicted_class'], int(agree), primary_confidence,
+             prediction['confidence'], confidence_delta, primary_seconds * 1000.0, candidate_seconds * 1000.0))
+        connection.commit()
+
+        with self._lock:
+            self._evaluated += 1
+            self._agreements += int(agree)
+            self._confidence_delta_total += confidence_delta
+            self._candidate_seconds_total += candidate_seconds
@@ -0,0 +1,107 @@
+"""
+🫀 RhythmIQ Thread Budget Benchmark
+==================================
+Measures /analyze-style inference (decode, preprocess, one forest pass per
+image) for several RHYTHMIQ_INFERENCE_THREADS budgets at several request
+concurrency levels. Every budget runs in a fresh interpreter, the way a
+deployment would start, and reports throughput and p95 latency, so the
+point where extra threads only add contention is visible.
+
+    python 09_python_api/thread_benchmark.py --model 05_trained_models/rythmguard_model.joblib \\
+        --budgets 0,1,2,4 --concurrency 1,4,16
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '03_model_training'))
+
+
+def measure_budget(model_path, budget, concurrency_levels, image_count):
+    """
+    Apply one thread budget to this process and time every concurrency level
+
+    Args:
+        model_path (str): Model bundle
+        budget (int): Thread budget (0 = library defaults)
+        concurrency_levels (list): Request threads to try
+        image_count (int): Images classified per level
+
+    Returns:
+        list: {'concurrency', 'images_per_second', 'p95_ms'} per level
+    """
+    from inference_session import InferenceSession
+    from process_benchmark import synthetic_images
+    from thread_budget import apply_thread_budget
+
+    apply_thread_budget(budget)
+    session = InferenceSession.from_bundle(model_path, threads=budget)
+    images = synthetic_images(image_count)
+
+    def classify(image_bytes):
+        started = time.perf_counter()
+        image = session.preprocessor.load_and_preprocess_bytes(image_bytes, reduced_decode=True)
+        session.predict_proba(image.reshape(1, -1))
+        return time.perf_counter() - started
+
+    # One untimed pass so thread pools and caches are warm
+    classify(images[0])
+
+    results = []
+    for concurrency in concurrency_levels:
+        with ThreadPoolExecutor(concurrency) as pool:
+            started = time.perf_counter()
+            latencies = list(pool.map(classify, images))
+            seconds = time.perf_counter() - started
+        results.append({
+            'concurrency': concurrency,
+            'images_per_second': len(images) / seconds,
+            'p95_ms': float(np.percentile(latencies, 95) * 1000.0)
+        })
+    return results
+
+
+def run_budget(model_path, budget, concurrency_levels, image_count):
+    """Measure one budget in a fresh interpreter and return its results"""
+    command = [sys.executable, os.path.abspath(__file__), '--model', model_path, '--single-budget', str(budget),
+               '--concurrency', ','.join(str(level) for level in concurrency_levels),
+               '--images', str(image_count)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Budget {budget} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inference throughput versus thread budget')
+    parser.add_argument('--model', required=True, help='Model bundle (.joblib or .mmap directory)')
+    parser.add_argument('--budgets', default='0,1,2,4', help='Thread budgets to compare (0 = library defaults)')
+    parser.add_argument('--concurrency', default='1,4,16', help='Concurrent requests to simulate')
+    parser.add_argument('--images', type=int, default=64, help='Images per measurement')
+    parser.add_argument('--single-budget', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(',')]
+    if args.single_budget is not None:
+        print(json.dumps(measure_budget(args.model, args.single_budget, concurrency_levels, args.images)))
+        return 0
+
+    print(f"🧵 {args.images} images per run, {os.cpu_count()} CPUs")
+    print(f"{'budget':>14} {'concurrency':>12} {'img/s':>8} {'p95 ms':>8}")
+    for budget in [int(budget) for budget in args.budgets.split(',')]:
+        label = 'defaults' if budget == 0 else str(budget)
+        for row in run_budget(args.model, budget, concurrency_levels, args.images):
+            print(f"{label:>14} {row['concurrency']:>12} {row['images_per_second']:>8.1f} {row['p95_ms']:>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+🫀 RhythmIQ Production Entry Point
+=================================
+WSGI entry point for running the ML API under gunicorn with several worker
+processes. The model is loaded here, once, in the gunicorn master
+(`preload_app`), and the workers forked from it share the forest's memory
+copy-on-write instead of each loading their own copy.
+
+Run with:
+    python 09_python_api/wsgi.py
+or:
+    gunicorn -c 09_python_api/gunicorn.conf.py --chdir 09_python_api wsgi:app
+"""
+
+import gc
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import rhythmiq_api
+from rhythmiq_api import app
+
+
+def preload():
+    """Load the model in the master process before workers are forked"""
+    if not rhythmiq_api.load_model():
+        raise RuntimeError("Failed to start API - model loading failed")
+    
+    # Move everything loaded so far (model included) out of the garbage
+    # collector's generations, so collections in the workers do not write
+    # to those objects and un-share their pages
+    gc.collect()
+    gc.freeze()
+
+if __name__ == '__main__':
+    from gunicorn.app.wsgiapp import run
+    
+    # gunicorn imports this module again as `wsgi`, which does the preload
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+    sys.argv = ['gunicorn', '-c', config_path, '--chdir', os.path.dirname(config_path), 'wsgi:app']
+    run()
+else:
+    preload()